@@ -0,0 +1,2 @@
+""" Benchmarks of the harvest, against a local mock OAI-PMH Data Provider.
+"""
@@ -0,0 +1,336 @@
+""" Mock OAI-PMH Data Provider, served in-process through a requests
+transport adapter.
+"""
+
+import io
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+import requests
+from requests.adapters import BaseAdapter
+
+from core_main_app.utils.datetime import utc_datetime_iso8601_to_datetime
+
+OAI_DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+METADATA_PREFIX = "oai_dc"
+METADATA_NAMESPACE = "http://www.openarchives.org/OAI/2.0/oai_dc/"
+SCHEMA = "http://www.openarchives.org/OAI/2.0/oai_dc.xsd"
+
+
+class MockDataProvider:
+    """OAI-PMH Data Provider generating its records. Records can be updated
+    or deleted between two harvests.
+    """
+
+    url = "http://benchmark.provider/oai/"
+
+    def __init__(
+        self,
+        record_count=1000,
+        record_size=1024,
+        page_size=100,
+        set_count=0,
+        latency=0.0,
+        deleted_ratio=0.0,
+        token_attributes=True,
+        empty_last_token=True,
+        bad_token_after=None,
+    ):
+        """Init the Data Provider.
+
+        Args:
+            record_count: Number of records.
+            record_size: Approximate size of the metadata of a record, in
+                bytes.
+            page_size: Number of records of a ListRecords page.
+            set_count: Number of sets, the records are spread over the sets.
+            latency: Time to wait before answering a request, in seconds.
+            deleted_ratio: Ratio of records initially deleted.
+            token_attributes: Give the cursor, completeListSize and
+                expirationDate attributes of the resumption tokens.
+            empty_last_token: End the lists with an empty resumption token
+                instead of no resumption token.
+            bad_token_after: Number of pages after which the resumption
+                tokens are rejected as expired, None to accept them all.
+        """
+        self.record_size = record_size
+        self.page_size = page_size
+        self.set_count = set_count
+        self.latency = latency
+        self.token_attributes = token_attributes
+        self.empty_last_token = empty_last_token
+        self.bad_token_after = bad_token_after
+        self.requests = 0
+        self.records_served = 0
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        deleted_every = int(1 / deleted_ratio) if deleted_ratio else 0
+        self.records = [
+            {
+                "identifier": f"oai:benchmark.provider:{index}",
+                "datestamp": start + timedelta(seconds=index),
+                "deleted": bool(deleted_every) and index % deleted_every == 0,
+                "sets": ([f"set{index % set_count}"] if set_count > 0 else []),
+                "version": 0,
+            }
+            for index in range(record_count)
+        ]
+
+    @property
+    def set_specs(self):
+        """Return the specs of the sets of the Data Provider.
+
+        Returns:
+            List of set specs.
+
+        """
+        return [f"set{index}" for index in range(self.set_count)]
+
+    def update(self, ratio):
+        """Update a ratio of the records, spread over the list.
+
+        Args:
+            ratio: Ratio of the records to update.
+        """
+        now = datetime.now(timezone.utc)
+        for record in self._select(ratio):
+            record["version"] += 1
+            record["datestamp"] = now
+
+    def delete(self, ratio):
+        """Delete a ratio of the records, spread over the list.
+
+        Args:
+            ratio: Ratio of the records to delete.
+        """
+        now = datetime.now(timezone.utc)
+        for record in self._select(ratio):
+            record["deleted"] = True
+            record["datestamp"] = now
+
+    def _select(self, ratio):
+        """Select a ratio of the records, spread over the list.
+
+        Args:
+            ratio: Ratio of the records to select.
+
+        Returns:
+            List of records.
+
+        """
+        if ratio <= 0:
+            return []
+        step = max(int(1 / ratio), 1)
+        return self.records[::step]
+
+    def mount(self, session):
+        """Serve the Data Provider through a requests session.
+
+        Args:
+            session: requests.Session instance.
+        """
+        session.mount(self.url, MockDataProviderAdapter(self))
+
+    def get(self, params):
+        """Answer an OAI-PMH request.
+
+        Args:
+            params: Dict of the query parameters.
+
+        Returns:
+            Body of the response (bytes).
+
+        """
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if params.get("verb") != "ListRecords":
+            return self._error("badVerb", "Only ListRecords is supported.")
+        if "resumptionToken" in params:
+            return self._list_records_from_token(params["resumptionToken"])
+        if params.get("metadataPrefix") != METADATA_PREFIX:
+            return self._error(
+                "cannotDisseminateFormat", "Unknown metadata prefix."
+            )
+        return self._list_records(
+            params.get("from"), params.get("set"), offset=0, page=0
+        )
+
+    def _list_records_from_token(self, token):
+        """Answer a ListRecords request with a resumption token.
+
+        Args:
+            token: Resumption token.
+
+        Returns:
+            Body of the response (bytes).
+
+        """
+        try:
+            offset, page, from_date, set_spec = token.split("|")
+            offset, page = int(offset), int(page)
+        except ValueError:
+            return self._error("badResumptionToken", "Malformed token.")
+        if self.bad_token_after is not None and page > self.bad_token_after:
+            return self._error("badResumptionToken", "Expired token.")
+        return self._list_records(
+            from_date or None, set_spec or None, offset, page
+        )
+
+    def _list_records(self, from_date, set_spec, offset, page):
+        """Answer a page of a ListRecords request.
+
+        Args:
+            from_date: From date of the request.
+            set_spec: Set of the request.
+            offset: Index of the first record of the page in the list.
+            page: Index of the page.
+
+        Returns:
+            Body of the response (bytes).
+
+        """
+        records = self.records
+        if from_date:
+            from_datetime = utc_datetime_iso8601_to_datetime(from_date)
+            records = [
+                record
+                for record in records
+                if record["datestamp"] >= from_datetime
+            ]
+        if set_spec:
+            records = [
+                record for record in records if set_spec in record["sets"]
+            ]
+        if not records:
+            return self._error("noRecordsMatch", "No records.")
+
+        page_records = records[offset : offset + self.page_size]
+        self.records_served += len(page_records)
+        parts = [
+            _OAI_PMH_HEADER,
+            "<ListRecords>",
+            *(self._record(record) for record in page_records),
+        ]
+        next_offset = offset + len(page_records)
+        attributes = ""
+        if self.token_attributes:
+            expiration_date = datetime.now(timezone.utc) + timedelta(hours=1)
+            attributes = (
+                f' cursor="{offset}" completeListSize="{len(records)}"'
+                f' expirationDate="{expiration_date.strftime(OAI_DATE_FORMAT)}"'
+            )
+        if next_offset < len(records):
+            token = (
+                f"{next_offset}|{page + 1}|{from_date or ''}|{set_spec or ''}"
+            )
+            parts.append(
+                f"<resumptionToken{attributes}>{escape(token)}"
+                "</resumptionToken>"
+            )
+        elif offset > 0 and self.empty_last_token:
+            parts.append(f"<resumptionToken{attributes}/>")
+        parts.append("</ListRecords></OAI-PMH>")
+        return "".join(parts).encode("utf-8")
+
+    def _record(self, record):
+        """Return the XML of a record.
+
+        Args:
+            record: Record.
+
+        Returns:
+            XML of the record.
+
+        """
+        header = (
+            f"<identifier>{record['identifier']}</identifier>"
+            f"<datestamp>{record['datestamp'].strftime(OAI_DATE_FORMAT)}"
+            "</datestamp>"
+            + "".join(
+                f"<setSpec>{set_spec}</setSpec>" for set_spec in record["sets"]
+            )
+        )
+        if record["deleted"]:
+            return (
+                f'<record><header status="deleted">{header}</header></record>'
+            )
+
+        words = self.record_size // 8
+        return (
+            f"<record><header>{header}</header><metadata>"
+            f'<oai_dc:dc xmlns:oai_dc="{METADATA_NAMESPACE}" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f"<dc:identifier>{record['identifier']}</dc:identifier>"
+            f"<dc:title>Record {record['identifier']} version "
+            f"{record['version']}</dc:title>"
+            f"<dc:description>{' lorem' * words}</dc:description>"
+            "</oai_dc:dc></metadata></record>"
+        )
+
+    @staticmethod
+    def _error(code, message):
+        """Return an OAI-PMH error.
+
+        Args:
+            code: Error code.
+            message: Error message.
+
+        Returns:
+            Body of the response (bytes).
+
+        """
+        return (
+            f'{_OAI_PMH_HEADER}<error code="{code}">{escape(message)}</error>'
+            "</OAI-PMH>"
+        ).encode("utf-8")
+
+
+_OAI_PMH_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">'
+    "<responseDate>2020-01-01T00:00:00Z</responseDate>"
+    "<request>http://benchmark.provider/oai/</request>"
+)
+
+
+class MockDataProviderAdapter(BaseAdapter):
+    """requests transport adapter answering with a MockDataProvider."""
+
+    def __init__(self, provider):
+        """Init the adapter.
+
+        Args:
+            provider: MockDataProvider instance.
+        """
+        super().__init__()
+        self.provider = provider
+
+    def send(self, request, stream=False, **kwargs):
+        """Answer a request with the Data Provider.
+
+        Args:
+            request: requests.PreparedRequest instance.
+            stream: Stream the response body.
+            **kwargs: Other arguments of the transport.
+
+        Returns:
+            requests.Response instance.
+
+        """
+        params = {
+            key: values[-1]
+            for key, values in parse_qs(urlsplit(request.url).query).items()
+        }
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "text/xml; charset=utf-8"
+        response.encoding = "utf-8"
+        response.raw = io.BytesIO(self.provider.get(params))
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        """Close the adapter."""
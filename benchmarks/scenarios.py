@@ -0,0 +1,227 @@
+""" Benchmark scenarios of the harvest of a registry.
+"""
+
+import time
+
+from django.db import connection
+
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import (
+    OaiHarvesterMetadataFormat,
+)
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format_set.models import (
+    OaiHarvesterMetadataFormatSet,
+)
+from core_oaipmh_harvester_app.components.oai_harvester_set.models import (
+    OaiHarvesterSet,
+)
+from core_oaipmh_harvester_app.components.oai_harvest_checkpoint.models import (
+    OaiHarvestCheckpoint,
+)
+from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from core_oaipmh_harvester_app.components.oai_registry import (
+    api as oai_registry_api,
+)
+from core_oaipmh_harvester_app.components.oai_registry.models import (
+    OaiRegistry,
+)
+from core_oaipmh_harvester_app.utils import http_session_operations
+from benchmarks import provider as mock_provider
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+REGISTRY_NAME = "Benchmark"
+
+
+def create_registry(provider):
+    """Create the registry of a Data Provider, with its metadata format and
+    its sets, and serve the Data Provider to the harvester.
+
+    Args:
+        provider: MockDataProvider instance.
+
+    Returns:
+        OaiRegistry instance.
+
+    """
+    OaiRegistry.objects.filter(name=REGISTRY_NAME).delete()
+    registry = OaiRegistry.objects.create(
+        name=REGISTRY_NAME,
+        url=provider.url,
+        harvest_rate=60,
+        harvest=True,
+        is_activated=True,
+    )
+    OaiHarvesterMetadataFormat.objects.create(
+        metadata_prefix=mock_provider.METADATA_PREFIX,
+        schema=mock_provider.SCHEMA,
+        metadata_namespace=mock_provider.METADATA_NAMESPACE,
+        raw={},
+        registry=registry,
+        hash="",
+        harvest=True,
+    )
+    for set_spec in provider.set_specs:
+        OaiHarvesterSet.objects.create(
+            set_spec=set_spec,
+            set_name=set_spec,
+            raw={},
+            registry=registry,
+            harvest=True,
+        )
+    provider.mount(http_session_operations.get_session(provider.url))
+    return registry
+
+
+def reset_harvest(registry):
+    """Forget the last update dates of a registry, so that its next harvest
+    downloads all its records again.
+
+    Args:
+        registry: OaiRegistry instance.
+    """
+    OaiHarvesterMetadataFormat.objects.filter(registry=registry).update(
+        last_update=None
+    )
+    OaiHarvesterMetadataFormatSet.objects.filter(
+        harvester_metadata_format__registry=registry
+    ).delete()
+    OaiHarvestCheckpoint.objects.filter(
+        harvester_metadata_format__registry=registry
+    ).delete()
+
+
+def _prepare_first_harvest(provider, registry):
+    """Empty registry: all the records are inserted."""
+    OaiRecord.objects.filter(registry=registry).delete()
+    reset_harvest(registry)
+
+
+def _prepare_incremental(provider, registry):
+    """Harvested registry, 5% of the records updated since."""
+    _ensure_harvested(registry)
+    provider.update(0.05)
+
+
+def _prepare_full_reharvest(provider, registry):
+    """Harvested registry, harvested again from the beginning: all the
+    records are unchanged."""
+    _ensure_harvested(registry)
+    reset_harvest(registry)
+
+
+def _prepare_deletion_heavy(provider, registry):
+    """Harvested registry, half of the records deleted since."""
+    _ensure_harvested(registry)
+    provider.delete(0.5)
+
+
+def _ensure_harvested(registry):
+    """Harvest a registry if it has no record.
+
+    Args:
+        registry: OaiRegistry instance.
+    """
+    if not OaiRecord.objects.filter(registry=registry).exists():
+        oai_registry_api.harvest_registry(registry)
+
+
+SCENARIOS = {
+    "first_harvest": _prepare_first_harvest,
+    "incremental": _prepare_incremental,
+    "full_reharvest": _prepare_full_reharvest,
+    "deletion_heavy": _prepare_deletion_heavy,
+}
+
+
+def run_scenario(name, provider, registry):
+    """Prepare a scenario and measure the harvest of the registry.
+
+    Args:
+        name: Name of the scenario.
+        provider: MockDataProvider instance.
+        registry: OaiRegistry instance.
+
+    Returns:
+        Dict of the results.
+
+    """
+    SCENARIOS[name](provider, registry)
+    requests_before = provider.requests
+    records_before = provider.records_served
+
+    # Only the queries of the main thread are counted
+    query_counter = _QueryCounter()
+    with connection.execute_wrapper(query_counter):
+        start = time.perf_counter()
+        errors = oai_registry_api.harvest_registry(registry)
+        seconds = time.perf_counter() - start
+
+    records = provider.records_served - records_before
+    queries = query_counter.count
+    return {
+        "scenario": name,
+        "records": records,
+        "requests": provider.requests - requests_before,
+        "errors": len(errors),
+        "seconds": round(seconds, 3),
+        "records_per_second": round(records / seconds, 1) if seconds else 0,
+        "queries": queries,
+        "queries_per_record": round(queries / records, 2) if records else None,
+        "peak_rss_kb": get_peak_rss_kb(),
+    }
+
+
+class _QueryCounter:
+    """Database execute wrapper counting the queries."""
+
+    def __init__(self):
+        """Init the counter."""
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Count a query and execute it."""
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def get_peak_rss_kb():
+    """Return the peak resident set size of the process.
+
+    Returns:
+        Peak RSS in kilobytes, None if unknown.
+
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Compare the throughput of scenarios to a baseline.
+
+    Args:
+        results: List of results of the scenarios.
+        baseline: List of results of the scenarios of the baseline.
+        tolerance: Accepted ratio of throughput lost.
+
+    Returns:
+        List of regression messages.
+
+    """
+    baseline_by_scenario = {result["scenario"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline_by_scenario.get(result["scenario"])
+        if reference is None or not reference["records_per_second"]:
+            continue
+        ratio = result["records_per_second"] / reference["records_per_second"]
+        if ratio < 1 - tolerance:
+            regressions.append(
+                f"{result['scenario']}: {result['records_per_second']} "
+                f"records/s, {reference['records_per_second']} in the "
+                f"baseline ({ratio:.0%})."
+            )
+    return regressions
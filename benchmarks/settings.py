@@ -0,0 +1,24 @@
+""" Benchmark settings
+"""
+
+import os
+import tempfile
+
+from tests.test_settings import *  # noqa: F401,F403
+
+BENCHMARK_DIR = os.environ.get(
+    "BENCHMARK_DIR", tempfile.mkdtemp(prefix="oai_harvester_benchmark_")
+)
+
+# File database, so that the harvest threads share the data
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BENCHMARK_DIR, "benchmark.sqlite3"),
+    },
+}
+
+MEDIA_ROOT = os.path.join(BENCHMARK_DIR, "media")
+
+# Measure the harvester, not the rate limiting of the mock Data Provider
+OAI_HARVESTER_RATE_LIMIT = 0
@@ -17,13 +17,25 @@ from core_oaipmh_harvester_app.components.oai_harvester_metadata_format_set.mode
 from core_oaipmh_harvester_app.components.oai_harvester_set.models import (
     OaiHarvesterSet,
 )
+from core_oaipmh_harvester_app.components.oai_harvest_checkpoint.models import (
+    OaiHarvestCheckpoint,
+)
+from core_oaipmh_harvester_app.components.oai_harvest_metrics.models import (
+    OaiHarvestMetrics,
+)
 from core_oaipmh_harvester_app.components.oai_identify.models import (
     OaiIdentify,
 )
 from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from core_oaipmh_harvester_app.components.oai_record_quarantine.models import (
+    OaiRecordQuarantine,
+)
 from core_oaipmh_harvester_app.components.oai_registry.models import (
     OaiRegistry,
 )
+from core_oaipmh_harvester_app.components.oai_registry_lease.models import (
+    OaiRegistryLease,
+)
 from core_oaipmh_harvester_app.views.admin import (
     views as admin_views,
     ajax as admin_ajax,
@@ -32,9 +44,13 @@ from core_oaipmh_harvester_app.views.admin import (
 admin.site.register(OaiHarvesterMetadataFormat, ViewOnlyAdmin)
 admin.site.register(OaiHarvesterMetadataFormatSet, ViewOnlyAdmin)
 admin.site.register(OaiHarvesterSet, ViewOnlyAdmin)
+admin.site.register(OaiHarvestCheckpoint, ViewOnlyAdmin)
+admin.site.register(OaiHarvestMetrics, ViewOnlyAdmin)
 admin.site.register(OaiIdentify, ViewOnlyAdmin)
 admin.site.register(OaiRecord, ViewOnlyAdmin)
+admin.site.register(OaiRecordQuarantine, ViewOnlyAdmin)
 admin.site.register(OaiRegistry, ViewOnlyAdmin)
+admin.site.register(OaiRegistryLease, ViewOnlyAdmin)
 
 admin_urls = [
     re_path(
@@ -19,6 +19,11 @@ class HarvesterAppConfig(AppConfig):
         Returns:
 
         """
+        from core_oaipmh_harvester_app.components.oai_registry import (
+            query_cache,
+        )
+
+        query_cache.connect_signals()
 
         if "migrate" not in sys.argv and "makemigrations" not in sys.argv:
             from core_oaipmh_harvester_app.tasks import (
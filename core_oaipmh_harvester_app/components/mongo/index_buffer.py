@@ -0,0 +1,129 @@
+""" Buffer of the OaiRecord to index in MongoDB. While buffering is active,
+the ids of the saved OaiRecord are coalesced and indexed by batch tasks.
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+
+from core_oaipmh_harvester_app.settings import (
+    OAI_HARVESTER_MONGO_INDEX_BATCH_SIZE,
+    OAI_HARVESTER_MONGO_INDEX_MAX_MESSAGE_SIZE,
+)
+from core_oaipmh_harvester_app.tasks import index_mongo_oai_records
+
+_local = threading.local()
+
+
+def _get_buffer():
+    """Get the buffer of the current thread.
+
+    Returns:
+        Dict content of each buffered OaiRecord id, None if buffering is not
+        active.
+
+    """
+    return getattr(_local, "oai_record_ids", None)
+
+
+@contextmanager
+def buffered_indexing():
+    """Buffer the OaiRecord indexed in the current thread while the block
+    runs. The buffer is flushed each time it is full and when the block
+    exits.
+    """
+    if _get_buffer() is not None:
+        # Already buffering: the outer block flushes.
+        yield
+        return
+
+    _local.oai_record_ids = {}
+    _local.dict_contents_size = 0
+    try:
+        yield
+    finally:
+        try:
+            flush()
+        finally:
+            _local.oai_record_ids = None
+
+
+def index_oai_record(oai_record_id, dict_content=None):
+    """Index an OaiRecord in MongoDB asynchronously. The OaiRecord is added
+    to the buffer if buffering is active.
+
+    Args:
+        oai_record_id: Id of the OaiRecord.
+        dict_content: Dict content converted during the harvest.
+
+    """
+    oai_record_ids = _get_buffer()
+    if oai_record_ids is None:
+        _send_task({oai_record_id: dict_content})
+        return
+
+    # Send the buffered contents first if the message would be too large.
+    dict_content_size = _get_size(dict_content)
+    if (
+        oai_record_ids
+        and _local.dict_contents_size + dict_content_size
+        > OAI_HARVESTER_MONGO_INDEX_MAX_MESSAGE_SIZE
+    ):
+        flush()
+
+    # A record saved several times is indexed once. The size of its previous
+    # content is still counted, which only sends the batch earlier.
+    oai_record_ids[oai_record_id] = dict_content
+    _local.dict_contents_size += dict_content_size
+    if (
+        len(oai_record_ids) >= OAI_HARVESTER_MONGO_INDEX_BATCH_SIZE
+        or _local.dict_contents_size
+        >= OAI_HARVESTER_MONGO_INDEX_MAX_MESSAGE_SIZE
+    ):
+        flush()
+
+
+def flush():
+    """Send the buffered OaiRecord to a batch indexing task."""
+    oai_record_ids = _get_buffer()
+    if not oai_record_ids:
+        return
+
+    _send_task(oai_record_ids)
+    oai_record_ids.clear()
+    _local.dict_contents_size = 0
+
+
+def _get_size(dict_content):
+    """Get the size of a dict content once serialized in a task message.
+
+    Args:
+        dict_content: Dict content, None if the content has to be converted
+            by the task.
+
+    Returns:
+        Size in bytes.
+
+    """
+    if dict_content is None:
+        return 0
+    return len(json.dumps(dict_content, default=str).encode("utf-8"))
+
+
+def _send_task(dict_contents_by_id):
+    """Send a batch indexing task.
+
+    Args:
+        dict_contents_by_id: Dict content of each OaiRecord id, None if the
+            content has to be converted by the task.
+
+    """
+    # Task arguments are serialized: dict keys have to be strings.
+    dict_contents = {
+        str(oai_record_id): dict_content
+        for oai_record_id, dict_content in dict_contents_by_id.items()
+        if dict_content is not None
+    }
+    index_mongo_oai_records.apply_async(
+        (list(dict_contents_by_id), dict_contents or None)
+    )
@@ -15,10 +15,8 @@ from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models i
     OaiHarvesterMetadataFormat,
 )
 from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
-from core_oaipmh_harvester_app.tasks import (
-    index_mongo_oai_record,
-    delete_mongo_oai_record,
-)
+from core_oaipmh_harvester_app.components.mongo import index_buffer
+from core_oaipmh_harvester_app.tasks import delete_mongo_oai_record
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +26,7 @@ try:
         from bson import ObjectId
         from mongoengine import DoesNotExist
         from mongoengine import fields as mongo_fields
+        from pymongo import UpdateOne
         from core_main_app.components.mongo.models import AbstractMongoData
 
         class MongoOaiRecord(AbstractMongoData):
@@ -43,6 +42,7 @@ try:
             )
             _registry_id = mongo_fields.IntField(db_field="registry")
             _xml_content = None
+            _harvester_metadata_format = None
 
             meta = {
                 "indexes": [
@@ -58,9 +58,13 @@ try:
                 Returns:
 
                 """
-                return OaiHarvesterMetadataFormat.get_by_id(
-                    self._harvester_metadata_format_id
-                )
+                if self._harvester_metadata_format is None:
+                    self._harvester_metadata_format = (
+                        OaiHarvesterMetadataFormat.get_by_id(
+                            self._harvester_metadata_format_id
+                        )
+                    )
+                return self._harvester_metadata_format
 
             @property
             def content(self):
@@ -127,6 +131,40 @@ try:
                 """
                 return MongoOaiRecord.objects.aggregate(*pipeline)
 
+            @staticmethod
+            def load_related_data(mongo_oai_records):
+                """Load the content and the metadata format of a list of
+                MongoOaiRecord with one query per model, instead of one query
+                per MongoOaiRecord when they are accessed.
+
+                Args:
+                    mongo_oai_records: List of MongoOaiRecord.
+
+                Returns:
+
+                """
+                oai_records = OaiRecord.objects.in_bulk(
+                    [
+                        mongo_oai_record.data_id
+                        for mongo_oai_record in mongo_oai_records
+                    ]
+                )
+                metadata_formats = OaiHarvesterMetadataFormat.objects.in_bulk(
+                    {
+                        mongo_oai_record._harvester_metadata_format_id
+                        for mongo_oai_record in mongo_oai_records
+                    }
+                )
+                for mongo_oai_record in mongo_oai_records:
+                    oai_record = oai_records.get(mongo_oai_record.data_id)
+                    if oai_record is not None:
+                        mongo_oai_record._xml_content = oai_record.content
+                    mongo_oai_record._harvester_metadata_format = (
+                        metadata_formats.get(
+                            mongo_oai_record._harvester_metadata_format_id
+                        )
+                    )
+
             @staticmethod
             def init_mongo_oai_record(oai_record):
                 """Initialize mongo oai_record from OaiRecord
@@ -147,14 +185,38 @@ try:
                     mongo_oai_record = MongoOaiRecord()
                     mongo_oai_record.mongo_id = ObjectId()
 
+                MongoOaiRecord._set_oai_record_fields(
+                    mongo_oai_record, oai_record
+                )
+
+                return mongo_oai_record
+
+            @staticmethod
+            def _set_oai_record_fields(
+                mongo_oai_record, oai_record, dict_content=None
+            ):
+                """Set the fields of a mongo oai_record from an OaiRecord
+
+                Args:
+                    mongo_oai_record:
+                    oai_record:
+                    dict_content: Dict content converted during the harvest.
+
+                Returns:
+
+                """
+                if dict_content is None:
+                    dict_content = oai_record.harvested_dict_content
+                if dict_content is None:
+                    dict_content = xml_utils.raw_xml_to_dict(
+                        oai_record.xml_content,
+                        postprocessor=XML_POST_PROCESSOR,
+                        force_list=XML_FORCE_LIST,
+                        list_limit=SEARCHABLE_DATA_OCCURRENCES_LIMIT,
+                    )
                 mongo_oai_record.data_id = oai_record.id
                 mongo_oai_record.title = oai_record.title
-                mongo_oai_record.dict_content = xml_utils.raw_xml_to_dict(
-                    oai_record.xml_content,
-                    postprocessor=XML_POST_PROCESSOR,
-                    force_list=XML_FORCE_LIST,
-                    list_limit=SEARCHABLE_DATA_OCCURRENCES_LIMIT,
-                )
+                mongo_oai_record.dict_content = dict_content
                 mongo_oai_record.creation_date = oai_record.creation_date
                 mongo_oai_record.last_modification_date = (
                     oai_record.last_modification_date
@@ -163,19 +225,70 @@ try:
 
                 mongo_oai_record.identifier = oai_record.identifier
                 mongo_oai_record.deleted = oai_record.deleted
-                mongo_oai_record._harvester_sets_ids = list(
-                    oai_record.harvester_sets.values_list("id", flat=True)
-                )
+                mongo_oai_record._harvester_sets_ids = [
+                    harvester_set.id
+                    for harvester_set in oai_record.harvester_sets.all()
+                ]
                 mongo_oai_record._harvester_metadata_format_id = (
-                    oai_record.harvester_metadata_format.id
-                    if oai_record.harvester_metadata_format
-                    else None
-                )
-                mongo_oai_record._registry_id = (
-                    oai_record.registry.id if oai_record.registry else None
+                    oai_record.harvester_metadata_format_id
                 )
+                mongo_oai_record._registry_id = oai_record.registry_id
 
-                return mongo_oai_record
+            @staticmethod
+            def bulk_index(oai_record_ids, dict_contents=None):
+                """Index a list of OaiRecord with a single bulk write.
+
+                Args:
+                    oai_record_ids: List of OaiRecord ids.
+                    dict_contents: Dict contents converted during the harvest, by OaiRecord id.
+
+                Returns:
+
+                """
+                dict_contents = dict_contents or {}
+                oai_records = OaiRecord.objects.prefetch_related(
+                    "harvester_sets"
+                ).in_bulk(oai_record_ids)
+                operations = []
+                for oai_record in oai_records.values():
+                    mongo_oai_record = MongoOaiRecord()
+                    MongoOaiRecord._set_oai_record_fields(
+                        mongo_oai_record,
+                        oai_record,
+                        dict_contents.get(str(oai_record.id)),
+                    )
+                    document = mongo_oai_record.to_mongo().to_dict()
+                    document.pop("_id", None)
+                    document.pop("mongo_id", None)
+                    operations.append(
+                        UpdateOne(
+                            {"_id": oai_record.id},
+                            {
+                                "$set": document,
+                                "$setOnInsert": {"mongo_id": ObjectId()},
+                            },
+                            upsert=True,
+                        )
+                    )
+                if operations:
+                    MongoOaiRecord._get_collection().bulk_write(
+                        operations, ordered=False
+                    )
+
+            @staticmethod
+            def delete_all_by_registry_id(registry_id):
+                """Delete the MongoOaiRecord of a registry with a single
+                query.
+
+                Args:
+                    registry_id: The registry id.
+
+                Returns:
+
+                """
+                MongoOaiRecord._get_collection().delete_many(
+                    {"registry": int(registry_id)}
+                )
 
             @staticmethod
             def post_save_data(sender, instance, **kwargs):
@@ -187,7 +300,9 @@ try:
 
                 """
                 if settings.MONGODB_ASYNC_SAVE:
-                    index_mongo_oai_record.apply_async((str(instance.id),))
+                    index_buffer.index_oai_record(
+                        instance.id, instance.harvested_dict_content
+                    )
                 else:
                     mongo_oai_record = MongoOaiRecord.init_mongo_oai_record(
                         instance
@@ -0,0 +1,127 @@
+"""
+OaiHarvestCheckpoint API
+"""
+
+from datetime import timedelta
+
+from core_main_app.commons import exceptions
+from core_main_app.utils import datetime as datetime_utils
+from core_oaipmh_harvester_app.components.oai_harvest_checkpoint.models import (
+    OaiHarvestCheckpoint,
+)
+from core_oaipmh_harvester_app.settings import (
+    OAI_HARVESTER_CHECKPOINT_MAX_AGE,
+)
+
+
+def get_resumable_checkpoint(metadata_format, set_, from_date):
+    """Get the checkpoint of an unfinished harvest, if the harvest can be
+    resumed. A checkpoint which can not be resumed anymore is deleted.
+
+    Args:
+        metadata_format: OaiHarvesterMetadataFormat instance.
+        set_: OaiHarvesterSet instance, None if the harvest is not done by
+            set.
+        from_date: From date of the harvest.
+
+    Returns:
+        OaiHarvestCheckpoint instance, None if the harvest can not be resumed.
+
+    """
+    try:
+        checkpoint = OaiHarvestCheckpoint.get_by_metadata_format_and_set(
+            metadata_format, set_
+        )
+    except exceptions.DoesNotExist:
+        return None
+
+    if _is_resumable(checkpoint, from_date):
+        return checkpoint
+
+    checkpoint.delete()
+    return None
+
+
+def _is_resumable(checkpoint, from_date):
+    """Check if the resumption token of a checkpoint can still be used.
+
+    Args:
+        checkpoint: OaiHarvestCheckpoint instance.
+        from_date: From date of the harvest.
+
+    Returns:
+        Yes or No (bool).
+
+    """
+    now = datetime_utils.datetime_now()
+    return (
+        bool(checkpoint.resumption_token)
+        # Only resume the harvest of the same time window
+        and checkpoint.from_date == from_date
+        and (
+            checkpoint.expiration_date is None
+            or checkpoint.expiration_date > now
+        )
+        and checkpoint.last_modified
+        > now - timedelta(seconds=OAI_HARVESTER_CHECKPOINT_MAX_AGE)
+    )
+
+
+def init_checkpoint(metadata_format, set_, from_date):
+    """Initialize the checkpoint of a new harvest. The checkpoint is saved
+    once the first page is stored.
+
+    Args:
+        metadata_format: OaiHarvesterMetadataFormat instance.
+        set_: OaiHarvesterSet instance, None if the harvest is not done by
+            set.
+        from_date: From date of the harvest.
+
+    Returns:
+        OaiHarvestCheckpoint instance.
+
+    """
+    return OaiHarvestCheckpoint(
+        harvester_metadata_format=metadata_format,
+        harvester_set=set_,
+        from_date=from_date,
+        harvest_started_at=datetime_utils.datetime_now(),
+    )
+
+
+def upsert(checkpoint, resumption_info):
+    """Save the resumption token of the last stored page in a checkpoint.
+
+    Args:
+        checkpoint: OaiHarvestCheckpoint instance.
+        resumption_info: Dict of the resumption token, cursor, complete list
+            size and expiration date of the page.
+
+    Returns:
+        OaiHarvestCheckpoint instance.
+
+    """
+    checkpoint.resumption_token = resumption_info["resumption_token"]
+    checkpoint.cursor = resumption_info["cursor"]
+    checkpoint.complete_list_size = resumption_info["complete_list_size"]
+    try:
+        checkpoint.expiration_date = (
+            datetime_utils.utc_datetime_iso8601_to_datetime(
+                resumption_info["expiration_date"]
+            )
+        )
+    except Exception:
+        checkpoint.expiration_date = None
+    checkpoint.save()
+    return checkpoint
+
+
+def delete(checkpoint):
+    """Delete a checkpoint once its harvest is finished.
+
+    Args:
+        checkpoint: OaiHarvestCheckpoint instance.
+
+    """
+    if checkpoint.pk is not None:
+        checkpoint.delete()
@@ -0,0 +1,82 @@
+"""
+OaiHarvestCheckpoint model
+"""
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+
+from core_main_app.commons import exceptions
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import (
+    OaiHarvesterMetadataFormat,
+)
+from core_oaipmh_harvester_app.components.oai_harvester_set.models import (
+    OaiHarvesterSet,
+)
+
+
+class OaiHarvestCheckpoint(models.Model):
+    """Progress of an unfinished ListRecords harvest of a metadata format and
+    a set: the resumption token of the last stored page."""
+
+    harvester_metadata_format = models.ForeignKey(
+        OaiHarvesterMetadataFormat, on_delete=models.CASCADE
+    )
+    harvester_set = models.ForeignKey(
+        OaiHarvesterSet, on_delete=models.CASCADE, blank=True, null=True
+    )
+    from_date = models.CharField(
+        blank=True, null=True, default=None, max_length=50
+    )
+    harvest_started_at = models.DateTimeField()
+    resumption_token = models.TextField(blank=True, null=True, default=None)
+    cursor = models.IntegerField(blank=True, null=True, default=None)
+    complete_list_size = models.IntegerField(
+        blank=True, null=True, default=None
+    )
+    expiration_date = models.DateTimeField(blank=True, null=True, default=None)
+    last_modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Meta"""
+
+        unique_together = ("harvester_metadata_format", "harvester_set")
+        # NULL values are distinct in the unique constraint above: a single
+        # checkpoint is allowed for the harvest of a metadata format without
+        # set.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["harvester_metadata_format"],
+                condition=models.Q(harvester_set__isnull=True),
+                name="oaiharvestcheckpoint_format_no_set_uniq",
+            ),
+        ]
+
+    @staticmethod
+    def get_by_metadata_format_and_set(
+        oai_harvester_metadata_format, oai_harvester_set
+    ):
+        """Get an OaiHarvestCheckpoint by its OaiHarvesterMetadataFormat and
+        OaiHarvesterSet.
+
+        Args:
+            oai_harvester_metadata_format:
+            oai_harvester_set: OaiHarvesterSet, None if the harvest is not
+                done by set.
+
+        Returns:
+            OaiHarvestCheckpoint instance.
+
+        Raises:
+            DoesNotExist: The OaiHarvestCheckpoint doesn't exist.
+            ModelError: Internal error during the process.
+
+        """
+        try:
+            return OaiHarvestCheckpoint.objects.get(
+                harvester_metadata_format=oai_harvester_metadata_format,
+                harvester_set=oai_harvester_set,
+            )
+        except ObjectDoesNotExist as exception:
+            raise exceptions.DoesNotExist(str(exception))
+        except Exception as exception:
+            raise exceptions.ModelError(str(exception))
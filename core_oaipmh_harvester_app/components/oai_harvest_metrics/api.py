@@ -0,0 +1,240 @@
+"""
+OaiHarvestMetrics API
+"""
+
+import logging
+
+from core_main_app.commons import exceptions
+from core_main_app.utils import datetime as datetime_utils
+from core_oaipmh_harvester_app.components.oai_harvest_metrics.models import (
+    OaiHarvestMetrics,
+)
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_PREFIX = "oai_harvester_"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_COUNTERS_HELP = {
+    "harvests_queued": "Harvest tasks queued.",
+    "harvests_started": "Harvests started.",
+    "harvests_skipped": "Harvests skipped because the registry was busy.",
+    "harvests_finished": "Harvests finished.",
+    "harvests_failed": "Harvests finished with errors.",
+    "pages_fetched": "ListRecords pages fetched.",
+    "records_inserted": "Records inserted.",
+    "records_updated": "Records updated.",
+    "records_skipped": "Records unchanged since the last harvest.",
+    "records_deleted": "Records deleted by the Data Provider.",
+    "records_quarantined": "Records which could not be stored.",
+    "bytes_downloaded": "Bytes of ListRecords responses downloaded.",
+    "http_seconds": "Time spent waiting for the Data Provider.",
+    "parse_seconds": "Time spent parsing the ListRecords responses.",
+    "db_seconds": "Time spent storing the records.",
+}
+
+_GAUGES_HELP = {
+    "cursor": "Cursor of the last page of the running harvest.",
+    "complete_list_size": "Size of the list harvested, given by the Data "
+    "Provider.",
+    "harvest_running": "1 if a harvest of the registry is running.",
+    "last_harvest_duration_seconds": "Duration of the last harvest.",
+}
+
+
+def get_by_registry(registry):
+    """Get the harvest metrics of a registry.
+
+    Args:
+        registry: OaiRegistry instance.
+
+    Returns:
+        OaiHarvestMetrics instance, with no counter if the registry has never
+        been harvested.
+
+    """
+    try:
+        return OaiHarvestMetrics.get_by_registry_id(registry.id)
+    except exceptions.DoesNotExist:
+        return OaiHarvestMetrics(registry=registry)
+
+
+def get_all():
+    """Return the harvest metrics of all registries.
+
+    Returns:
+        List of OaiHarvestMetrics.
+
+    """
+    return OaiHarvestMetrics.get_all()
+
+
+def add(registry_id, counters, **fields):
+    """Increment the counters of a registry. Errors are logged, so that the
+    metrics never stop a harvest.
+
+    Args:
+        registry_id: The registry id.
+        counters: Dict of the values to add to the counters.
+        **fields: Values of the fields to set.
+
+    """
+    try:
+        OaiHarvestMetrics.add(registry_id, counters, **fields)
+    except Exception as exception:
+        logger.warning(
+            f"Impossible to save the harvest metrics of registry "
+            f"{registry_id}: {str(exception)}"
+        )
+
+
+def flush(harvest_metrics):
+    """Add the counters and the progress of a running harvest to the metrics
+    of its registry.
+
+    Args:
+        harvest_metrics: HarvestMetrics collector.
+
+    """
+    cursor, complete_list_size = harvest_metrics.progress.get_totals()
+    add(
+        harvest_metrics.registry_id,
+        harvest_metrics.pop_counters(),
+        cursor=cursor,
+        complete_list_size=complete_list_size,
+    )
+
+
+def harvest_started(registry_id):
+    """Count a harvest started.
+
+    Args:
+        registry_id: The registry id.
+
+    Returns:
+        Start date of the harvest.
+
+    """
+    started_at = datetime_utils.datetime_now()
+    add(
+        registry_id,
+        {"harvests_started": 1},
+        current_harvest_started_at=started_at,
+        cursor=None,
+        complete_list_size=None,
+    )
+    return started_at
+
+
+def harvest_finished(registry_id, started_at, failed):
+    """Count a harvest finished.
+
+    Args:
+        registry_id: The registry id.
+        started_at: Start date of the harvest.
+        failed: True if the harvest finished with errors.
+
+    """
+    finished_at = datetime_utils.datetime_now()
+    add(
+        registry_id,
+        {"harvests_finished": 1, "harvests_failed": 1 if failed else 0},
+        current_harvest_started_at=None,
+        last_harvest_finished_at=finished_at,
+        last_harvest_duration=(finished_at - started_at).total_seconds(),
+    )
+
+
+def to_prometheus_text(all_metrics):
+    """Render harvest metrics in the Prometheus text exposition format.
+
+    Args:
+        all_metrics: List of OaiHarvestMetrics.
+
+    Returns:
+        Text of the metrics.
+
+    """
+    all_metrics = list(all_metrics)
+    lines = []
+    for name, help_text in _COUNTERS_HELP.items():
+        _add_prometheus_metric(
+            lines,
+            f"{name}_total",
+            "counter",
+            help_text,
+            [(metrics, getattr(metrics, name)) for metrics in all_metrics],
+        )
+    for name, help_text in _GAUGES_HELP.items():
+        _add_prometheus_metric(
+            lines,
+            name,
+            "gauge",
+            help_text,
+            [
+                (metrics, _get_gauge_value(metrics, name))
+                for metrics in all_metrics
+            ],
+        )
+    return "\n".join(lines) + "\n"
+
+
+def _get_gauge_value(metrics, name):
+    """Return the value of a gauge of the metrics of a registry.
+
+    Args:
+        metrics: OaiHarvestMetrics instance.
+        name: Name of the gauge.
+
+    Returns:
+        Value of the gauge, None if unknown.
+
+    """
+    if name == "harvest_running":
+        return int(metrics.current_harvest_started_at is not None)
+    if name == "last_harvest_duration_seconds":
+        return metrics.last_harvest_duration
+    return getattr(metrics, name)
+
+
+def _add_prometheus_metric(lines, name, metric_type, help_text, samples):
+    """Add a metric and its samples in the Prometheus text exposition format.
+    Unknown values are not exposed.
+
+    Args:
+        lines: List of lines of the exposition.
+        name: Name of the metric, without prefix.
+        metric_type: Type of the metric.
+        help_text: Description of the metric.
+        samples: List of (OaiHarvestMetrics, value) tuples.
+
+    """
+    name = PROMETHEUS_PREFIX + name
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+    for metrics, value in samples:
+        if value is None:
+            continue
+        labels = (
+            f'registry_id="{metrics.registry_id}",'
+            f'registry="{_escape_label_value(metrics.registry.name)}"'
+        )
+        lines.append(f"{name}{{{labels}}} {value}")
+
+
+def _escape_label_value(value):
+    """Escape a label value of the Prometheus text exposition format.
+
+    Args:
+        value: Label value.
+
+    Returns:
+        Escaped label value.
+
+    """
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
@@ -0,0 +1,166 @@
+"""
+Collector of the metrics of a running harvest
+"""
+
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class HarvestProgress:
+    """Progress of the lists of a running harvest given by the Data Provider.
+    The (metadata format, set) pairs harvested at the same time each have
+    their own cursor and list size: the progress of the harvest is their sum.
+    """
+
+    def __init__(self):
+        """Init the progress."""
+        self._progress = {}
+        self._lock = threading.Lock()
+
+    def set(self, key, cursor, complete_list_size):
+        """Set the progress of a list. Unknown values keep the last known
+        ones.
+
+        Args:
+            key: Key of the list, e.g. its (metadata format, set) ids.
+            cursor: Cursor of the last page, None if unknown.
+            complete_list_size: Size of the list, None if unknown.
+        """
+        with self._lock:
+            last_cursor, last_complete_list_size = self._progress.get(
+                key, (None, None)
+            )
+            self._progress[key] = (
+                cursor if cursor is not None else last_cursor,
+                (
+                    complete_list_size
+                    if complete_list_size is not None
+                    else last_complete_list_size
+                ),
+            )
+
+    def get_totals(self):
+        """Return the sum of the progress of the lists.
+
+        Returns:
+            Cursor, complete list size. None if unknown for all the lists.
+
+        """
+        with self._lock:
+            values = list(self._progress.values())
+        return (
+            _sum_known([cursor for cursor, _ in values]),
+            _sum_known([size for _, size in values]),
+        )
+
+
+def _sum_known(values):
+    """Sum the known values.
+
+    Args:
+        values: List of values, None if unknown.
+
+    Returns:
+        Sum of the values, None if all of them are unknown.
+
+    """
+    known_values = [value for value in values if value is not None]
+    return sum(known_values) if known_values else None
+
+
+class HarvestMetrics:
+    """Counters of a running harvest, accumulated in memory until they are
+    added to the OaiHarvestMetrics of the registry. The counters can be
+    incremented by the prefetch thread while the pages are stored.
+    """
+
+    def __init__(self, registry_id, progress=None, progress_key=None):
+        """Init the collector.
+
+        Args:
+            registry_id: The registry id.
+            progress: HarvestProgress shared by the lists of the harvest, a
+                new one if not set.
+            progress_key: Key of the harvested list in the progress.
+        """
+        self.registry_id = registry_id
+        self.progress = progress if progress is not None else HarvestProgress()
+        self.progress_key = progress_key
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, value=1):
+        """Add a value to a counter.
+
+        Args:
+            name: Name of the counter.
+            value: Value to add.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, name):
+        """Add the time spent in the block to a counter.
+
+        Args:
+            name: Name of the counter.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def parse(self, parser, chunks):
+        """Parse the chunks of a response body. The time spent waiting for
+        the chunks and the time spent parsing them are counted separately.
+
+        Args:
+            parser: ListRecordsParser instance.
+            chunks: Iterable of bytes chunks of the response body.
+
+        Returns:
+            Generator of representations of Oai-Pmh record objects.
+
+        """
+        chunks = iter(chunks)
+        while True:
+            with self.timer("http_seconds"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            self.add("bytes_downloaded", len(chunk))
+            with self.timer("parse_seconds"):
+                records = list(parser.feed(chunk))
+            yield from records
+        with self.timer("parse_seconds"):
+            records = list(parser.close())
+        yield from records
+
+    def set_progress(self, resumption_info):
+        """Set the progress of the harvest given by the Data Provider.
+
+        Args:
+            resumption_info: Dict of the resumption token, cursor, complete
+                list size and expiration date of the last page.
+        """
+        if resumption_info is None:
+            return
+        self.progress.set(
+            self.progress_key,
+            resumption_info["cursor"],
+            resumption_info["complete_list_size"],
+        )
+
+    def pop_counters(self):
+        """Return the counters and reset them.
+
+        Returns:
+            Dict of the counters.
+
+        """
+        with self._lock:
+            counters, self._counters = self._counters, {}
+        return counters
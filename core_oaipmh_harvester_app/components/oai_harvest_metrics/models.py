@@ -0,0 +1,133 @@
+"""
+OaiHarvestMetrics model
+"""
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, IntegrityError, transaction
+from django.db.models import F
+
+from core_main_app.commons import exceptions
+from core_oaipmh_harvester_app.components.oai_registry.models import (
+    OaiRegistry,
+)
+
+
+class OaiHarvestMetrics(models.Model):
+    """Counters of the harvests of a registry, and progress of the running
+    harvest. The counters are incremented with update queries, so that the
+    workers harvesting the registry can share them."""
+
+    COUNTERS = (
+        "harvests_queued",
+        "harvests_started",
+        "harvests_skipped",
+        "harvests_finished",
+        "harvests_failed",
+        "pages_fetched",
+        "records_inserted",
+        "records_updated",
+        "records_skipped",
+        "records_deleted",
+        "records_quarantined",
+        "bytes_downloaded",
+        "http_seconds",
+        "parse_seconds",
+        "db_seconds",
+    )
+
+    registry = models.OneToOneField(
+        OaiRegistry, on_delete=models.CASCADE, related_name="harvest_metrics"
+    )
+    harvests_queued = models.IntegerField(default=0)
+    harvests_started = models.IntegerField(default=0)
+    harvests_skipped = models.IntegerField(default=0)
+    harvests_finished = models.IntegerField(default=0)
+    harvests_failed = models.IntegerField(default=0)
+    pages_fetched = models.BigIntegerField(default=0)
+    records_inserted = models.BigIntegerField(default=0)
+    records_updated = models.BigIntegerField(default=0)
+    records_skipped = models.BigIntegerField(default=0)
+    records_deleted = models.BigIntegerField(default=0)
+    records_quarantined = models.BigIntegerField(default=0)
+    bytes_downloaded = models.BigIntegerField(default=0)
+    http_seconds = models.FloatField(default=0)
+    parse_seconds = models.FloatField(default=0)
+    db_seconds = models.FloatField(default=0)
+    cursor = models.IntegerField(blank=True, null=True, default=None)
+    complete_list_size = models.IntegerField(
+        blank=True, null=True, default=None
+    )
+    current_harvest_started_at = models.DateTimeField(
+        blank=True, null=True, default=None
+    )
+    last_harvest_finished_at = models.DateTimeField(
+        blank=True, null=True, default=None
+    )
+    last_harvest_duration = models.FloatField(
+        blank=True, null=True, default=None
+    )
+
+    @staticmethod
+    def get_by_registry_id(registry_id):
+        """Get the OaiHarvestMetrics of a registry.
+
+        Args:
+            registry_id: The registry id.
+
+        Returns:
+            OaiHarvestMetrics instance.
+
+        Raises:
+            DoesNotExist: The OaiHarvestMetrics doesn't exist.
+            ModelError: Internal error during the process.
+
+        """
+        try:
+            return OaiHarvestMetrics.objects.get(registry_id=registry_id)
+        except ObjectDoesNotExist as exception:
+            raise exceptions.DoesNotExist(str(exception))
+        except Exception as exception:
+            raise exceptions.ModelError(str(exception))
+
+    @staticmethod
+    def get_all():
+        """Return all OaiHarvestMetrics, with their registry.
+
+        Returns:
+            List of OaiHarvestMetrics.
+
+        """
+        return OaiHarvestMetrics.objects.select_related("registry").order_by(
+            "registry_id"
+        )
+
+    @staticmethod
+    def add(registry_id, counters, **fields):
+        """Increment the counters of a registry and set the given fields. The
+        OaiHarvestMetrics of the registry is created if it doesn't exist.
+
+        Args:
+            registry_id: The registry id.
+            counters: Dict of the values to add to the counters.
+            **fields: Values of the fields to set.
+
+        """
+        updates = {name: F(name) + value for name, value in counters.items()}
+        updates.update(fields)
+        if not updates:
+            return
+
+        if OaiHarvestMetrics.objects.filter(registry_id=registry_id).update(
+            **updates
+        ):
+            return
+
+        try:
+            with transaction.atomic():
+                OaiHarvestMetrics.objects.create(registry_id=registry_id)
+        except IntegrityError:
+            # Created by another worker in the meantime
+            pass
+        OaiHarvestMetrics.objects.filter(registry_id=registry_id).update(
+            **updates
+        )
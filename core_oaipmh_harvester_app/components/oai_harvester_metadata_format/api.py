@@ -6,11 +6,11 @@ from rest_framework import status
 
 from core_main_app.commons import exceptions
 from core_main_app.components.template import api as api_template
-from core_main_app.utils.requests_utils.requests_utils import send_get_request
 from core_main_app.utils.xml import get_hash
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import (
     OaiHarvesterMetadataFormat,
 )
+from core_oaipmh_harvester_app.utils import http_session_operations
 
 
 def upsert(oai_harvester_metadata_format):
@@ -175,7 +175,7 @@ def init_schema_info(oai_harvester_metadata_format, request=None):
         session_id = request.session.session_key
     except Exception:
         session_id = None
-    http_response = send_get_request(
+    http_response = http_session_operations.send_get_request(
         oai_harvester_metadata_format.schema, cookies={"sessionid": session_id}
     )
     if http_response.status_code == status.HTTP_200_OK:
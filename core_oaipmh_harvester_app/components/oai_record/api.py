@@ -50,6 +50,28 @@ def get_all_by_registry_id(registry_id, order_by_field=DATA_SORTING_FIELDS):
     return OaiRecord.get_all_by_registry_id(registry_id, order_by_field)
 
 
+def get_all_to_export(
+    registry_id, harvester_metadata_format_id=None, harvester_set_id=None
+):
+    """Return the OaiRecord of a registry to export, not deleted, ordered by
+    id.
+
+    Args:
+        registry_id: The registry id.
+        harvester_metadata_format_id: Id of the OaiHarvesterMetadataFormat of
+            the records, all formats if None.
+        harvester_set_id: Id of an OaiHarvesterSet of the records, all sets if
+            None.
+
+    Returns:
+        List of OaiRecord.
+
+    """
+    return OaiRecord.get_all_to_export(
+        registry_id, harvester_metadata_format_id, harvester_set_id
+    )
+
+
 @access_control(main_access_control_api.can_anonymous_access_public_data)
 def get_count_by_registry_id(registry_id, user):
     """Return the number of OaiRecord by registry id.
@@ -74,6 +96,41 @@ def delete_all_by_registry_id(registry_id):
     OaiRecord.delete_all_by_registry_id(registry_id)
 
 
+def delete_batch_by_registry_id(registry_id, after_id, batch_size):
+    """Delete the next batch of OaiRecord of a registry, without loading them
+    and without sending the delete signals.
+
+    Args:
+        registry_id: The registry id.
+        after_id: Id of the last OaiRecord of the previous batch, 0 for the
+            first batch.
+        batch_size: Maximum number of OaiRecord to delete.
+
+    Returns:
+        List of the ids of the deleted OaiRecord.
+
+    """
+    return OaiRecord.delete_batch_by_registry_id(
+        registry_id, after_id, batch_size
+    )
+
+
+def delete_all_indexed_by_registry_id(registry_id):
+    """Delete the MongoDB documents of the OaiRecord of a registry, if the
+    records are indexed in MongoDB.
+
+    Args:
+        registry_id: The registry id.
+
+    """
+    if settings.MONGODB_INDEXING:
+        from core_oaipmh_harvester_app.components.mongo.models import (
+            MongoOaiRecord,
+        )
+
+        MongoOaiRecord.delete_all_by_registry_id(registry_id)
+
+
 def delete(oai_record):
     """Delete an OaiHarvesterMetadataFormat.
 
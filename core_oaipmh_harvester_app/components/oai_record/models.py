@@ -2,11 +2,14 @@
 OaiRecord model
 """
 
+import gzip
+
 from django.conf import settings
 from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Q
 
 from core_main_app.commons import exceptions
 from core_main_app.components.abstract_data.models import AbstractData
@@ -16,6 +19,7 @@ from core_main_app.settings import (
     XML_FORCE_LIST,
 )
 from core_main_app.utils import xml as xml_utils
+from core_main_app.utils.datetime import datetime_now
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import (
     OaiHarvesterMetadataFormat,
 )
@@ -25,6 +29,15 @@ from core_oaipmh_harvester_app.components.oai_harvester_set.models import (
 from core_oaipmh_harvester_app.components.oai_registry.models import (
     OaiRegistry,
 )
+from core_oaipmh_harvester_app.settings import (
+    OAI_HARVESTER_COMPRESS_XML_CONTENT,
+    OAI_HARVESTER_XML_CONTENT_COMPRESSION_LEVEL,
+)
+
+# First bytes of a gzip file
+GZIP_MAGIC_NUMBER = b"\x1f\x8b"
+# Maximum number of OaiRecord written by an INSERT ... ON CONFLICT query
+UPSERT_BATCH_SIZE = 1000
 
 
 class OaiRecord(AbstractData):
@@ -39,14 +52,80 @@ class OaiRecord(AbstractData):
         OaiHarvesterMetadataFormat, on_delete=models.CASCADE
     )
     registry = models.ForeignKey(OaiRegistry, on_delete=models.CASCADE)
+    harvest_digest = models.CharField(
+        max_length=64, blank=True, null=True, default=None
+    )
+    # Dict representation of the content converted during the harvest, so
+    # that the xml content is not parsed again. Not stored.
+    harvested_dict_content = None
 
     class Meta:
         """Meta"""
 
         indexes = [
             GinIndex(fields=["vector_column"]),
+            # Queries on the records of registries or metadata formats only
+            # look for the records which are not deleted
+            models.Index(
+                fields=["registry", "-last_modification_date"],
+                condition=Q(deleted=False),
+                name="oairecord_live_registry_idx",
+            ),
+            models.Index(
+                fields=[
+                    "harvester_metadata_format",
+                    "-last_modification_date",
+                ],
+                condition=Q(deleted=False),
+                name="oairecord_live_format_idx",
+            ),
+        ]
+        constraints = [
+            # Records are looked up by identifier and metadata format during
+            # the harvest
+            models.UniqueConstraint(
+                fields=["harvester_metadata_format", "identifier"],
+                name="oairecord_format_identifier_uniq",
+            ),
         ]
 
+    @property
+    def content(self):
+        """Get content - read from a saved file, decompressed if it has been
+        stored compressed.
+
+        Returns:
+
+        """
+        if self._content is None and self.file.name:
+            file_content = self.file.read()
+            if isinstance(file_content, bytes) and file_content.startswith(
+                GZIP_MAGIC_NUMBER
+            ):
+                file_content = gzip.decompress(file_content)
+            try:
+                self._content = (
+                    file_content.decode("utf-8")
+                    if file_content
+                    else file_content
+                )
+            except AttributeError:
+                self._content = file_content
+        return self._content
+
+    @content.setter
+    def content(self, value):
+        """Set content - to be saved as a file.
+
+        Args:
+            value:
+
+        Returns:
+
+        """
+        self.last_modification_date = datetime_now()
+        self._content = value
+
     def get_dict_content(self):
         """Get dict_content from object or from MongoDB
 
@@ -67,6 +146,10 @@ class OaiRecord(AbstractData):
         if settings.MONGODB_INDEXING:
             return
 
+        if self.harvested_dict_content is not None:
+            self.dict_content = self.harvested_dict_content
+            return
+
         # transform xml content into a dictionary
         self.dict_content = xml_utils.raw_xml_to_dict(
             self.xml_content,
@@ -82,10 +165,20 @@ class OaiRecord(AbstractData):
         except UnicodeEncodeError:
             content = self.content
 
+        content_type = "application/xml"
+        if OAI_HARVESTER_COMPRESS_XML_CONTENT:
+            # mtime is fixed so that the same content gives the same file
+            content = gzip.compress(
+                content,
+                compresslevel=OAI_HARVESTER_XML_CONTENT_COMPRESSION_LEVEL,
+                mtime=0,
+            )
+            content_type = "application/gzip"
+
         self.file = SimpleUploadedFile(
             name=self.title,
             content=content,
-            content_type="application/xml",
+            content_type=content_type,
         )
 
     @staticmethod
@@ -136,6 +229,266 @@ class OaiRecord(AbstractData):
         except Exception as exception:
             raise exceptions.ModelError(str(exception))
 
+    @staticmethod
+    def get_all_by_identifiers_and_metadata_format(
+        identifiers, harvester_metadata_format
+    ):
+        """Get all OaiRecord matching a list of identifiers for a metadata format.
+
+        Args:
+            identifiers: List of OaiRecord identifiers.
+            harvester_metadata_format: harvester_metadata_format of the OaiRecords.
+
+        Returns:
+            List of OaiRecord.
+
+        """
+        return OaiRecord.objects.filter(
+            identifier__in=identifiers,
+            harvester_metadata_format=harvester_metadata_format,
+        )
+
+    @staticmethod
+    def get_harvest_digests_by_identifiers_and_metadata_format(
+        identifiers, harvester_metadata_format
+    ):
+        """Get the harvest digests of the OaiRecord matching a list of
+        identifiers for a metadata format.
+
+        Args:
+            identifiers: List of OaiRecord identifiers.
+            harvester_metadata_format: harvester_metadata_format of the OaiRecords.
+
+        Returns:
+            Dict of the harvest digests by identifier.
+
+        """
+        return dict(
+            OaiRecord.objects.filter(
+                identifier__in=identifiers,
+                harvester_metadata_format=harvester_metadata_format,
+            ).values_list("identifier", "harvest_digest")
+        )
+
+    @staticmethod
+    def upsert_all_on_conflict(oai_records):
+        """Insert a list of OaiRecord, or update the records with the same
+        metadata format and identifier, with a single
+        INSERT ... ON CONFLICT DO UPDATE query. A record without file keeps
+        the content already in DB. The id and the file of the records are set
+        from the saved rows. The records must have the same creation date,
+        which is only written when a record is inserted.
+
+        Args:
+            oai_records: List of OaiRecord, with distinct identifiers.
+
+        Returns:
+            Set of the ids of the created OaiRecord.
+
+        Raises:
+            ModelError: Internal error during the process.
+
+        """
+        rows = []
+        fields = OaiRecord._get_upsert_fields()
+        creation_date_field = OaiRecord._meta.get_field("creation_date")
+        try:
+            with connection.cursor() as cursor:
+                # Keep the number of query parameters under the limit of the
+                # database
+                for start in range(0, len(oai_records), UPSERT_BATCH_SIZE):
+                    batch = oai_records[start : start + UPSERT_BATCH_SIZE]
+                    cursor.execute(
+                        OaiRecord._get_upsert_on_conflict_sql(len(batch)),
+                        [
+                            field.get_db_prep_save(
+                                getattr(oai_record, field.attname), connection
+                            )
+                            for oai_record in batch
+                            for field in fields
+                        ]
+                        + [
+                            creation_date_field.get_db_prep_save(
+                                batch[0].creation_date, connection
+                            )
+                        ],
+                    )
+                    rows.extend(cursor.fetchall())
+        except Exception as exception:
+            raise exceptions.ModelError(str(exception))
+
+        oai_records_by_identifier = {
+            oai_record.identifier: oai_record for oai_record in oai_records
+        }
+        created_ids = set()
+        for oai_record_id, identifier, file_name, created in rows:
+            oai_record = oai_records_by_identifier[identifier]
+            oai_record.pk = oai_record_id
+            if not oai_record.file:
+                oai_record.file.name = file_name
+            if created:
+                created_ids.add(oai_record_id)
+        return created_ids
+
+    @staticmethod
+    def _get_upsert_fields():
+        """Get the fields written by upsert_all_on_conflict. The vector column
+        is left to its database trigger.
+
+        Returns:
+            List of fields.
+
+        """
+        return [
+            field
+            for field in OaiRecord._meta.concrete_fields
+            if not field.primary_key and field.name != "vector_column"
+        ]
+
+    @staticmethod
+    def _get_upsert_on_conflict_sql(count):
+        """Get the query of upsert_all_on_conflict.
+
+        Args:
+            count: Number of OaiRecord to upsert.
+
+        Returns:
+            Query.
+
+        """
+        quote_name = connection.ops.quote_name
+        table = quote_name(OaiRecord._meta.db_table)
+        fields = OaiRecord._get_upsert_fields()
+        columns = [quote_name(field.column) for field in fields]
+        content_columns = {
+            quote_name(OaiRecord._meta.get_field(name).column)
+            for name in ("dict_content", "file", "checksum")
+        }
+        file_column = quote_name(OaiRecord._meta.get_field("file").column)
+        updates = []
+        for column in columns:
+            if column == quote_name("creation_date"):
+                continue
+            if column in content_columns:
+                # No file means that the record has been deleted remotely. Do
+                # not change the content already in DB.
+                updates.append(
+                    f"{column} = CASE WHEN EXCLUDED.{file_column} = '' "
+                    f"THEN {table}.{column} ELSE EXCLUDED.{column} END"
+                )
+            else:
+                updates.append(f"{column} = EXCLUDED.{column}")
+        row = f"({', '.join(['%s'] * len(columns))})"
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES {', '.join([row] * count)} "
+            f"ON CONFLICT ({quote_name('harvester_metadata_format_id')}, "
+            f"{quote_name('identifier')}) "
+            f"DO UPDATE SET {', '.join(updates)} "
+            # A row has been inserted if it has the creation date of the
+            # query, which the update keeps.
+            f"RETURNING {quote_name('id')}, {quote_name('identifier')}, "
+            f"{table}.{file_column}, "
+            f"({table}.{quote_name('creation_date')} = %s)"
+        )
+
+    @staticmethod
+    def bulk_create(oai_records):
+        """Insert a list of OaiRecord with a single query.
+
+        Args:
+            oai_records: List of OaiRecord to insert.
+
+        Returns:
+            List of OaiRecord.
+
+        Raises:
+            ModelError: Internal error during the process.
+
+        """
+        try:
+            return OaiRecord.objects.bulk_create(oai_records)
+        except Exception as exception:
+            raise exceptions.ModelError(str(exception))
+
+    @staticmethod
+    def bulk_update(oai_records, fields):
+        """Update the given fields of a list of OaiRecord with bulk queries.
+
+        Args:
+            oai_records: List of OaiRecord to update.
+            fields: List of fields to update.
+
+        Raises:
+            ModelError: Internal error during the process.
+
+        """
+        try:
+            OaiRecord.objects.bulk_update(oai_records, fields)
+        except Exception as exception:
+            raise exceptions.ModelError(str(exception))
+
+    @staticmethod
+    def reconcile_harvester_sets(oai_records_harvester_sets):
+        """Reconcile the set memberships of a list of OaiRecord. The existing
+        memberships are read with one query, then only the memberships to
+        remove are deleted with one query and only the missing ones are
+        inserted with one query.
+
+        Args:
+            oai_records_harvester_sets: List of (OaiRecord, list of OaiHarvesterSet) tuples.
+
+        Raises:
+            ModelError: Internal error during the process.
+
+        """
+        through_model = OaiRecord.harvester_sets.through
+        try:
+            wanted_memberships = {
+                (oai_record.id, harvester_set.id)
+                for oai_record, harvester_sets in oai_records_harvester_sets
+                for harvester_set in harvester_sets
+            }
+            memberships_to_delete = []
+            existing_memberships = set()
+            for (
+                membership_id,
+                oai_record_id,
+                harvester_set_id,
+            ) in through_model.objects.filter(
+                oairecord_id__in=[
+                    oai_record.id
+                    for oai_record, _ in oai_records_harvester_sets
+                ]
+            ).values_list(
+                "id", "oairecord_id", "oaiharvesterset_id"
+            ):
+                membership = (oai_record_id, harvester_set_id)
+                if membership in wanted_memberships:
+                    existing_memberships.add(membership)
+                else:
+                    memberships_to_delete.append(membership_id)
+
+            if memberships_to_delete:
+                through_model.objects.filter(
+                    id__in=memberships_to_delete
+                ).delete()
+            memberships_to_create = wanted_memberships - existing_memberships
+            if memberships_to_create:
+                through_model.objects.bulk_create(
+                    [
+                        through_model(
+                            oairecord_id=oai_record_id,
+                            oaiharvesterset_id=harvester_set_id,
+                        )
+                        for oai_record_id, harvester_set_id in sorted(
+                            memberships_to_create
+                        )
+                    ]
+                )
+        except Exception as exception:
+            raise exceptions.ModelError(str(exception))
+
     @staticmethod
     def get_all():
         """Return all OaiRecord.
@@ -161,6 +514,40 @@ class OaiRecord(AbstractData):
             *[field.replace("+", "") for field in order_by_field]
         )
 
+    @staticmethod
+    def get_all_to_export(
+        registry_id, harvester_metadata_format_id=None, harvester_set_id=None
+    ):
+        """Return the OaiRecord of a registry to export, not deleted, ordered
+        by id. The dict content is not loaded.
+
+        Args:
+            registry_id: The registry id.
+            harvester_metadata_format_id: Id of the OaiHarvesterMetadataFormat
+                of the records, all formats if None.
+            harvester_set_id: Id of an OaiHarvesterSet of the records, all
+                sets if None.
+
+        Returns:
+            List of OaiRecord.
+
+        """
+        queryset = OaiRecord.objects.filter(
+            registry_id=registry_id, deleted=False
+        )
+        if harvester_metadata_format_id is not None:
+            queryset = queryset.filter(
+                harvester_metadata_format_id=harvester_metadata_format_id
+            )
+        if harvester_set_id is not None:
+            queryset = queryset.filter(harvester_sets=harvester_set_id)
+        return (
+            queryset.select_related("harvester_metadata_format")
+            .prefetch_related("harvester_sets")
+            .defer("dict_content", "vector_column")
+            .order_by("pk")
+        )
+
     @staticmethod
     def get_count_by_registry_id(registry_id):
         """Return the number of OaiRecord by registry id.
@@ -184,6 +571,55 @@ class OaiRecord(AbstractData):
         """
         OaiRecord.get_all_by_registry_id(registry_id, []).delete()
 
+    @staticmethod
+    def delete_batch_by_registry_id(registry_id, after_id, batch_size):
+        """Delete the next batch of OaiRecord of a registry, ordered by id,
+        with a raw DELETE query: the records are not loaded and no signal is
+        sent.
+
+        Args:
+            registry_id: The registry id.
+            after_id: Id of the last OaiRecord of the previous batch, 0 for
+                the first batch.
+            batch_size: Maximum number of OaiRecord to delete.
+
+        Returns:
+            List of the ids of the deleted OaiRecord.
+
+        Raises:
+            ModelError: Internal error during the process.
+
+        """
+        try:
+            # Start after the previous batch, so that the index range scan
+            # does not go through the rows already deleted.
+            oai_record_ids = list(
+                OaiRecord.objects.filter(
+                    registry_id=registry_id, pk__gt=after_id
+                )
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not oai_record_ids:
+                return []
+
+            with transaction.atomic():
+                OaiRecord.harvester_sets.through.objects.filter(
+                    oairecord_id__in=oai_record_ids
+                ).delete()
+                quote_name = connection.ops.quote_name
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"DELETE FROM "
+                        f"{quote_name(OaiRecord._meta.db_table)} "
+                        f"WHERE {quote_name(OaiRecord._meta.pk.column)} IN "
+                        f"({', '.join(['%s'] * len(oai_record_ids))})",
+                        oai_record_ids,
+                    )
+            return oai_record_ids
+        except Exception as exception:
+            raise exceptions.ModelError(str(exception))
+
     @staticmethod
     def execute_query(query, order_by_field):
         """Executes a query on the OaiRecord collection.
@@ -199,7 +635,7 @@ class OaiRecord(AbstractData):
         queryset = OaiRecord.objects.filter(query)
 
         if order_by_field:
-            queryset.order_by(
+            queryset = queryset.order_by(
                 *[field.replace("+", "") for field in order_by_field]
             )
 
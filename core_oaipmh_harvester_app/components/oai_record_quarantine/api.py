@@ -0,0 +1,86 @@
+"""
+OaiRecordQuarantine API
+"""
+
+from core_oaipmh_harvester_app.components.oai_record_quarantine.models import (
+    OaiRecordQuarantine,
+)
+from core_oaipmh_harvester_app.settings import (
+    OAI_HARVESTER_QUARANTINE_MAX_ATTEMPTS,
+)
+from core_oaipmh_harvester_app.utils import list_records_parser
+
+
+def quarantine(registry, metadata_format, record, error):
+    """Quarantine a harvested record which could not be stored.
+
+    Args:
+        registry: OaiRegistry instance.
+        metadata_format: OaiHarvesterMetadataFormat instance.
+        record: Representation of the Oai-Pmh record.
+        error: Error raised while storing the record.
+
+    Returns:
+        OaiRecordQuarantine instance.
+
+    """
+    return OaiRecordQuarantine.upsert_failure(
+        registry,
+        metadata_format,
+        record["identifier"],
+        list_records_parser.get_raw(record),
+        error,
+    )
+
+
+def record_failure(oai_record_quarantine, error):
+    """Record a new failure to store a quarantined record.
+
+    Args:
+        oai_record_quarantine: OaiRecordQuarantine instance.
+        error: Error raised while storing the record.
+
+    Returns:
+        OaiRecordQuarantine instance.
+
+    """
+    return OaiRecordQuarantine.increment_attempts(oai_record_quarantine, error)
+
+
+def get_all_to_retry_by_registry_id(registry_id):
+    """Return the quarantined records of a registry which have been tried less
+    than OAI_HARVESTER_QUARANTINE_MAX_ATTEMPTS times.
+
+    Args:
+        registry_id: The registry id.
+
+    Returns:
+        List of OaiRecordQuarantine.
+
+    """
+    return OaiRecordQuarantine.get_all_to_retry_by_registry_id(
+        registry_id, OAI_HARVESTER_QUARANTINE_MAX_ATTEMPTS
+    )
+
+
+def get_all_by_registry_id(registry_id):
+    """Return the quarantined records of a registry.
+
+    Args:
+        registry_id: The registry id.
+
+    Returns:
+        List of OaiRecordQuarantine.
+
+    """
+    return OaiRecordQuarantine.get_all_by_registry_id(registry_id)
+
+
+def delete(oai_record_quarantine):
+    """Remove a record from the quarantine.
+
+    Args:
+        oai_record_quarantine: OaiRecordQuarantine instance.
+
+    """
+    oai_record_quarantine.delete()
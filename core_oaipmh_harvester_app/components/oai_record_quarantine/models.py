@@ -0,0 +1,128 @@
+"""
+OaiRecordQuarantine model
+"""
+
+from django.db import models
+from django.db.models import F
+
+from core_main_app.commons import exceptions
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import (
+    OaiHarvesterMetadataFormat,
+)
+from core_oaipmh_harvester_app.components.oai_registry.models import (
+    OaiRegistry,
+)
+
+
+class OaiRecordQuarantine(models.Model):
+    """A harvested record which could not be stored. Its raw XML is kept so
+    that it can be stored again by the next harvests, without harvesting its
+    page again."""
+
+    registry = models.ForeignKey(OaiRegistry, on_delete=models.CASCADE)
+    harvester_metadata_format = models.ForeignKey(
+        OaiHarvesterMetadataFormat, on_delete=models.CASCADE
+    )
+    identifier = models.CharField(blank=False, max_length=200)
+    raw = models.TextField(blank=False)
+    error = models.TextField(blank=True, default="")
+    attempts = models.IntegerField(default=1)
+    creation_date = models.DateTimeField(auto_now_add=True)
+    last_attempt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Meta"""
+
+        unique_together = ("harvester_metadata_format", "identifier")
+
+    @staticmethod
+    def upsert_failure(
+        registry, harvester_metadata_format, identifier, raw, error
+    ):
+        """Quarantine a record which could not be stored. The attempts of a
+        record already quarantined are incremented.
+
+        Args:
+            registry: OaiRegistry instance.
+            harvester_metadata_format: OaiHarvesterMetadataFormat instance.
+            identifier: Identifier of the record.
+            raw: Raw XML of the record.
+            error: Error raised while storing the record.
+
+        Returns:
+            OaiRecordQuarantine instance.
+
+        """
+        try:
+            (
+                oai_record_quarantine,
+                created,
+            ) = OaiRecordQuarantine.objects.get_or_create(
+                harvester_metadata_format=harvester_metadata_format,
+                identifier=identifier,
+                defaults={"registry": registry, "raw": raw, "error": error},
+            )
+            if not created:
+                oai_record_quarantine.raw = raw
+                OaiRecordQuarantine.increment_attempts(
+                    oai_record_quarantine, error
+                )
+            return oai_record_quarantine
+        except Exception as exception:
+            raise exceptions.ModelError(str(exception))
+
+    @staticmethod
+    def increment_attempts(oai_record_quarantine, error):
+        """Record a new failure to store a quarantined record.
+
+        Args:
+            oai_record_quarantine: OaiRecordQuarantine instance.
+            error: Error raised while storing the record.
+
+        Returns:
+            OaiRecordQuarantine instance.
+
+        """
+        try:
+            oai_record_quarantine.error = error
+            oai_record_quarantine.attempts = F("attempts") + 1
+            oai_record_quarantine.save()
+            oai_record_quarantine.refresh_from_db()
+            return oai_record_quarantine
+        except Exception as exception:
+            raise exceptions.ModelError(str(exception))
+
+    @staticmethod
+    def get_all_to_retry_by_registry_id(registry_id, max_attempts):
+        """Return the quarantined records of a registry which can be stored
+        again.
+
+        Args:
+            registry_id: The registry id.
+            max_attempts: Number of attempts after which a record is not
+                retried anymore.
+
+        Returns:
+            List of OaiRecordQuarantine.
+
+        """
+        return (
+            OaiRecordQuarantine.objects.filter(
+                registry_id=registry_id, attempts__lt=max_attempts
+            )
+            .select_related("harvester_metadata_format")
+            .order_by("id")
+        )
+
+    @staticmethod
+    def get_all_by_registry_id(registry_id):
+        """Return the quarantined records of a registry.
+
+        Args:
+            registry_id: The registry id.
+
+        Returns:
+            List of OaiRecordQuarantine.
+
+        """
+        return OaiRecordQuarantine.objects.filter(registry_id=registry_id)
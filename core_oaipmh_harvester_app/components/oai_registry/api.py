@@ -2,8 +2,14 @@
 OaiRegistry API
 """
 
+import hashlib
+import json
 import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
+from django.db import connection
 from rest_framework import status
 from rest_framework.status import HTTP_500_INTERNAL_SERVER_ERROR
 
@@ -11,6 +17,7 @@ from core_main_app.commons import exceptions
 from core_main_app.utils import datetime as datetime_utils
 from core_oaipmh_common_app.commons import exceptions as oai_pmh_exceptions
 from core_oaipmh_common_app.commons.messages import OaiPmhMessage
+from core_oaipmh_harvester_app.components.mongo import index_buffer
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import (
     api as oai_harvester_metadata_format_api,
 )
@@ -20,21 +27,55 @@ from core_oaipmh_harvester_app.components.oai_harvester_metadata_format_set impo
 from core_oaipmh_harvester_app.components.oai_harvester_set import (
     api as oai_harvester_set_api,
 )
+from core_oaipmh_harvester_app.components.oai_harvest_checkpoint import (
+    api as oai_harvest_checkpoint_api,
+)
+from core_oaipmh_harvester_app.components.oai_harvest_metrics import (
+    api as oai_harvest_metrics_api,
+)
+from core_oaipmh_harvester_app.components.oai_harvest_metrics.collector import (
+    HarvestMetrics,
+    HarvestProgress,
+)
 from core_oaipmh_harvester_app.components.oai_identify import (
     api as oai_identify_api,
 )
+from core_oaipmh_harvester_app.components.oai_record import (
+    api as oai_record_api,
+)
 from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from core_oaipmh_harvester_app.components.oai_record_quarantine import (
+    api as oai_record_quarantine_api,
+)
 from core_oaipmh_harvester_app.components.oai_registry.models import (
     OaiRegistry,
 )
+from core_oaipmh_harvester_app.components.oai_registry_lease import (
+    api as oai_registry_lease_api,
+)
+from core_oaipmh_harvester_app.components.oai_registry_lease.models import (
+    OaiRegistryLease,
+)
 from core_oaipmh_harvester_app.components.oai_verbs import api as oai_verbs_api
+from core_oaipmh_harvester_app.settings import (
+    OAI_HARVESTER_BULK_UPSERT,
+    OAI_HARVESTER_HARVEST_JITTER,
+    OAI_HARVESTER_MAX_CONCURRENT_HARVESTS,
+    OAI_HARVESTER_PREFETCH_PAGES,
+    OAI_HARVESTER_PURGE_BATCH_SIZE,
+    OAI_HARVESTER_REGISTRY_INFO_REFRESH_INTERVAL,
+)
 from core_oaipmh_harvester_app.system import api as oai_harvester_system_api
+from core_oaipmh_harvester_app.utils import list_records_parser
+from core_oaipmh_harvester_app.utils import prefetch_operations
 
 logger = logging.getLogger(__name__)
 
 
 def upsert(oai_registry):
-    """Creates or updates an OaiRegistry.
+    """Creates or updates an OaiRegistry. The next harvest date is reset if the
+    harvest rate changed or if the harvest has been enabled again, so that the
+    registry is scheduled with its new settings.
 
     Args:
         oai_registry: The OaiRegistry to create or update
@@ -42,10 +83,36 @@ def upsert(oai_registry):
     Returns: The OaiRegistry instance.
 
     """
+    if _is_harvest_schedule_changed(oai_registry):
+        oai_registry.next_harvest_at = None
     oai_registry.save()
     return oai_registry
 
 
+def _is_harvest_schedule_changed(oai_registry):
+    """Check if the harvest rate of a registry changed, or if its harvest has
+    been enabled again, since it was saved.
+
+    Args:
+        oai_registry: OaiRegistry.
+
+    Returns:
+        Yes or No (bool).
+
+    """
+    if oai_registry.pk is None:
+        return False
+    try:
+        saved_registry = OaiRegistry.get_by_id(oai_registry.pk)
+    except exceptions.DoesNotExist:
+        return False
+    return (
+        oai_registry.harvest_rate != saved_registry.harvest_rate
+        or (oai_registry.harvest and not saved_registry.harvest)
+        or (oai_registry.is_activated and not saved_registry.is_activated)
+    )
+
+
 def get_by_id(oai_registry_id):
     """Returns an OaiRegistry by its id
 
@@ -101,6 +168,46 @@ def get_all_activated_registry(order_by_field=None):
     )
 
 
+def claim_registries_due_for_harvest(limit):
+    """Claims the activated registries whose harvest is due, and sets their
+    next harvest date. A registry is claimed once, even if several schedulers
+    run at the same time.
+
+    Args:
+        limit: Maximum number of registries to claim.
+
+    Returns:
+        List of claimed OaiRegistry ids.
+
+    """
+    now = datetime_utils.datetime_now()
+    claimed_registry_ids = []
+    for registry in OaiRegistry.get_all_due_for_harvest(now, limit):
+        if OaiRegistry.claim_for_harvest(
+            registry, _get_next_harvest_date(registry, now)
+        ):
+            claimed_registry_ids.append(registry.id)
+    return claimed_registry_ids
+
+
+def _get_next_harvest_date(registry, date):
+    """Returns the next harvest date of a registry harvested at the given
+    date. A random jitter spreads the harvests of the registries scheduled at
+    the same time.
+
+    Args:
+        registry: OaiRegistry.
+        date: Harvest date.
+
+    Returns:
+        Next harvest date.
+
+    """
+    harvest_rate = registry.harvest_rate or 0
+    jitter = random.uniform(0, harvest_rate * OAI_HARVESTER_HARVEST_JITTER)
+    return date + timedelta(seconds=harvest_rate + jitter)
+
+
 def check_registry_url_already_exists(oai_registry_url):
     """Checks if an OaiRegistry with the given url already exists.
 
@@ -123,6 +230,57 @@ def delete(oai_registry):
     oai_registry.delete()
 
 
+def purge(oai_registry, progress_callback=None):
+    """Deletes an OaiRegistry and its records. The records are deleted by
+    batches with raw delete queries, and their MongoDB documents with a single
+    query, instead of being loaded and deleted one by one by the cascade. The
+    harvest and update leases of the registry are held during the deletion.
+
+    Args:
+        oai_registry: OaiRegistry to delete.
+        progress_callback: Function called with the number of deleted records
+            and the number of records to delete after each batch.
+
+    Returns:
+        Number of deleted records, None if the registry is being harvested
+        or updated.
+
+    """
+    # Stop the next harvests of the registry
+    oai_registry.is_activated = False
+    oai_registry.harvest = False
+    upsert(oai_registry)
+
+    with oai_registry_lease_api.hold(
+        oai_registry.id, OaiRegistryLease.HARVEST
+    ) as harvest_lease, oai_registry_lease_api.hold(
+        oai_registry.id, OaiRegistryLease.UPDATE
+    ) as update_lease:
+        # Wait for the end of the running harvest or update
+        if harvest_lease is None or update_lease is None:
+            return None
+
+        total = OaiRecord.get_count_by_registry_id(oai_registry.id)
+        deleted = 0
+        after_id = 0
+        while True:
+            oai_record_ids = oai_record_api.delete_batch_by_registry_id(
+                oai_registry.id, after_id, OAI_HARVESTER_PURGE_BATCH_SIZE
+            )
+            if not oai_record_ids:
+                break
+            after_id = oai_record_ids[-1]
+            deleted += len(oai_record_ids)
+            if progress_callback:
+                progress_callback(deleted, total)
+        oai_record_api.delete_all_indexed_by_registry_id(oai_registry.id)
+
+    # The registry has no record left: the cascade only deletes its sets,
+    # metadata formats and other small related objects.
+    oai_registry.delete()
+    return deleted
+
+
 def add_registry_by_url(url, harvest_rate, harvest, request=None):
     """Adds a registry in database. Takes care of all surrounding objects. Uses OAI-PMH verbs to gather information.
 
@@ -183,15 +341,86 @@ def update_registry_info(registry, request=None):
         request:
 
     Returns:
-        The OaiRegistry instance.
+        The OaiRegistry instance, unchanged if the registry is already being
+        updated.
 
     """
-    # If registry is already updating, skip for now
-    if registry.is_updating:
-        return []
+    with oai_registry_lease_api.hold(
+        registry.id, OaiRegistryLease.UPDATE
+    ) as lease:
+        # If registry is already updating, skip for now
+        if lease is None:
+            return registry
+
+        _update_registry_info(registry, request=request)
+        OaiRegistry.set_info_updated(
+            registry, datetime_utils.datetime_now(), registry.info_validators
+        )
+        return registry
 
-    registry.is_updating = True
-    upsert(registry)
+
+def refresh_registry_info(registry):
+    """Updates information of a registry before its harvest, only if it may
+    have changed. The Data Provider is checked at most once every
+    OAI_HARVESTER_REGISTRY_INFO_REFRESH_INTERVAL seconds, with conditional
+    requests, and the information is updated only if the responses changed
+    since the last check.
+
+    Args:
+        registry: OaiRegistry to update.
+
+    Returns:
+        The OaiRegistry instance, unchanged if the refresh is not due or if
+        the registry is already being updated.
+
+    """
+    if not _is_registry_info_refresh_due(registry):
+        return registry
+
+    with oai_registry_lease_api.hold(
+        registry.id, OaiRegistryLease.UPDATE
+    ) as lease:
+        # If registry is already updating, skip for now
+        if lease is None:
+            return registry
+
+        changed, info_validators = oai_verbs_api.check_registry_info(
+            registry.url, registry.info_validators or {}
+        )
+        if changed:
+            _update_registry_info(registry)
+        OaiRegistry.set_info_updated(
+            registry, datetime_utils.datetime_now(), info_validators
+        )
+        return registry
+
+
+def _is_registry_info_refresh_due(registry):
+    """Check if the information of a registry has to be checked again.
+
+    Args:
+        registry: OaiRegistry instance.
+
+    Returns:
+        Yes or No (bool).
+
+    """
+    return (
+        registry.info_updated_at is None
+        or registry.info_updated_at
+        + timedelta(seconds=OAI_HARVESTER_REGISTRY_INFO_REFRESH_INTERVAL)
+        <= datetime_utils.datetime_now()
+    )
+
+
+def _update_registry_info(registry, request=None):
+    """Updates information of a registry, while its update lease is held.
+
+    Args:
+        registry: OaiRegistry to update.
+        request:
+
+    """
     identify_response = _get_identify_as_object(registry.url)
     sets_response = _get_sets_as_object(registry.url)
     metadata_formats_response = _get_metadata_formats_as_object(registry.url)
@@ -211,13 +440,7 @@ def update_registry_info(registry, request=None):
         _handle_deleted_set(registry.id, sets_response)
         # Check if we have some deleted metadata format
         _handle_deleted_metadata_format(registry.id, metadata_formats_response)
-        registry.is_updating = False
-        upsert(registry)
-
-        return registry
     except Exception as exception:
-        registry.is_updating = False
-        upsert(registry)
         raise oai_pmh_exceptions.OAIAPILabelledException(
             message=str(exception),
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -233,64 +456,92 @@ def harvest_registry(registry):
         all_errors: List of errors.
 
     """
-    # If registry is already harvesting, skip for now
-    if registry.is_harvesting:
-        return []
+    with oai_registry_lease_api.hold(
+        registry.id, OaiRegistryLease.HARVEST
+    ) as lease:
+        # If registry is already harvesting, skip for now
+        if lease is None:
+            oai_harvest_metrics_api.add(registry.id, {"harvests_skipped": 1})
+            return []
+
+        started_at = oai_harvest_metrics_api.harvest_started(registry.id)
+        all_errors = None
+        try:
+            all_errors = _harvest_registry_records(registry, lease=lease)
+            return all_errors
+        except Exception as exception:
+            raise oai_pmh_exceptions.OAIAPILabelledException(
+                message=str(exception),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        finally:
+            oai_harvest_metrics_api.harvest_finished(
+                registry.id, started_at, failed=all_errors != []
+            )
 
-    try:
-        # We are harvesting
-        registry.is_harvesting = True
-        upsert(registry)
-        # Set the last update date
-        harvest_date = datetime_utils.datetime_now()
-        # Get all metadata formats to harvest
-        metadata_formats = oai_harvester_metadata_format_api.get_all_to_harvest_by_registry_id(
+
+def _harvest_registry_records(registry, lease=None):
+    """Harvests the records of a registry, while its harvest lease is held.
+
+    Args:
+        registry: The registry to harvest.
+        lease: HeldLease of the harvest. The harvest stops if it is lost.
+
+    Returns:
+        all_errors: List of errors.
+
+    """
+    # Set the last update date
+    harvest_date = datetime_utils.datetime_now()
+    # Get all metadata formats to harvest
+    metadata_formats = (
+        oai_harvester_metadata_format_api.get_all_to_harvest_by_registry_id(
             registry.id
         )
-        # Get all sets
-        registry_all_sets = oai_harvester_set_api.get_all_by_registry_id(
+    )
+    # Get all sets
+    registry_all_sets = oai_harvester_set_api.get_all_by_registry_id(
+        registry.id, "set_name"
+    )
+    # Get all available sets
+    registry_sets_to_harvest = (
+        oai_harvester_set_api.get_all_to_harvest_by_registry_id(
             registry.id, "set_name"
         )
-        # Get all available sets
-        registry_sets_to_harvest = (
-            oai_harvester_set_api.get_all_to_harvest_by_registry_id(
-                registry.id, "set_name"
-            )
+    )
+    # Check if we have to retrieve all sets or not. If all sets, no need to
+    # provide theset parameter in the harvest request.
+    #
+    # Avoid to retrieve same records if records are in many sets.
+    search_by_sets = len(registry_all_sets) != len(registry_sets_to_harvest)
+    # Store the records which could not be stored by the previous harvests
+    _retry_quarantined_records(registry, registry_all_sets)
+    # Progress of all the lists harvested
+    progress = HarvestProgress()
+    # Search by sets
+    if search_by_sets and len(registry_all_sets) != 0:
+        all_errors = _harvest_by_metadata_formats_and_sets(
+            registry,
+            metadata_formats,
+            registry_sets_to_harvest,
+            registry_all_sets,
+            lease=lease,
+            progress=progress,
         )
-        # Check if we have to retrieve all sets or not. If all sets, no need to
-        # provide theset parameter in the harvest request.
-        #
-        # Avoid to retrieve same records if records are in many sets.
-        search_by_sets = len(registry_all_sets) != len(
-            registry_sets_to_harvest
+    # If we don't have to search by set or the OAI Registry doesn't support sets
+    else:
+        all_errors = _harvest_by_metadata_formats(
+            registry,
+            metadata_formats,
+            registry_all_sets,
+            lease=lease,
+            progress=progress,
         )
-        # Search by sets
-        if search_by_sets and len(registry_all_sets) != 0:
-            all_errors = _harvest_by_metadata_formats_and_sets(
-                registry,
-                metadata_formats,
-                registry_sets_to_harvest,
-                registry_all_sets,
-            )
-        # If we don't have to search by set or the OAI Registry doesn't support sets
-        else:
-            all_errors = _harvest_by_metadata_formats(
-                registry, metadata_formats, registry_all_sets
-            )
-        # Stop harvesting
-        registry.is_harvesting = False
-        # Set the last update date
-        registry.last_update = harvest_date
-        upsert(registry)
+    # Set the last update date
+    registry.last_update = harvest_date
+    upsert(registry)
 
-        return all_errors
-    except Exception as exception:
-        registry.is_harvesting = False
-        upsert(registry)
-        raise oai_pmh_exceptions.OAIAPILabelledException(
-            message=str(exception),
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
+    return all_errors
 
 
 def _get_identify_as_object(url):
@@ -468,7 +719,12 @@ def _upsert_set_for_registry(set_, registry):
 
 
 def _harvest_by_metadata_formats_and_sets(
-    registry, metadata_formats, registry_sets_to_harvest, registry_all_sets
+    registry,
+    metadata_formats,
+    registry_sets_to_harvest,
+    registry_all_sets,
+    lease=None,
+    progress=None,
 ):
     """Harvests data by metadata formats and sets.
 
@@ -477,19 +733,17 @@ def _harvest_by_metadata_formats_and_sets(
         metadata_formats: List of metadata formats to harvest.
         registry_sets_to_harvest: List of sets to harvest.
         registry_all_sets: List of all sets.
+        lease: HeldLease of the harvest. The harvest stops if it is lost.
+        progress: HarvestProgress shared by the lists of the harvest.
 
     Returns:
         List of potential errors.
 
     """
     all_errors = []
-
+    harvests = []
     for metadata_format in metadata_formats:
-        current_update_mf = datetime_utils.datetime_now()
-        errors_during_harvest = False
-
         for set_ in registry_sets_to_harvest:
-            current_update_mf_set = datetime_utils.datetime_now()
             try:
                 # Retrieve the last update for this metadata format and this set
                 last_update = oai_harvester_metadata_format_set_api.get_last_update_by_metadata_format_and_set(
@@ -497,37 +751,243 @@ def _harvest_by_metadata_formats_and_sets(
                 )
             except Exception:
                 last_update = None
+            harvests.append((metadata_format, set_, last_update))
+
+    current_update_mf = datetime_utils.datetime_now()
+    results = _harvest_records_concurrently(
+        registry,
+        harvests,
+        registry_all_sets,
+        lease=lease,
+        progress=progress,
+    )
 
-            errors = _harvest_records(
-                registry, metadata_format, last_update, registry_all_sets, set_
+    formats_with_errors = set()
+    for (metadata_format, set_, _), (current_update_mf_set, errors) in zip(
+        harvests, results
+    ):
+        # If no exceptions was thrown and no errors occurred, we can update the last_update date
+        if len(errors) == 0:
+            oai_harvester_metadata_format_set_api.upsert_last_update_by_metadata_format_and_set(
+                metadata_format, set_, current_update_mf_set
             )
-            # If no exceptions was thrown and no errors occurred, we can update the last_update date
-            if len(errors) == 0:
-                oai_harvester_metadata_format_set_api.upsert_last_update_by_metadata_format_and_set(
-                    metadata_format, set_, current_update_mf_set
-                )
-            else:
-                errors_during_harvest = True
-                all_errors.append(errors)
+        else:
+            formats_with_errors.add(metadata_format.id)
+            all_errors.append(errors)
 
+    for metadata_format in metadata_formats:
         # Set the last update date if no exceptions was thrown
         # Would be useful if we do a _harvest_by_metadata_formats in the
         # future: won't retrieve everything
-        if not errors_during_harvest:
+        if metadata_format.id not in formats_with_errors:
             metadata_format.last_update = current_update_mf
             oai_harvester_metadata_format_api.upsert(metadata_format)
 
     return all_errors
 
 
+def _harvest_records_concurrently(
+    registry, harvests, registry_all_sets, lease=None, progress=None
+):
+    """Harvests records of several (metadata format, set) pairs. Up to
+    OAI_HARVESTER_MAX_CONCURRENT_HARVESTS pairs are harvested at the same time
+    for the registry. The pairs of a metadata format write the same records:
+    if they can not be upserted with INSERT ... ON CONFLICT queries, the
+    pairs of a metadata format are harvested one after the other.
+
+    Args:
+        registry: Registry to harvest.
+        harvests: List of (metadata format, set, last update) tuples.
+        registry_all_sets: List of all sets.
+        lease: HeldLease of the harvest. The harvest stops if it is lost.
+        progress: HarvestProgress shared by the lists of the harvest.
+
+    Returns:
+        List of (harvest start date, list of potential errors) tuples, in
+        the order of the harvests.
+
+    """
+    # Group the harvests run one after the other, keeping their indexes to
+    # return the results in order.
+    upsert_on_conflict = (
+        oai_harvester_system_api.can_upsert_oai_records_on_conflict()
+    )
+    harvest_groups = {}
+    for index, harvest in enumerate(harvests):
+        group_key = index if upsert_on_conflict else harvest[0].id
+        harvest_groups.setdefault(group_key, []).append((index, harvest))
+
+    if OAI_HARVESTER_MAX_CONCURRENT_HARVESTS <= 1 or len(harvest_groups) <= 1:
+        return [
+            _harvest_records_with_start_date(
+                registry,
+                metadata_format,
+                last_update,
+                registry_all_sets,
+                set_,
+                lease=lease,
+                progress=progress,
+            )
+            for metadata_format, set_, last_update in harvests
+        ]
+
+    results = [None] * len(harvests)
+    with ThreadPoolExecutor(
+        max_workers=OAI_HARVESTER_MAX_CONCURRENT_HARVESTS,
+        thread_name_prefix=f"oai-harvester-{registry.id}",
+    ) as executor:
+        futures = [
+            executor.submit(
+                _harvest_records_in_thread,
+                registry,
+                harvest_group,
+                registry_all_sets,
+                lease,
+                progress,
+            )
+            for harvest_group in harvest_groups.values()
+        ]
+        for future in futures:
+            for index, result in future.result():
+                results[index] = result
+    return results
+
+
+def _harvest_records_in_thread(
+    registry, harvests, registry_all_sets, lease=None, progress=None
+):
+    """Harvests records of several (metadata format, set) pairs one after the
+    other in a worker thread, and releases the database connection of the
+    thread once done.
+
+    Args:
+        registry: Registry to harvest.
+        harvests: List of (index, (metadata format, set, last update)) tuples.
+        registry_all_sets: List of all sets.
+        lease: HeldLease of the harvest. The harvest stops if it is lost.
+        progress: HarvestProgress shared by the lists of the harvest.
+
+    Returns:
+        List of (index, (harvest start date, list of potential errors))
+        tuples.
+
+    """
+    try:
+        return [
+            (
+                index,
+                _harvest_records_with_start_date(
+                    registry,
+                    metadata_format,
+                    last_update,
+                    registry_all_sets,
+                    set_,
+                    lease=lease,
+                    progress=progress,
+                ),
+            )
+            for index, (metadata_format, set_, last_update) in harvests
+        ]
+    finally:
+        connection.close()
+
+
+def _harvest_records_with_start_date(
+    registry,
+    metadata_format,
+    last_update,
+    registry_all_sets,
+    set_=None,
+    lease=None,
+    progress=None,
+):
+    """Harvests records and returns the date the harvest started. An
+    unfinished harvest is resumed from its checkpoint if possible, and the
+    date of its first start is returned. If the Data Provider rejects the
+    resumption token of the checkpoint, the harvest starts again from the
+    last update date.
+
+    Args:
+        registry: Registry to harvest.
+        metadata_format: Metadata Format to harvest.
+        last_update: Last update date.
+        registry_all_sets: List of all sets.
+        set_: Set to harvest
+        lease: HeldLease of the harvest. The harvest stops if it is lost.
+        progress: HarvestProgress shared by the lists of the harvest.
+
+    Returns:
+        Harvest start date, list of potential errors.
+
+    """
+    checkpoint = oai_harvest_checkpoint_api.get_resumable_checkpoint(
+        metadata_format, set_, last_update
+    )
+    if checkpoint is None:
+        checkpoint = oai_harvest_checkpoint_api.init_checkpoint(
+            metadata_format, set_, last_update
+        )
+    resumption_token = checkpoint.resumption_token
+    errors = _harvest_records(
+        registry,
+        metadata_format,
+        last_update,
+        registry_all_sets,
+        set_,
+        checkpoint=checkpoint,
+        lease=lease,
+        progress=progress,
+    )
+    # The first page of the resumed harvest failed because the Data Provider
+    # does not know the token anymore: restart the harvest.
+    if (
+        resumption_token
+        and checkpoint.resumption_token == resumption_token
+        and _is_bad_resumption_token_error(errors)
+    ):
+        oai_harvest_checkpoint_api.delete(checkpoint)
+        checkpoint = oai_harvest_checkpoint_api.init_checkpoint(
+            metadata_format, set_, last_update
+        )
+        errors = _harvest_records(
+            registry,
+            metadata_format,
+            last_update,
+            registry_all_sets,
+            set_,
+            checkpoint=checkpoint,
+            lease=lease,
+            progress=progress,
+        )
+    return checkpoint.harvest_started_at, errors
+
+
+def _is_bad_resumption_token_error(errors):
+    """Check if a harvest failed only because its resumption token was
+    rejected by the Data Provider.
+
+    Args:
+        errors: List of errors of the harvest.
+
+    Returns:
+        Yes or No (bool).
+
+    """
+    return len(errors) == 1 and str(errors[0]["error"]).startswith(
+        f"{list_records_parser.BAD_RESUMPTION_TOKEN}:"
+    )
+
+
 def _harvest_by_metadata_formats(
-    registry, metadata_formats, registry_all_sets
+    registry, metadata_formats, registry_all_sets, lease=None, progress=None
 ):
     """Harvests data by metadata formats.
     Args:
         registry: Registry.
         metadata_formats: List of metadata formats to harvest.
         registry_all_sets: List of all sets.
+        lease: HeldLease of the harvest. The harvest stops if it is lost.
+        progress: HarvestProgress shared by the lists of the harvest.
 
     Returns:
         List of potential errors.
@@ -542,10 +1002,14 @@ def _harvest_by_metadata_formats(
             )
         except Exception:
             last_update = None
-        # Update the new date for the metadataFormat
-        current_update_mf = datetime_utils.datetime_now()
-        errors = _harvest_records(
-            registry, metadata_format, last_update, registry_all_sets
+        # Get the new date for the metadataFormat
+        current_update_mf, errors = _harvest_records_with_start_date(
+            registry,
+            metadata_format,
+            last_update,
+            registry_all_sets,
+            lease=lease,
+            progress=progress,
         )
         # If no exceptions was thrown and no errors occurred, we can update the last_update date
         if len(errors) == 0:
@@ -565,7 +1029,14 @@ def _harvest_by_metadata_formats(
 
 
 def _harvest_records(
-    registry, metadata_format, last_update, registry_all_sets, set_=None
+    registry,
+    metadata_format,
+    last_update,
+    registry_all_sets,
+    set_=None,
+    checkpoint=None,
+    lease=None,
+    progress=None,
 ):
     """Harvests records.
     Args:
@@ -574,35 +1045,70 @@ def _harvest_records(
         last_update: Last update date.
         registry_all_sets: List of all sets.
         set_: Set to harvest
+        checkpoint: OaiHarvestCheckpoint of the harvest. The harvest resumes
+            from its resumption token, and it is saved after each stored page.
+        lease: HeldLease of the harvest. The harvest stops before the next
+            page if it is lost, since another worker may harvest the registry.
+        progress: HarvestProgress shared by the lists of the harvest.
 
     Returns:
         List of potential errors.
 
     """
     errors = []
-    has_data = True
-    resumption_token = None
-    # Get all records. Use of the resumption token.
-    while has_data:
-        # Get the list of records
-        set_h = None
-        if set_ is not None:
-            set_h = set_.set_spec
-
-        http_response, resumption_token = oai_verbs_api.list_records(
-            url=registry.url,
-            metadata_prefix=metadata_format.metadata_prefix,
-            set_h=set_h,
-            from_date=last_update,
-            resumption_token=resumption_token,
+    set_h = None
+    if set_ is not None:
+        set_h = set_.set_spec
+
+    registry_sets_by_spec = _get_sets_by_spec(registry_all_sets)
+    metrics = HarvestMetrics(
+        registry.id,
+        progress=progress,
+        progress_key=(
+            metadata_format.id,
+            set_.id if set_ is not None else None,
+        ),
+    )
+    pages = _list_records_pages(
+        registry.url,
+        metadata_format.metadata_prefix,
+        set_h,
+        last_update,
+        resumption_token=(
+            checkpoint.resumption_token if checkpoint is not None else None
+        ),
+        metrics=metrics,
+    )
+    # Download the next pages while the current one is being stored.
+    if OAI_HARVESTER_PREFETCH_PAGES > 0:
+        pages = prefetch_operations.prefetch(
+            pages,
+            OAI_HARVESTER_PREFETCH_PAGES,
+            name=f"oai-harvester-prefetch-{registry.id}",
         )
 
+    for http_response, resumption_info in pages:
+        if lease is not None and lease.is_lost:
+            errors.append(
+                {
+                    "status_code": status.HTTP_409_CONFLICT,
+                    "error": "The harvest lease of the registry has been lost.",
+                }
+            )
+            break
+
         if http_response.status_code == status.HTTP_200_OK:
             try:
-                for record in http_response.data:
-                    _upsert_record_for_registry(
-                        record, metadata_format, registry, registry_all_sets
-                    )
+                # Index the records of the page in MongoDB with batch tasks
+                with metrics.timer("db_seconds"):
+                    with index_buffer.buffered_indexing():
+                        _upsert_page_for_registry(
+                            http_response.data,
+                            metadata_format,
+                            registry,
+                            registry_sets_by_spec,
+                            metrics=metrics,
+                        )
             except Exception as exception:
                 errors.append(
                     {
@@ -620,14 +1126,187 @@ def _harvest_records(
             }
             errors.append(error)
 
+        # Checkpoint the pages stored without error, so that the harvest can
+        # be resumed after the last one.
+        if (
+            checkpoint is not None
+            and len(errors) == 0
+            and resumption_info
+            and resumption_info["resumption_token"]
+        ):
+            oai_harvest_checkpoint_api.upsert(checkpoint, resumption_info)
+
+        oai_harvest_metrics_api.flush(metrics)
+
+    # The harvest is finished. Otherwise, it resumes after the last page
+    # stored without error.
+    if checkpoint is not None and len(errors) == 0:
+        oai_harvest_checkpoint_api.delete(checkpoint)
+
+    return errors
+
+
+def _list_records_pages(
+    url, metadata_prefix, set_h, from_date, resumption_token=None, metrics=None
+):
+    """Get the pages of a ListRecords request, following the resumption
+    tokens.
+
+    Args:
+        url: Url of the registry.
+        metadata_prefix: Metadata Prefix.
+        set_h: Set to harvest.
+        from_date: Date of the last update.
+        resumption_token: Resumption token to start from.
+        metrics: HarvestMetrics collector of the harvest, if any.
+
+    Returns:
+        Generator of ListRecords responses and their resumption information.
+
+    """
+    has_data = True
+    # Get all records. Use of the resumption token.
+    while has_data:
+        http_response, resumption_info = oai_verbs_api.list_records_page(
+            url=url,
+            metadata_prefix=metadata_prefix,
+            set_h=set_h,
+            from_date=from_date,
+            resumption_token=resumption_token,
+            metrics=metrics,
+        )
+        yield http_response, resumption_info
+
         # There is more records if we have a resumption token.
+        resumption_token = (
+            resumption_info["resumption_token"] if resumption_info else None
+        )
         has_data = resumption_token is not None and resumption_token != ""
 
-    return errors
+
+def _upsert_page_for_registry(
+    records, metadata_format, registry, registry_sets_by_spec, metrics=None
+):
+    """Adds or updates the records of a page for a registry. The records
+    which can not be stored are quarantined, so that they do not prevent the
+    last update date from moving forward.
+
+    Args:
+        records: Records to update or create.
+        metadata_format: OaiHarvesterMetadataFormat instance.
+        registry: OaiRegistry instance.
+        registry_sets_by_spec: Dict of all the sets by set spec.
+        metrics: HarvestMetrics collector of the harvest, if any.
+
+    """
+    if oai_harvester_system_api.can_upsert_oai_records_on_conflict():
+        upsert_records = _upsert_records_for_registry_on_conflict
+    elif OAI_HARVESTER_BULK_UPSERT:
+        upsert_records = _upsert_records_for_registry
+    else:
+        upsert_records = None
+
+    if upsert_records is not None:
+        try:
+            upsert_records(
+                records,
+                metadata_format,
+                registry,
+                registry_sets_by_spec,
+                metrics,
+            )
+            return
+        except Exception as exception:
+            # Store the records one by one to find the failing ones
+            logger.warning(
+                f"Impossible to store a page of registry {registry.id} in "
+                f"bulk: {str(exception)}"
+            )
+
+    for record in records:
+        try:
+            _upsert_record_for_registry(
+                record,
+                metadata_format,
+                registry,
+                registry_sets_by_spec,
+                metrics,
+            )
+        except Exception as exception:
+            logger.warning(
+                f"Record {record['identifier']} of registry {registry.id} "
+                f"quarantined: {str(exception)}"
+            )
+            oai_record_quarantine_api.quarantine(
+                registry, metadata_format, record, str(exception)
+            )
+            if metrics is not None:
+                metrics.add("records_quarantined")
+
+
+def _retry_quarantined_records(registry, registry_sets):
+    """Stores again the quarantined records of a registry. A record leaves
+    the quarantine once stored, or if a more recent version of it has been
+    harvested since.
+
+    Args:
+        registry: OaiRegistry instance.
+        registry_sets: List of all sets.
+
+    """
+    registry_sets_by_spec = _get_sets_by_spec(registry_sets)
+    with index_buffer.buffered_indexing():
+        for (
+            oai_record_quarantine
+        ) in oai_record_quarantine_api.get_all_to_retry_by_registry_id(
+            registry.id
+        ):
+            metadata_format = oai_record_quarantine.harvester_metadata_format
+            try:
+                record = list_records_parser.parse_record(
+                    oai_record_quarantine.raw, metadata_format.metadata_prefix
+                )
+                if not _is_record_outdated(record, metadata_format):
+                    _upsert_record_for_registry(
+                        record,
+                        metadata_format,
+                        registry,
+                        registry_sets_by_spec,
+                    )
+            except Exception as exception:
+                oai_record_quarantine_api.record_failure(
+                    oai_record_quarantine, str(exception)
+                )
+            else:
+                oai_record_quarantine_api.delete(oai_record_quarantine)
+
+
+def _is_record_outdated(record, metadata_format):
+    """Check if a more recent version of a record has already been stored.
+
+    Args:
+        record: Harvested record.
+        metadata_format: OaiHarvesterMetadataFormat instance.
+
+    Returns:
+        Yes or No (bool).
+
+    """
+    try:
+        saved_record = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            record["identifier"], metadata_format
+        )
+    except exceptions.DoesNotExist:
+        return False
+    return (
+        saved_record.last_modification_date is not None
+        and saved_record.last_modification_date
+        > datetime_utils.utc_datetime_iso8601_to_datetime(record["datestamp"])
+    )
 
 
 def _upsert_record_for_registry(
-    record, metadata_format, registry, registry_sets
+    record, metadata_format, registry, registry_sets_by_spec, metrics=None
 ):
     """Adds or updates an OaiRecord object for a registry.
 
@@ -635,8 +1314,12 @@ def _upsert_record_for_registry(
         record: Record to update or create.
         metadata_format: OaiHarvesterMetadataFormat instance.
         registry: OaiRegistry instance.
+        registry_sets_by_spec: Dict of all the sets by set spec.
+        metrics: HarvestMetrics collector of the harvest, if any.
 
     """
+    record_sets = _get_record_sets(record, registry_sets_by_spec)
+    harvest_digest = _get_record_digest(record, record_sets)
     try:
         record["pk"] = None
         record["xml_content"] = (
@@ -646,6 +1329,12 @@ def _upsert_record_for_registry(
         saved_record = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
             record["identifier"], metadata_format
         )
+        # The record has not changed since the last harvest: skip the write
+        # and the indexing.
+        if saved_record.harvest_digest == harvest_digest:
+            if metrics is not None:
+                metrics.add("records_skipped")
+            return saved_record
 
         # No xml_content means that the record has been deleted remotely. Do not change
         # the xml_content already in DB.
@@ -658,13 +1347,18 @@ def _upsert_record_for_registry(
 
     oai_record = OaiRecord(
         identifier=record["identifier"],
-        last_modification_date=datetime_utils.utc_datetime_iso8601_to_datetime(
-            record["datestamp"]
-        ),
         deleted=record["deleted"],
         xml_content=record["xml_content"],
         registry=registry,
         harvester_metadata_format=metadata_format,
+        harvest_digest=harvest_digest,
+    )
+    oai_record.harvested_dict_content = list_records_parser.get_dict_content(
+        record
+    )
+    # Set after the content, which sets the modification date to now.
+    oai_record.last_modification_date = (
+        datetime_utils.utc_datetime_iso8601_to_datetime(record["datestamp"])
     )
 
     if record["pk"] is not None:
@@ -672,13 +1366,261 @@ def _upsert_record_for_registry(
 
     oai_harvester_system_api.upsert_oai_record(oai_record)
 
-    oai_record.harvester_sets.set(
-        [x for x in registry_sets if x.set_spec in record["sets"]]
+    oai_harvester_system_api.reconcile_oai_records_harvester_sets(
+        [(oai_record, record_sets)]
     )
 
+    if metrics is not None:
+        metrics.add(_get_record_counter(record, record["pk"] is None))
+
     return oai_record
 
 
+def _upsert_records_for_registry(
+    records, metadata_format, registry, registry_sets_by_spec, metrics=None
+):
+    """Adds or updates a page of OaiRecord objects for a registry. Existing
+    records are resolved with one query and written with bulk queries.
+
+    Args:
+        records: Records to update or create.
+        metadata_format: OaiHarvesterMetadataFormat instance.
+        registry: OaiRegistry instance.
+        registry_sets_by_spec: Dict of all the sets by set spec.
+        metrics: HarvestMetrics collector of the harvest, if any.
+
+    Returns:
+        List of OaiRecord.
+
+    """
+    # If an identifier is sent several times in the page, keep the last one.
+    records_by_identifier = {
+        record["identifier"]: record for record in records
+    }
+    saved_records_by_identifier = {
+        saved_record.identifier: saved_record
+        for saved_record in oai_harvester_system_api.get_all_oai_records_by_identifiers_and_metadata_format(
+            list(records_by_identifier.keys()), metadata_format
+        )
+    }
+
+    oai_records_to_create = []
+    oai_records_to_update = []
+    oai_records_harvester_sets = []
+    counters = {}
+    for identifier, record in records_by_identifier.items():
+        record_sets = _get_record_sets(record, registry_sets_by_spec)
+        harvest_digest = _get_record_digest(record, record_sets)
+        oai_record = saved_records_by_identifier.get(identifier)
+        if oai_record is None:
+            oai_record = OaiRecord(
+                identifier=identifier,
+                registry=registry,
+                harvester_metadata_format=metadata_format,
+            )
+            oai_records_to_create.append(oai_record)
+            counter = _get_record_counter(record, True)
+        elif oai_record.harvest_digest == harvest_digest:
+            # The record has not changed since the last harvest.
+            counters["records_skipped"] = (
+                counters.get("records_skipped", 0) + 1
+            )
+            continue
+        else:
+            oai_records_to_update.append(oai_record)
+            counter = _get_record_counter(record, False)
+        counters[counter] = counters.get(counter, 0) + 1
+
+        oai_record.harvest_digest = harvest_digest
+
+        # No metadata means that the record has been deleted remotely. Do not
+        # change the xml_content already in DB.
+        if record["metadata"] is not None:
+            oai_record.xml_content = str(record["metadata"])
+            oai_record.harvested_dict_content = (
+                list_records_parser.get_dict_content(record)
+            )
+        oai_record.deleted = record["deleted"]
+        oai_record.last_modification_date = (
+            datetime_utils.utc_datetime_iso8601_to_datetime(
+                record["datestamp"]
+            )
+        )
+        oai_records_harvester_sets.append((oai_record, record_sets))
+
+    oai_records = oai_harvester_system_api.bulk_upsert_oai_records(
+        oai_records_to_create,
+        oai_records_to_update,
+        oai_records_harvester_sets,
+    )
+
+    if metrics is not None:
+        for name, value in counters.items():
+            metrics.add(name, value)
+
+    return oai_records
+
+
+def _upsert_records_for_registry_on_conflict(
+    records, metadata_format, registry, registry_sets_by_spec, metrics=None
+):
+    """Adds or updates a page of OaiRecord objects for a registry with a
+    single INSERT ... ON CONFLICT query. Only the digests of the existing
+    records are read, to skip the unchanged ones.
+
+    Args:
+        records: Records to update or create.
+        metadata_format: OaiHarvesterMetadataFormat instance.
+        registry: OaiRegistry instance.
+        registry_sets_by_spec: Dict of all the sets by set spec.
+        metrics: HarvestMetrics collector of the harvest, if any.
+
+    Returns:
+        List of OaiRecord.
+
+    """
+    # If an identifier is sent several times in the page, keep the last one.
+    records_by_identifier = {
+        record["identifier"]: record for record in records
+    }
+    saved_harvest_digests = oai_harvester_system_api.get_oai_record_harvest_digests_by_identifiers_and_metadata_format(
+        list(records_by_identifier.keys()), metadata_format
+    )
+
+    oai_records = []
+    oai_records_harvester_sets = []
+    skipped_count = 0
+    for identifier, record in records_by_identifier.items():
+        record_sets = _get_record_sets(record, registry_sets_by_spec)
+        harvest_digest = _get_record_digest(record, record_sets)
+        if saved_harvest_digests.get(identifier) == harvest_digest:
+            # The record has not changed since the last harvest.
+            skipped_count += 1
+            continue
+
+        oai_record = OaiRecord(
+            identifier=identifier,
+            deleted=record["deleted"],
+            registry=registry,
+            harvester_metadata_format=metadata_format,
+            harvest_digest=harvest_digest,
+        )
+        # No metadata means that the record has been deleted remotely. The
+        # query keeps the xml_content already in DB.
+        if record["metadata"] is not None:
+            oai_record.xml_content = str(record["metadata"])
+            oai_record.harvested_dict_content = (
+                list_records_parser.get_dict_content(record)
+            )
+        # Set after the content, which sets the modification date to now.
+        oai_record.last_modification_date = (
+            datetime_utils.utc_datetime_iso8601_to_datetime(
+                record["datestamp"]
+            )
+        )
+        oai_records.append(oai_record)
+        oai_records_harvester_sets.append((oai_record, record_sets))
+
+    created_ids = oai_harvester_system_api.upsert_oai_records_on_conflict(
+        oai_records, oai_records_harvester_sets
+    )
+
+    if metrics is not None:
+        counters = {"records_skipped": skipped_count}
+        for oai_record in oai_records:
+            counter = _get_record_counter(
+                records_by_identifier[oai_record.identifier],
+                oai_record.pk in created_ids,
+            )
+            counters[counter] = counters.get(counter, 0) + 1
+        for name, value in counters.items():
+            if value:
+                metrics.add(name, value)
+
+    return oai_records
+
+
+def _get_sets_by_spec(registry_sets):
+    """Index the sets of a registry by set spec, to find the sets of the
+    harvested records.
+
+    Args:
+        registry_sets: List of all sets.
+
+    Returns:
+        Dict of the sets by set spec.
+
+    """
+    return {set_.set_spec: set_ for set_ in registry_sets}
+
+
+def _get_record_sets(record, registry_sets_by_spec):
+    """Get the sets of a harvested record.
+
+    Args:
+        record: Harvested record.
+        registry_sets_by_spec: Dict of all the sets by set spec.
+
+    Returns:
+        List of OaiHarvesterSet.
+
+    """
+    return [
+        registry_sets_by_spec[set_spec]
+        for set_spec in dict.fromkeys(record.get("sets", []))
+        if set_spec in registry_sets_by_spec
+    ]
+
+
+def _get_record_counter(record, created):
+    """Get the name of the metrics counter of a stored record.
+
+    Args:
+        record: Harvested record.
+        created: True if the record has been created.
+
+    Returns:
+        Name of the counter.
+
+    """
+    if record["deleted"]:
+        return "records_deleted"
+    return "records_inserted" if created else "records_updated"
+
+
+def _get_record_digest(record, record_sets):
+    """Get the digest of a harvested record. The digest covers the datestamp,
+    the deleted flag, the sets and the metadata of the record, so that an
+    unchanged record can be detected without comparing its content.
+
+    The sets are the ones found in the registry rather than the set specs of
+    the record: a record sent before one of its sets is known is stored again
+    once the set exists.
+
+    Args:
+        record: Harvested record.
+        record_sets: List of OaiHarvesterSet of the record.
+
+    Returns:
+        Hexadecimal SHA-256 digest.
+
+    """
+    return hashlib.sha256(
+        json.dumps(
+            [
+                record["datestamp"],
+                record["deleted"],
+                sorted(set_.pk for set_ in record_sets),
+                (
+                    str(record["metadata"])
+                    if record["metadata"] is not None
+                    else None
+                ),
+            ]
+        ).encode("utf-8")
+    ).hexdigest()
+
+
 def _handle_deleted_set(registry_id, sets_response):
     """Delete previous sets not used anymore.
     Args:
@@ -6,6 +6,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 
 from core_main_app.commons import exceptions
+from core_main_app.utils import datetime as datetime_utils
 
 
 class OaiRegistry(models.Model):
@@ -17,10 +18,14 @@ class OaiRegistry(models.Model):
     description = models.TextField(blank=True, null=True, default="")
     harvest = models.BooleanField(default=False)
     last_update = models.DateTimeField(blank=True, null=True)
-    is_harvesting = models.BooleanField(default=False)
-    is_updating = models.BooleanField(default=False)
     is_activated = models.BooleanField(default=True)
-    is_queued = models.BooleanField(default=False)
+    next_harvest_at = models.DateTimeField(
+        blank=True, null=True, default=None, db_index=True
+    )
+    # Date of the last check of the information of the registry, and
+    # validators of the responses of the verbs giving this information
+    info_updated_at = models.DateTimeField(blank=True, null=True, default=None)
+    info_validators = models.JSONField(blank=True, default=dict)
 
     class Meta:
         """Meta"""
@@ -28,6 +33,87 @@ class OaiRegistry(models.Model):
         verbose_name = "Oai registry"
         verbose_name_plural = "Oai registries"
 
+    @property
+    def is_harvesting(self):
+        """Check if the registry is being harvested.
+
+        Returns:
+            Yes or No (bool).
+
+        """
+        return self._has_lease("harvest")
+
+    @property
+    def is_updating(self):
+        """Check if the registry information is being updated.
+
+        Returns:
+            Yes or No (bool).
+
+        """
+        return self._has_lease("update")
+
+    @property
+    def is_queued(self):
+        """Check if the registry has a scheduled harvest.
+
+        Returns:
+            Yes or No (bool).
+
+        """
+        return (
+            self.is_activated
+            and self.harvest
+            and self.next_harvest_at is not None
+        )
+
+    def _has_lease(self, name):
+        """Check if the registry has an unexpired lease.
+
+        Args:
+            name: Name of the lease.
+
+        Returns:
+            Yes or No (bool).
+
+        """
+        if self.pk is None:
+            return False
+        # Annotated by the queries listing the registries
+        has_lease = self.__dict__.get(f"has_{name}_lease")
+        if has_lease is not None:
+            return has_lease
+        return self.leases.filter(
+            name=name, expires_at__gt=datetime_utils.datetime_now()
+        ).exists()
+
+    @staticmethod
+    def _annotate_leases(queryset):
+        """Annotate a queryset of OaiRegistry with their unexpired leases, so
+        that listing the registries does not query their leases one by one.
+
+        Args:
+            queryset: Queryset of OaiRegistry.
+
+        Returns:
+            Annotated queryset.
+
+        """
+        lease_model = OaiRegistry._meta.get_field("leases").related_model
+        now = datetime_utils.datetime_now()
+        return queryset.annotate(
+            **{
+                f"has_{name}_lease": models.Exists(
+                    lease_model.objects.filter(
+                        registry=models.OuterRef("pk"),
+                        name=name,
+                        expires_at__gt=now,
+                    )
+                )
+                for name in ("harvest", "update")
+            }
+        )
+
     @staticmethod
     def get_by_id(oai_registry_id):
         """Get an OaiRegistry by its id
@@ -78,7 +164,7 @@ class OaiRegistry(models.Model):
             List of OaiRegistry
 
         """
-        return OaiRegistry.objects.all()
+        return OaiRegistry._annotate_leases(OaiRegistry.objects.all())
 
     @staticmethod
     def get_all_by_is_activated(is_activated, order_by_field=None):
@@ -92,11 +178,76 @@ class OaiRegistry(models.Model):
             List of OaiRegistry
 
         """
-        queryset = OaiRegistry.objects.filter(is_activated=is_activated)
+        queryset = OaiRegistry._annotate_leases(
+            OaiRegistry.objects.filter(is_activated=is_activated)
+        )
         if order_by_field:
             queryset.order_by(order_by_field)
         return queryset
 
+    @staticmethod
+    def get_all_due_for_harvest(date, limit):
+        """Return the activated OaiRegistry to harvest whose next harvest is
+        due at the given date, the most overdue first.
+
+        Params:
+            date: Date.
+            limit: Maximum number of OaiRegistry.
+
+        Returns:
+            List of OaiRegistry
+
+        """
+        return list(
+            OaiRegistry.objects.filter(
+                models.Q(next_harvest_at__isnull=True)
+                | models.Q(next_harvest_at__lte=date),
+                is_activated=True,
+                harvest=True,
+            )
+            .order_by(models.F("next_harvest_at").asc(nulls_first=True))
+            .only("id", "harvest_rate", "next_harvest_at")[:limit]
+        )
+
+    @staticmethod
+    def claim_for_harvest(oai_registry, next_harvest_at):
+        """Set the next harvest date of an OaiRegistry, if it has not been
+        changed since the OaiRegistry was read.
+
+        Params:
+            oai_registry: OaiRegistry.
+            next_harvest_at: Next harvest date.
+
+        Returns:
+            True if the OaiRegistry has been claimed, False otherwise.
+
+        """
+        return (
+            OaiRegistry.objects.filter(
+                pk=oai_registry.pk,
+                next_harvest_at=oai_registry.next_harvest_at,
+            ).update(next_harvest_at=next_harvest_at)
+            > 0
+        )
+
+    @staticmethod
+    def set_info_updated(oai_registry, info_updated_at, info_validators):
+        """Set the date of the last check of the information of an
+        OaiRegistry and the validators of the responses, without saving the
+        other fields.
+
+        Params:
+            oai_registry: OaiRegistry.
+            info_updated_at: Date of the check.
+            info_validators: Dict of the validators of the responses, by verb.
+
+        """
+        oai_registry.info_updated_at = info_updated_at
+        oai_registry.info_validators = info_validators
+        OaiRegistry.objects.filter(pk=oai_registry.pk).update(
+            info_updated_at=info_updated_at, info_validators=info_validators
+        )
+
     @staticmethod
     def check_registry_url_already_exists(oai_registry_url):
         """Check if an OaiRegistry with the given url already exists.
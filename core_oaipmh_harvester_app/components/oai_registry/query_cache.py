@@ -0,0 +1,181 @@
+""" In-process cache of the activated registries and of their metadata
+formats by template, used to build the queries on the OaiRecord without
+querying the registries on each search.
+The cache is cleared when a registry or a metadata format is saved or
+deleted, and expires after OAI_HARVESTER_QUERY_CACHE_TIMEOUT seconds for the
+changes made by other processes.
+"""
+
+import threading
+import time
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from core_main_app.components.template.models import Template
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import (
+    OaiHarvesterMetadataFormat,
+)
+from core_oaipmh_harvester_app.components.oai_registry.models import (
+    OaiRegistry,
+)
+from core_oaipmh_harvester_app.settings import (
+    OAI_HARVESTER_QUERY_CACHE_TIMEOUT,
+)
+
+_lock = threading.Lock()
+_entry = None
+# Incremented by each clear, so that a load started before a clear is not
+# stored.
+_generation = 0
+
+
+class _CacheEntry:
+    """Cached registries and metadata formats"""
+
+    def __init__(self, activated_registry_ids, metadata_formats_by_template):
+        self.activated_registry_ids = activated_registry_ids
+        self.metadata_formats_by_template = metadata_formats_by_template
+        self.expiry = time.monotonic() + OAI_HARVESTER_QUERY_CACHE_TIMEOUT
+
+
+def _load():
+    """Load the activated registries and the metadata formats with a
+    template.
+
+    Returns:
+        _CacheEntry instance.
+
+    """
+    activated_registry_ids = tuple(
+        OaiRegistry.get_all_by_is_activated(is_activated=True).values_list(
+            "id", flat=True
+        )
+    )
+    metadata_formats_by_template = {}
+    for (
+        metadata_format_id,
+        registry_id,
+        template_id,
+    ) in OaiHarvesterMetadataFormat.objects.filter(
+        registry__in=activated_registry_ids, template__isnull=False
+    ).values_list(
+        "id", "registry_id", "template_id"
+    ):
+        metadata_formats_by_template.setdefault(template_id, []).append(
+            (registry_id, metadata_format_id)
+        )
+    return _CacheEntry(activated_registry_ids, metadata_formats_by_template)
+
+
+def _get_entry():
+    """Get the cache entry, loaded if missing or expired.
+
+    Returns:
+        _CacheEntry instance.
+
+    """
+    entry = _entry
+    if entry is not None and entry.expiry > time.monotonic():
+        return entry
+
+    generation = _generation
+    entry = _load()
+    if OAI_HARVESTER_QUERY_CACHE_TIMEOUT > 0:
+        _store(entry, generation)
+    return entry
+
+
+def _store(entry, generation):
+    """Store a cache entry if the cache has not been cleared since its load
+    started.
+
+    Args:
+        entry: _CacheEntry instance.
+        generation: Generation of the cache when the load started.
+
+    """
+    global _entry
+    with _lock:
+        if generation == _generation:
+            _entry = entry
+
+
+def get_activated_registry_ids():
+    """Return the ids of the activated registries.
+
+    Returns:
+        List of OaiRegistry ids.
+
+    """
+    return list(_get_entry().activated_registry_ids)
+
+
+def get_metadata_format_ids_by_templates(registry_ids, template_ids):
+    """Return the ids of the metadata formats of the activated registries
+    using the given templates.
+
+    Args:
+        registry_ids: List of OaiRegistry ids.
+        template_ids: List of Template ids.
+
+    Returns:
+        List of OaiHarvesterMetadataFormat ids.
+
+    """
+    entry = _get_entry()
+    registry_ids = set(registry_ids)
+    return [
+        metadata_format_id
+        for template_id in set(template_ids)
+        for registry_id, metadata_format_id in entry.metadata_formats_by_template.get(
+            template_id, []
+        )
+        if registry_id in registry_ids
+    ]
+
+
+def clear():
+    """Clear the cache."""
+    global _entry, _generation
+    with _lock:
+        _entry = None
+        _generation += 1
+
+
+def _clear_on_change(sender, **kwargs):
+    """Clear the cache when a registry or a metadata format changes. The cache
+    is cleared again on commit, so that a load running before the commit is
+    not kept.
+
+    Args:
+        sender: Class.
+        **kwargs: Args.
+
+    """
+    clear()
+    transaction.on_commit(clear)
+
+
+def connect_signals():
+    """Connect the cache to the signals of the registries, metadata formats
+    and templates.
+    """
+    for sender in (OaiRegistry, OaiHarvesterMetadataFormat):
+        post_save.connect(
+            _clear_on_change,
+            sender=sender,
+            dispatch_uid=f"oai_query_cache_save_{sender.__name__}",
+        )
+        post_delete.connect(
+            _clear_on_change,
+            sender=sender,
+            dispatch_uid=f"oai_query_cache_delete_{sender.__name__}",
+        )
+    # The template of the metadata formats is set to null on deletion,
+    # without signal on the metadata formats.
+    post_delete.connect(
+        _clear_on_change,
+        sender=Template,
+        dispatch_uid="oai_query_cache_delete_Template",
+    )
@@ -0,0 +1,207 @@
+"""
+OaiRegistryLease API
+"""
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection
+
+from core_main_app.utils import datetime as datetime_utils
+from core_oaipmh_harvester_app.components.oai_registry_lease.models import (
+    OaiRegistryLease,
+)
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_LEASE_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+class HeldLease:
+    """A lease held by the current process while a hold block runs."""
+
+    def __init__(self, registry_id, name, owner):
+        """Initialize a held lease.
+
+        Args:
+            registry_id: The registry id.
+            name: Name of the lease.
+            owner: Owner of the lease.
+
+        """
+        self.registry_id = registry_id
+        self.name = name
+        self.owner = owner
+        # Set by the heartbeat if the lease could not be renewed
+        self.lost_event = threading.Event()
+
+    @property
+    def is_lost(self):
+        """Check if the lease has been lost, e.g. reclaimed by another owner
+        after it expired. The operation it protects has to stop.
+
+        Returns:
+            Yes or No (bool).
+
+        """
+        return self.lost_event.is_set()
+
+
+def new_owner():
+    """Return a new unique lease owner, identifying the node and the process.
+
+    Returns:
+        Lease owner.
+
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+
+def _get_expiry(duration):
+    """Return the expiry date of a lease acquired now.
+
+    Args:
+        duration: Duration of the lease in seconds.
+
+    Returns:
+        Expiry date.
+
+    """
+    return datetime_utils.datetime_now() + timedelta(seconds=duration)
+
+
+def acquire(registry_id, name, owner=None, duration=None):
+    """Acquire a lease if it is free or expired.
+
+    Args:
+        registry_id: The registry id.
+        name: Name of the lease.
+        owner: Owner of the lease, a new owner if not set.
+        duration: Duration of the lease in seconds, OAI_HARVESTER_LEASE_DURATION
+            if not set.
+
+    Returns:
+        The owner if the lease has been acquired, None otherwise.
+
+    """
+    owner = owner or new_owner()
+    expires_at = _get_expiry(duration or OAI_HARVESTER_LEASE_DURATION)
+    if OaiRegistryLease.acquire(registry_id, name, owner, expires_at):
+        return owner
+    return None
+
+
+def renew(registry_id, name, owner, duration=None):
+    """Extend a lease if it is still held by the owner.
+
+    Args:
+        registry_id: The registry id.
+        name: Name of the lease.
+        owner: Owner of the lease.
+        duration: Duration of the lease in seconds, OAI_HARVESTER_LEASE_DURATION
+            if not set.
+
+    Returns:
+        True if the lease has been renewed, False otherwise.
+
+    """
+    expires_at = _get_expiry(duration or OAI_HARVESTER_LEASE_DURATION)
+    return OaiRegistryLease.renew(registry_id, name, owner, expires_at)
+
+
+def release(registry_id, name, owner):
+    """Release a lease if it is still held by the owner.
+
+    Args:
+        registry_id: The registry id.
+        name: Name of the lease.
+        owner: Owner of the lease.
+
+    """
+    OaiRegistryLease.release(registry_id, name, owner)
+
+
+def is_held(registry_id, name):
+    """Check if a lease is held and not expired.
+
+    Args:
+        registry_id: The registry id.
+        name: Name of the lease.
+
+    Returns:
+        Yes or No (bool).
+
+    """
+    return OaiRegistryLease.is_held(registry_id, name)
+
+
+@contextmanager
+def hold(registry_id, name):
+    """Hold a lease while the block runs. The lease is renewed by a heartbeat
+    thread, so that it expires shortly after its owner crashed. If it cannot
+    be renewed, the HeldLease is marked as lost and the block has to stop.
+
+    Args:
+        registry_id: The registry id.
+        name: Name of the lease.
+
+    Returns:
+        HeldLease if the lease has been acquired, None if it is held by
+        another owner.
+
+    """
+    owner = acquire(registry_id, name)
+    if owner is None:
+        yield None
+        return
+
+    lease = HeldLease(registry_id, name, owner)
+    stop_event = threading.Event()
+    heartbeat = threading.Thread(
+        target=_renew_until_stopped,
+        args=(lease, stop_event),
+        name=f"oai-harvester-lease-{name}-{registry_id}",
+        daemon=True,
+    )
+    heartbeat.start()
+    try:
+        yield lease
+    finally:
+        stop_event.set()
+        heartbeat.join()
+        release(registry_id, name, owner)
+
+
+def _renew_until_stopped(lease, stop_event):
+    """Renew a lease periodically until the stop event is set. The lease is
+    marked as lost if it cannot be renewed.
+
+    Args:
+        lease: HeldLease to renew.
+        stop_event: Event set when the lease is released.
+
+    """
+    try:
+        while not stop_event.wait(OAI_HARVESTER_LEASE_DURATION / 3):
+            if not renew(lease.registry_id, lease.name, lease.owner):
+                logger.warning(
+                    f"Lease {lease.name} of registry {lease.registry_id} has "
+                    "been lost."
+                )
+                lease.lost_event.set()
+                return
+    except Exception as exception:
+        logger.error(
+            f"ERROR : Impossible to renew the lease {lease.name} of registry "
+            f"{lease.registry_id}: %s",
+            str(exception),
+        )
+        # The lease expires if it cannot be renewed.
+        lease.lost_event.set()
+    finally:
+        # The thread has its own database connection
+        connection.close()
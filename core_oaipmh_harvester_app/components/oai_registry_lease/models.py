@@ -0,0 +1,119 @@
+"""
+OaiRegistryLease model
+"""
+
+from django.db import models, IntegrityError, transaction
+
+from core_main_app.utils import datetime as datetime_utils
+from core_oaipmh_harvester_app.components.oai_registry.models import (
+    OaiRegistry,
+)
+
+
+class OaiRegistryLease(models.Model):
+    """A lease on an operation of a registry, held by a single owner until it
+    expires. Leases are acquired and renewed with compare-and-set updates, so
+    that workers of several nodes can share the registries safely."""
+
+    HARVEST = "harvest"
+    UPDATE = "update"
+
+    registry = models.ForeignKey(
+        OaiRegistry, on_delete=models.CASCADE, related_name="leases"
+    )
+    name = models.CharField(blank=False, max_length=50)
+    owner = models.CharField(blank=False, max_length=200)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        """Meta"""
+
+        unique_together = ("registry", "name")
+
+    @staticmethod
+    def acquire(registry_id, name, owner, expires_at):
+        """Acquire a lease if it is free or expired.
+
+        Args:
+            registry_id: The registry id.
+            name: Name of the lease.
+            owner: Owner of the lease.
+            expires_at: Expiry date of the lease.
+
+        Returns:
+            True if the lease has been acquired, False otherwise.
+
+        """
+        # Reclaim the lease if it expired
+        if OaiRegistryLease.objects.filter(
+            registry_id=registry_id,
+            name=name,
+            expires_at__lte=datetime_utils.datetime_now(),
+        ).update(owner=owner, expires_at=expires_at):
+            return True
+
+        try:
+            with transaction.atomic():
+                OaiRegistryLease.objects.create(
+                    registry_id=registry_id,
+                    name=name,
+                    owner=owner,
+                    expires_at=expires_at,
+                )
+            return True
+        except IntegrityError:
+            # The lease is held by another owner
+            return False
+
+    @staticmethod
+    def renew(registry_id, name, owner, expires_at):
+        """Extend a lease if it is still held by the owner.
+
+        Args:
+            registry_id: The registry id.
+            name: Name of the lease.
+            owner: Owner of the lease.
+            expires_at: New expiry date of the lease.
+
+        Returns:
+            True if the lease has been renewed, False otherwise.
+
+        """
+        return (
+            OaiRegistryLease.objects.filter(
+                registry_id=registry_id, name=name, owner=owner
+            ).update(expires_at=expires_at)
+            > 0
+        )
+
+    @staticmethod
+    def release(registry_id, name, owner):
+        """Release a lease if it is still held by the owner.
+
+        Args:
+            registry_id: The registry id.
+            name: Name of the lease.
+            owner: Owner of the lease.
+
+        """
+        OaiRegistryLease.objects.filter(
+            registry_id=registry_id, name=name, owner=owner
+        ).delete()
+
+    @staticmethod
+    def is_held(registry_id, name):
+        """Check if a lease is held and not expired.
+
+        Args:
+            registry_id: The registry id.
+            name: Name of the lease.
+
+        Returns:
+            Yes or No (bool).
+
+        """
+        return OaiRegistryLease.objects.filter(
+            registry_id=registry_id,
+            name=name,
+            expires_at__gt=datetime_utils.datetime_now(),
+        ).exists()
@@ -2,18 +2,34 @@
     Oai-PMH verbs API.
 """
 
+import hashlib
+import re
+from time import perf_counter
+
 import requests
 from rest_framework import status
 from rest_framework.response import Response
 
-from core_main_app.utils.requests_utils.requests_utils import send_get_request
 from core_oaipmh_common_app.commons import exceptions as oai_pmh_exceptions
 from core_oaipmh_common_app.commons.messages import OaiPmhMessage
+from core_oaipmh_harvester_app.settings import (
+    OAI_HARVESTER_LIST_RECORDS_CHUNK_SIZE,
+)
 from core_oaipmh_harvester_app.utils import (
+    http_session_operations,
     sickle_operations,
     transform_operations,
 )
-from xml_utils.xsd_tree.xsd_tree import XSDTree
+from core_oaipmh_harvester_app.utils.list_records_parser import (
+    ListRecordsParser,
+)
+
+# Verbs giving the information of a registry
+REGISTRY_INFO_VERBS = ("Identify", "ListSets", "ListMetadataFormats")
+
+_RESPONSE_DATE = re.compile(
+    rb"<(?:[\w.-]+:)?responseDate>[^<]*</(?:[\w.-]+:)?responseDate>"
+)
 
 
 def identify(url):
@@ -141,6 +157,69 @@ def list_sets_as_object(url):
     return data, status_code
 
 
+def check_registry_info(url, info_validators):
+    """Send conditional Identify, ListSets and ListMetadataFormats requests,
+    to check if the information of a registry changed since the validators
+    of the responses were stored. Only the first page of ListSets is checked.
+
+    Args:
+        url: URL of the Data Provider.
+        info_validators: Dict of the validators of the last responses, by
+            verb.
+
+    Returns:
+        Yes or No (bool), if the information changed.
+        Dict of the validators of the responses, by verb, empty if a request
+        failed.
+
+    """
+    changed = False
+    new_info_validators = {}
+    for verb in REGISTRY_INFO_VERBS:
+        validators = info_validators.get(verb, {})
+        try:
+            http_response = http_session_operations.send_get_request(
+                url,
+                params={"verb": verb},
+                headers=http_session_operations.get_conditional_headers(
+                    validators
+                ),
+            )
+        except requests.RequestException:
+            return True, {}
+
+        if http_response.status_code == status.HTTP_304_NOT_MODIFIED:
+            new_info_validators[verb] = validators
+            continue
+        if http_response.status_code != status.HTTP_200_OK:
+            return True, {}
+
+        new_validators = http_session_operations.get_validators(http_response)
+        new_validators["digest"] = _get_registry_info_digest(
+            http_response.content
+        )
+        changed = changed or new_validators["digest"] != validators.get(
+            "digest"
+        )
+        new_info_validators[verb] = new_validators
+
+    return changed, new_info_validators
+
+
+def _get_registry_info_digest(content):
+    """Return the digest of a response giving the information of a registry.
+    The response date, different for each response, is ignored.
+
+    Args:
+        content: Content of the response.
+
+    Returns:
+        Hexadecimal digest.
+
+    """
+    return hashlib.sha256(_RESPONSE_DATE.sub(b"", content)).hexdigest()
+
+
 def list_records(
     url,
     metadata_prefix=None,
@@ -163,6 +242,46 @@ def list_records(
         Resumption Token.
 
     """
+    http_response, resumption_info = list_records_page(
+        url,
+        metadata_prefix=metadata_prefix,
+        resumption_token=resumption_token,
+        set_h=set_h,
+        from_date=from_date,
+        until_date=until_date,
+    )
+    return http_response, (
+        resumption_info["resumption_token"] if resumption_info else None
+    )
+
+
+def list_records_page(
+    url,
+    metadata_prefix=None,
+    resumption_token=None,
+    set_h=None,
+    from_date=None,
+    until_date=None,
+    metrics=None,
+):
+    """Performs an Oai-Pmh ListRecords request and returns the resumption
+    token with its attributes.
+    Args:
+        url: URL of the Data Provider.
+        metadata_prefix: Metadata Prefix to use for the request.
+        resumption_token: Resumption Token to use for the request.
+        set_h: Set to use for the request.
+        from_date: From Date to use for the request.
+        until_date: Until Date to use for the request.
+        metrics: HarvestMetrics collector of the harvest, if any.
+
+    Returns:
+        Response.
+        Dict of the resumption token, cursor, complete list size and
+        expiration date, None if the request failed.
+
+    """
+    resumption_info = None
     try:
         params = {"verb": "ListRecords"}
         if resumption_token is not None:
@@ -173,22 +292,33 @@ def list_records(
             params["from"] = from_date
             params["until"] = until_date
         rtn = []
-        http_response = send_get_request(url, params=params)
-        resumption_token = None
+        start = perf_counter()
+        http_response = http_session_operations.send_get_request(
+            url, params=params, stream=True
+        )
+        if metrics is not None:
+            metrics.add("http_seconds", perf_counter() - start)
         if http_response.status_code == status.HTTP_200_OK:
-            xml = http_response.text
-            elements = XSDTree.iterfind(
-                xml, ".//{http://www.openarchives.org/OAI/2.0/}record"
-            )
-            for elt in elements:
-                record = sickle_operations.get_record_elt(elt, metadata_prefix)
-                rtn.append(record)
-            resumption_token_elt = XSDTree.iterfind(
-                xml, ".//{http://www.openarchives.org/OAI/2.0/}resumptionToken"
+            # Parse the records and the resumption token in a single pass
+            # while the response body is downloaded.
+            parser = ListRecordsParser(metadata_prefix)
+            chunks = http_response.iter_content(
+                chunk_size=OAI_HARVESTER_LIST_RECORDS_CHUNK_SIZE
             )
-            resumption_token = next(iter(resumption_token_elt), None)
-            if resumption_token is not None:
-                resumption_token = resumption_token.text.strip(" \t\r\n")
+            try:
+                for record in (
+                    metrics.parse(parser, chunks)
+                    if metrics is not None
+                    else parser.parse(chunks)
+                ):
+                    rtn.append(record)
+            finally:
+                http_response.close()
+            parser.check_error()
+            resumption_info = parser.get_resumption_info()
+            if metrics is not None:
+                metrics.add("pages_fetched")
+                metrics.set_progress(resumption_info)
         elif http_response.status_code == status.HTTP_404_NOT_FOUND:
             raise oai_pmh_exceptions.OAIAPILabelledException(
                 message="Impossible to get data from the server. Server not found",
@@ -200,9 +330,9 @@ def list_records(
                 status_code=http_response.status_code,
             )
 
-        return Response(rtn, status=status.HTTP_200_OK), resumption_token
+        return Response(rtn, status=status.HTTP_200_OK), resumption_info
     except oai_pmh_exceptions.OAIAPIException as exception:
-        return exception.response(), resumption_token
+        return exception.response(), resumption_info
     except Exception as exception:
         content = OaiPmhMessage.get_message_labelled(
             "An error occurred during the list_records process: %s"
@@ -210,7 +340,7 @@ def list_records(
         )
         return (
             Response(content, status=status.HTTP_500_INTERNAL_SERVER_ERROR),
-            resumption_token,
+            resumption_info,
         )
 
 
@@ -243,7 +373,7 @@ def get_data(url, request=None):
                 session_id = request.session.session_key
             except Exception:
                 session_id = None
-            http_response = send_get_request(
+            http_response = http_session_operations.send_get_request(
                 url, cookies={"sessionid": session_id}
             )
             if http_response.status_code == status.HTTP_200_OK:
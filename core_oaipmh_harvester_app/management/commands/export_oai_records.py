@@ -0,0 +1,78 @@
+""" Export the harvested records of a registry
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core_main_app.commons import exceptions
+from core_oaipmh_harvester_app.components.oai_record import (
+    api as oai_record_api,
+)
+from core_oaipmh_harvester_app.components.oai_registry import (
+    api as oai_registry_api,
+)
+from core_oaipmh_harvester_app.utils import export_operations
+
+
+class Command(BaseCommand):
+    """Export the harvested records of a registry as NDJSON, a tar of xml
+    files or a single xml document."""
+
+    help = "Export the harvested records of a registry."
+
+    def add_arguments(self, parser):
+        """Add the arguments of the command.
+
+        Args:
+            parser: Argument parser.
+
+        """
+        parser.add_argument("registry_id", help="Id of the registry.")
+        parser.add_argument(
+            "--export-format",
+            choices=list(export_operations.EXPORT_CONTENT_TYPES),
+            default=export_operations.NDJSON,
+            help="Export format (default: ndjson).",
+        )
+        parser.add_argument(
+            "--metadata-format",
+            help="Only export the records of this metadata format id.",
+        )
+        parser.add_argument(
+            "--set", help="Only export the records of this set id."
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write the records to (default: standard output).",
+        )
+
+    def handle(self, *args, **options):
+        """Export the records.
+
+        Args:
+            *args:
+            **options: Arguments of the command.
+
+        """
+        try:
+            registry = oai_registry_api.get_by_id(options["registry_id"])
+        except exceptions.DoesNotExist:
+            raise CommandError(
+                f"No registry found with the id {options['registry_id']}."
+            )
+
+        oai_records = oai_record_api.get_all_to_export(
+            registry.id,
+            harvester_metadata_format_id=options["metadata_format"],
+            harvester_set_id=options["set"],
+        )
+        chunks = export_operations.export_records(
+            oai_records, options["export_format"]
+        )
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.buffer.writelines(chunks)
+            sys.stdout.flush()
@@ -0,0 +1,23 @@
+""" Migrations
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "core_oaipmh_harvester_app",
+            "0003_remove_oairecord_xml_file_oairecord_file",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="oairecord",
+            name="harvest_digest",
+            field=models.CharField(
+                blank=True, default=None, max_length=64, null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+""" Migrations
+"""
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core_oaipmh_harvester_app", "0004_oairecord_harvest_digest"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="oairegistry",
+            name="is_harvesting",
+        ),
+        migrations.RemoveField(
+            model_name="oairegistry",
+            name="is_queued",
+        ),
+        migrations.RemoveField(
+            model_name="oairegistry",
+            name="is_updating",
+        ),
+        migrations.AddField(
+            model_name="oairegistry",
+            name="next_harvest_at",
+            field=models.DateTimeField(
+                blank=True, db_index=True, default=None, null=True
+            ),
+        ),
+        migrations.CreateModel(
+            name="OaiRegistryLease",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50)),
+                ("owner", models.CharField(max_length=200)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                (
+                    "registry",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leases",
+                        to="core_oaipmh_harvester_app.oairegistry",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("registry", "name")},
+            },
+        ),
+    ]
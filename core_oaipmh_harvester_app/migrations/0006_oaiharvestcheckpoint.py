@@ -0,0 +1,73 @@
+""" Migrations
+"""
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core_oaipmh_harvester_app", "0005_oairegistrylease"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OaiHarvestCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "from_date",
+                    models.CharField(
+                        blank=True, default=None, max_length=50, null=True
+                    ),
+                ),
+                ("harvest_started_at", models.DateTimeField()),
+                (
+                    "resumption_token",
+                    models.TextField(blank=True, default=None, null=True),
+                ),
+                (
+                    "cursor",
+                    models.IntegerField(blank=True, default=None, null=True),
+                ),
+                (
+                    "complete_list_size",
+                    models.IntegerField(blank=True, default=None, null=True),
+                ),
+                (
+                    "expiration_date",
+                    models.DateTimeField(blank=True, default=None, null=True),
+                ),
+                ("last_modified", models.DateTimeField(auto_now=True)),
+                (
+                    "harvester_metadata_format",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core_oaipmh_harvester_app.oaiharvestermetadataformat",
+                    ),
+                ),
+                (
+                    "harvester_set",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core_oaipmh_harvester_app.oaiharvesterset",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {
+                    ("harvester_metadata_format", "harvester_set")
+                },
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+""" Migrations
+"""
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core_oaipmh_harvester_app", "0006_oaiharvestcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OaiRecordQuarantine",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("identifier", models.CharField(max_length=200)),
+                ("raw", models.TextField()),
+                ("error", models.TextField(blank=True, default="")),
+                ("attempts", models.IntegerField(default=1)),
+                ("creation_date", models.DateTimeField(auto_now_add=True)),
+                ("last_attempt", models.DateTimeField(auto_now=True)),
+                (
+                    "harvester_metadata_format",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core_oaipmh_harvester_app.oaiharvestermetadataformat",
+                    ),
+                ),
+                (
+                    "registry",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core_oaipmh_harvester_app.oairegistry",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {
+                    ("harvester_metadata_format", "identifier")
+                },
+            },
+        ),
+    ]
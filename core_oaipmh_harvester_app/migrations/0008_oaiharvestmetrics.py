@@ -0,0 +1,71 @@
+""" Migrations
+"""
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core_oaipmh_harvester_app", "0007_oairecordquarantine"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OaiHarvestMetrics",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("harvests_queued", models.IntegerField(default=0)),
+                ("harvests_started", models.IntegerField(default=0)),
+                ("harvests_skipped", models.IntegerField(default=0)),
+                ("harvests_finished", models.IntegerField(default=0)),
+                ("harvests_failed", models.IntegerField(default=0)),
+                ("pages_fetched", models.BigIntegerField(default=0)),
+                ("records_inserted", models.BigIntegerField(default=0)),
+                ("records_updated", models.BigIntegerField(default=0)),
+                ("records_skipped", models.BigIntegerField(default=0)),
+                ("records_deleted", models.BigIntegerField(default=0)),
+                ("records_quarantined", models.BigIntegerField(default=0)),
+                ("bytes_downloaded", models.BigIntegerField(default=0)),
+                ("http_seconds", models.FloatField(default=0)),
+                ("parse_seconds", models.FloatField(default=0)),
+                ("db_seconds", models.FloatField(default=0)),
+                (
+                    "cursor",
+                    models.IntegerField(blank=True, default=None, null=True),
+                ),
+                (
+                    "complete_list_size",
+                    models.IntegerField(blank=True, default=None, null=True),
+                ),
+                (
+                    "current_harvest_started_at",
+                    models.DateTimeField(blank=True, default=None, null=True),
+                ),
+                (
+                    "last_harvest_finished_at",
+                    models.DateTimeField(blank=True, default=None, null=True),
+                ),
+                (
+                    "last_harvest_duration",
+                    models.FloatField(blank=True, default=None, null=True),
+                ),
+                (
+                    "registry",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="harvest_metrics",
+                        to="core_oaipmh_harvester_app.oairegistry",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,82 @@
+""" Migrations
+"""
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+from core_main_app.settings import MONGODB_INDEXING
+from core_main_app.utils.storage.storage import core_file_storage
+
+
+def delete_duplicate_records(apps, schema_editor):
+    """Delete the duplicates of the records harvested more than once with the
+    same identifier and metadata format, keeping the last one inserted. The
+    historical model sends no signal: the files and the MongoDB documents of
+    the duplicates are deleted explicitly.
+
+    Args:
+        apps:
+        schema_editor:
+
+    """
+    oai_record_model = apps.get_model("core_oaipmh_harvester_app", "OaiRecord")
+    duplicates = (
+        oai_record_model.objects.values(
+            "harvester_metadata_format", "identifier"
+        )
+        .annotate(count=Count("id"), last_id=Max("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in list(duplicates):
+        queryset = oai_record_model.objects.filter(
+            harvester_metadata_format=duplicate["harvester_metadata_format"],
+            identifier=duplicate["identifier"],
+            id__lt=duplicate["last_id"],
+        )
+        oai_record_ids, file_names = zip(*queryset.values_list("id", "file"))
+        queryset.delete()
+        _delete_files(file_names)
+        _delete_mongo_documents(oai_record_ids)
+
+
+def _delete_files(file_names):
+    """Delete the files of deleted records.
+
+    Args:
+        file_names: List of file names.
+
+    """
+    storage = core_file_storage(model="data")
+    for file_name in file_names:
+        if file_name:
+            storage.delete(file_name)
+
+
+def _delete_mongo_documents(oai_record_ids):
+    """Delete the MongoDB documents of deleted records, if the records are
+    indexed in MongoDB.
+
+    Args:
+        oai_record_ids: List of OaiRecord ids.
+
+    """
+    if not MONGODB_INDEXING:
+        return
+
+    from core_oaipmh_harvester_app.components.mongo.models import (
+        MongoOaiRecord,
+    )
+
+    MongoOaiRecord.objects(data_id__in=list(oai_record_ids)).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core_oaipmh_harvester_app", "0008_oaiharvestmetrics"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_records, migrations.RunPython.noop
+        ),
+    ]
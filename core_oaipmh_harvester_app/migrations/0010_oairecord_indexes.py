@@ -0,0 +1,39 @@
+""" Migrations
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core_oaipmh_harvester_app", "0009_oairecord_delete_duplicates"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="oairecord",
+            index=models.Index(
+                condition=models.Q(("deleted", False)),
+                fields=["registry", "-last_modification_date"],
+                name="oairecord_live_registry_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="oairecord",
+            index=models.Index(
+                condition=models.Q(("deleted", False)),
+                fields=[
+                    "harvester_metadata_format",
+                    "-last_modification_date",
+                ],
+                name="oairecord_live_format_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="oairecord",
+            constraint=models.UniqueConstraint(
+                fields=("harvester_metadata_format", "identifier"),
+                name="oairecord_format_identifier_uniq",
+            ),
+        ),
+    ]
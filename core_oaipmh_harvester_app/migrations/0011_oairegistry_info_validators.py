@@ -0,0 +1,23 @@
+""" Migrations
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core_oaipmh_harvester_app", "0010_oairecord_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="oairegistry",
+            name="info_updated_at",
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="oairegistry",
+            name="info_validators",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,51 @@
+""" Migrations
+"""
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def delete_duplicate_checkpoints(apps, schema_editor):
+    """Delete the duplicates of the checkpoints of the harvests without set,
+    keeping the last one inserted.
+
+    Args:
+        apps:
+        schema_editor:
+
+    """
+    oai_harvest_checkpoint_model = apps.get_model(
+        "core_oaipmh_harvester_app", "OaiHarvestCheckpoint"
+    )
+    duplicates = (
+        oai_harvest_checkpoint_model.objects.filter(harvester_set__isnull=True)
+        .values("harvester_metadata_format")
+        .annotate(count=Count("id"), last_id=Max("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in list(duplicates):
+        oai_harvest_checkpoint_model.objects.filter(
+            harvester_metadata_format=duplicate["harvester_metadata_format"],
+            harvester_set__isnull=True,
+            id__lt=duplicate["last_id"],
+        ).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core_oaipmh_harvester_app", "0011_oairegistry_info_validators"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_checkpoints, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="oaiharvestcheckpoint",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("harvester_set__isnull", True)),
+                fields=("harvester_metadata_format",),
+                name="oaiharvestcheckpoint_format_no_set_uniq",
+            ),
+        ),
+    ]
@@ -9,12 +9,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 import core_oaipmh_harvester_app.components.oai_record.api as oai_record_api
-from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import (
-    api as oai_harvester_metadata_format_api,
-)
-from core_oaipmh_harvester_app.components.oai_registry import (
-    api as oai_registry_api,
-)
+from core_oaipmh_harvester_app.components.oai_registry import query_cache
 from core_oaipmh_harvester_app.utils.query.mongo.query_builder import (
     OaiPmhQueryBuilder,
 )
@@ -102,11 +97,7 @@ class AbstractExecuteQueryView(APIView, metaclass=ABCMeta):
             registries = json.loads(registries)
 
         # if registries, check if activated
-        list_activated_registry = list(
-            oai_registry_api.get_all_activated_registry().values_list(
-                "id", flat=True
-            )
-        )
+        list_activated_registry = query_cache.get_activated_registry_ids()
         if len(registries) > 0:
             activated_registries = [
                 activated_registry_id
@@ -119,19 +110,13 @@ class AbstractExecuteQueryView(APIView, metaclass=ABCMeta):
         if len(templates) > 0:
             # get list of template ids
             list_template_ids = [template["id"] for template in templates]
-            # get all metadata formats used by the registries
-            list_metadata_format = (
-                oai_harvester_metadata_format_api.get_all_by_list_registry_ids(
-                    activated_registries
+            # Get the metadata formats of the registries that use the given
+            # templates
+            list_metadata_formats_id = (
+                query_cache.get_metadata_format_ids_by_templates(
+                    activated_registries, list_template_ids
                 )
             )
-            # Filter metadata formats that use the given templates
-            list_metadata_formats_id = [
-                x.id
-                for x in list_metadata_format
-                if x.template is not None
-                and x.template.id in list_template_ids
-            ]
             query_builder.add_list_metadata_formats_criteria(
                 list_metadata_formats_id
             )
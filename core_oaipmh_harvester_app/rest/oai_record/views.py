@@ -43,10 +43,15 @@ class ExecuteQueryView(AbstractExecuteQueryView):
         results_paginator = ResultsPaginator.get_results(data_list, page, 10)
 
         if settings.MONGODB_INDEXING:
+            from core_oaipmh_harvester_app.components.mongo.models import (
+                MongoOaiRecord,
+            )
             from core_oaipmh_harvester_app.rest.mongo.serializers import (
                 MongoOaiRecordSerializer,
             )
 
+            # Load the data of the whole page before the serialization
+            MongoOaiRecord.load_related_data(list(results_paginator))
             serializer = MongoOaiRecordSerializer
         else:
             from core_oaipmh_harvester_app.rest.serializers import (
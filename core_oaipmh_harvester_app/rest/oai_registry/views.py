@@ -1,6 +1,7 @@
 """ OaiRegistry rest api
 """
 
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
@@ -21,10 +22,18 @@ from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import (
 from core_oaipmh_harvester_app.components.oai_harvester_set import (
     api as oai_set_api,
 )
+from core_oaipmh_harvester_app.components.oai_harvest_metrics import (
+    api as oai_harvest_metrics_api,
+)
+from core_oaipmh_harvester_app.components.oai_record import (
+    api as oai_record_api,
+)
 from core_oaipmh_harvester_app.components.oai_registry import (
     api as oai_registry_api,
 )
 from core_oaipmh_harvester_app.rest import serializers
+from core_oaipmh_harvester_app.tasks import purge_registry_task
+from core_oaipmh_harvester_app.utils import export_operations
 
 
 class RegistryList(APIView):
@@ -164,7 +173,14 @@ class RegistryDetail(APIView):
 
     @method_decorator(api_staff_member_required())
     def delete(self, request, registry_id):
-        """Delete a Registry (Data provider)
+        """Delete a Registry (Data provider). With the purge parameter, the
+        registry and its records are deleted by batches in a background task.
+
+        Parameters:
+
+            {
+                "purge": "true" | "false",
+            }
 
         Args:
 
@@ -173,6 +189,8 @@ class RegistryDetail(APIView):
 
         Returns:
 
+            - code: 202
+              content: Id of the purge task
             - code: 204
               content: Deletion succeed
             - code: 404
@@ -182,6 +200,12 @@ class RegistryDetail(APIView):
         """
         try:
             registry = oai_registry_api.get_by_id(registry_id)
+            if request.query_params.get("purge", "").lower() == "true":
+                task = purge_registry_task.apply_async((str(registry.id),))
+                return Response(
+                    {"task_id": task.id}, status=status.HTTP_202_ACCEPTED
+                )
+
             oai_registry_api.delete(registry)
 
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -512,3 +536,150 @@ class Harvest(APIView):
             return Response(
                 content, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class HarvestProgress(APIView):
+    """Harvest Progress"""
+
+    @method_decorator(api_staff_member_required())
+    def get(self, request, registry_id):
+        """Retrieve the harvest metrics and the progress of the running
+        harvest of a registry (Data provider)
+
+        Args:
+
+            request: HTTP request
+            registry_id: ObjectId
+
+        Returns:
+
+            - code: 200
+              content: Harvest metrics and progress
+            - code: 404
+              content: Object was not found
+            - code: 500
+              content: Internal server error
+        """
+        try:
+            registry = oai_registry_api.get_by_id(registry_id)
+            serializer = serializers.HarvestProgressSerializer(
+                oai_harvest_metrics_api.get_by_registry(registry)
+            )
+
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        except exceptions.DoesNotExist:
+            content = OaiPmhMessage.get_message_labelled(
+                "No registry found with the given id."
+            )
+            return Response(content, status=status.HTTP_404_NOT_FOUND)
+        except Exception as exception:
+            content = OaiPmhMessage.get_message_labelled(str(exception))
+            return Response(
+                content, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class HarvestMetricsExport(APIView):
+    """Harvest Metrics Export"""
+
+    @method_decorator(api_staff_member_required())
+    def get(self, request):
+        """Export the harvest metrics of all registries (Data providers) in
+        the Prometheus text format
+
+        Args:
+
+            request: HTTP request
+
+        Returns:
+
+            - code: 200
+              content: Harvest metrics
+            - code: 500
+              content: Internal server error
+        """
+        try:
+            return HttpResponse(
+                oai_harvest_metrics_api.to_prometheus_text(
+                    oai_harvest_metrics_api.get_all()
+                ),
+                content_type=oai_harvest_metrics_api.PROMETHEUS_CONTENT_TYPE,
+            )
+        except Exception as exception:
+            content = OaiPmhMessage.get_message_labelled(str(exception))
+            return Response(
+                content, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class ExportRecords(APIView):
+    """Export Records"""
+
+    @method_decorator(api_staff_member_required())
+    def get(self, request, registry_id):
+        """Stream all the records of a registry (Data provider), optionally
+        restricted to a metadata format or a set
+
+        Parameters:
+
+            {
+                "export_format": "ndjson" | "tar" | "xml",
+                "metadata_format": metadata_format_id,
+                "set": set_id,
+            }
+
+        Args:
+
+            request: HTTP request
+            registry_id: ObjectId
+
+        Returns:
+
+            - code: 200
+              content: Records, as NDJSON, a tar of xml files or a single xml
+                document (ndjson by default)
+            - code: 400
+              content: Unsupported export format
+            - code: 404
+              content: Object was not found
+            - code: 500
+              content: Internal server error
+        """
+        try:
+            registry = oai_registry_api.get_by_id(registry_id)
+            export_format = request.query_params.get(
+                "export_format", export_operations.NDJSON
+            )
+            if export_format not in export_operations.EXPORT_CONTENT_TYPES:
+                content = OaiPmhMessage.get_message_labelled(
+                    f"Export format {export_format} is not supported."
+                )
+                return Response(content, status=status.HTTP_400_BAD_REQUEST)
+
+            oai_records = oai_record_api.get_all_to_export(
+                registry.id,
+                harvester_metadata_format_id=request.query_params.get(
+                    "metadata_format"
+                ),
+                harvester_set_id=request.query_params.get("set"),
+            )
+            response = StreamingHttpResponse(
+                export_operations.export_records(oai_records, export_format),
+                content_type=export_operations.EXPORT_CONTENT_TYPES[
+                    export_format
+                ],
+            )
+            response[
+                "Content-Disposition"
+            ] = f'attachment; filename="registry_{registry.id}.{export_format}"'
+            return response
+        except exceptions.DoesNotExist:
+            content = OaiPmhMessage.get_message_labelled(
+                "No registry found with the given id."
+            )
+            return Response(content, status=status.HTTP_404_NOT_FOUND)
+        except Exception as exception:
+            content = OaiPmhMessage.get_message_labelled(str(exception))
+            return Response(
+                content, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
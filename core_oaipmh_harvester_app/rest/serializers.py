@@ -5,6 +5,9 @@
 from rest_framework import serializers
 
 from core_main_app.commons.serializers import BasicSerializer
+from core_oaipmh_harvester_app.components.oai_harvest_metrics.models import (
+    OaiHarvestMetrics,
+)
 from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
 from core_oaipmh_harvester_app.components.oai_registry import (
     api as oai_registry_api,
@@ -17,21 +20,24 @@ from core_oaipmh_harvester_app.components.oai_registry.models import (
 class RegistrySerializer(serializers.ModelSerializer):
     """Registry Serializer"""
 
+    is_harvesting = serializers.BooleanField(read_only=True)
+    is_updating = serializers.BooleanField(read_only=True)
+    is_queued = serializers.BooleanField(read_only=True)
+
     class Meta:
         """Meta"""
 
         model = OaiRegistry
-        fields = "__all__"
+        # The validators are only used to check the registry information.
+        exclude = ("info_validators",)
 
         read_only_fields = (
             "id",
             "name",
             "description",
             "last_update",
-            "is_harvesting",
-            "is_updating",
             "is_activated",
-            "is_queued",
+            "info_updated_at",
         )
 
     def create(self, validated_data):
@@ -48,6 +54,40 @@ class RegistrySerializer(serializers.ModelSerializer):
         )
 
 
+class HarvestProgressSerializer(serializers.ModelSerializer):
+    """Harvest Progress Serializer"""
+
+    is_harvesting = serializers.BooleanField(
+        source="registry.is_harvesting", read_only=True
+    )
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        """Meta"""
+
+        model = OaiHarvestMetrics
+        exclude = ("id",)
+
+    def get_progress(self, instance):
+        """Return the progress of the running harvest, given by the Data
+        Provider.
+
+        Args:
+            instance: OaiHarvestMetrics instance.
+
+        Returns:
+            Ratio of the list harvested, None if unknown.
+
+        """
+        if (
+            instance.current_harvest_started_at is None
+            or instance.cursor is None
+            or not instance.complete_list_size
+        ):
+            return None
+        return min(instance.cursor / instance.complete_list_size, 1)
+
+
 class UpdateRegistrySerializer(BasicSerializer):
     """Update Registry Serializer"""
 
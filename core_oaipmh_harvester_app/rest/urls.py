@@ -29,6 +29,21 @@ urlpatterns = [
         oai_registry_views.Harvest.as_view(),
         name="core_oaipmh_harvester_app_rest_harvest",
     ),
+    re_path(
+        r"^registry/(?P<registry_id>\w+)/progress/$",
+        oai_registry_views.HarvestProgress.as_view(),
+        name="core_oaipmh_harvester_app_rest_harvest_progress",
+    ),
+    re_path(
+        r"^registry/(?P<registry_id>\w+)/export/$",
+        oai_registry_views.ExportRecords.as_view(),
+        name="core_oaipmh_harvester_app_rest_registry_export",
+    ),
+    re_path(
+        r"^registry/metrics/$",
+        oai_registry_views.HarvestMetricsExport.as_view(),
+        name="core_oaipmh_harvester_app_rest_harvest_metrics",
+    ),
     re_path(
         r"^registry/(?P<registry_id>\w+)/$",
         oai_registry_views.RegistryDetail.as_view(),
@@ -27,6 +27,191 @@ WATCH_REGISTRY_HARVEST_RATE = 60
 """ :py:class:`int`: Harvesting rate in seconds.
 """
 
+OAI_HARVESTER_SCHEDULE_BATCH_SIZE = getattr(
+    settings, "OAI_HARVESTER_SCHEDULE_BATCH_SIZE", 100
+)
+""" :py:class:`int`: Maximum number of due registries queued for harvest each
+WATCH_REGISTRY_HARVEST_RATE seconds.
+"""
+
+OAI_HARVESTER_HARVEST_JITTER = getattr(
+    settings, "OAI_HARVESTER_HARVEST_JITTER", 0.1
+)
+""" :py:class:`float`: Maximum random delay added to the harvest rate of a
+registry when its next harvest is scheduled, as a fraction of the harvest rate.
+"""
+
+OAI_HARVESTER_BULK_UPSERT = getattr(
+    settings, "OAI_HARVESTER_BULK_UPSERT", False
+)
+""" :py:class:`bool`: Upsert the records of a ListRecords page with bulk
+queries instead of one record at a time.
+"""
+
+OAI_HARVESTER_UPSERT_ON_CONFLICT = getattr(
+    settings, "OAI_HARVESTER_UPSERT_ON_CONFLICT", True
+)
+""" :py:class:`bool`: Upsert the records of a ListRecords page with a single
+INSERT ... ON CONFLICT query on PostgreSQL. Other databases use the generic
+upsert, bulk or not depending on OAI_HARVESTER_BULK_UPSERT.
+"""
+
+OAI_HARVESTER_LIST_RECORDS_CHUNK_SIZE = getattr(
+    settings, "OAI_HARVESTER_LIST_RECORDS_CHUNK_SIZE", 64 * 1024
+)
+""" :py:class:`int`: Size in bytes of the chunks read from a ListRecords
+response while it is parsed.
+"""
+
+OAI_HARVESTER_PREFETCH_PAGES = getattr(
+    settings, "OAI_HARVESTER_PREFETCH_PAGES", 0
+)
+""" :py:class:`int`: Number of ListRecords pages downloaded in advance while
+the current page is being stored. Pages are fetched in a background thread.
+0 disables the prefetch.
+"""
+
+OAI_HARVESTER_MAX_CONCURRENT_HARVESTS = getattr(
+    settings, "OAI_HARVESTER_MAX_CONCURRENT_HARVESTS", 1
+)
+""" :py:class:`int`: Maximum number of (metadata format, set) pairs of a
+registry harvested at the same time, each in its own thread. Without
+INSERT ... ON CONFLICT upserts, the sets of a metadata format are harvested
+one after the other.
+"""
+
+OAI_HARVESTER_HTTP_POOL_MAXSIZE = getattr(
+    settings, "OAI_HARVESTER_HTTP_POOL_MAXSIZE", 10
+)
+""" :py:class:`int`: Maximum number of connections kept alive for each host
+harvested.
+"""
+
+OAI_HARVESTER_MONGO_INDEX_BATCH_SIZE = getattr(
+    settings, "OAI_HARVESTER_MONGO_INDEX_BATCH_SIZE", 500
+)
+""" :py:class:`int`: Maximum number of OaiRecord indexed in MongoDB by a batch
+task, when MongoDB indexing is asynchronous.
+"""
+
+OAI_HARVESTER_MONGO_INDEX_MAX_MESSAGE_SIZE = getattr(
+    settings, "OAI_HARVESTER_MONGO_INDEX_MAX_MESSAGE_SIZE", 1024 * 1024
+)
+""" :py:class:`int`: Approximate maximum size in bytes of the dict contents
+sent with a batch indexing task. A batch is sent before it reaches
+OAI_HARVESTER_MONGO_INDEX_BATCH_SIZE records if its contents are larger.
+"""
+
+OAI_HARVESTER_QUERY_CACHE_TIMEOUT = getattr(
+    settings, "OAI_HARVESTER_QUERY_CACHE_TIMEOUT", 60
+)
+""" :py:class:`int`: Lifetime in seconds of the in-process cache of the
+activated registries and metadata formats used to build the queries. The cache
+is cleared on changes made by the same process, the lifetime bounds the
+staleness for the changes made by other processes. 0 disables the cache.
+"""
+
+OAI_HARVESTER_LEASE_DURATION = getattr(
+    settings, "OAI_HARVESTER_LEASE_DURATION", 300
+)
+""" :py:class:`int`: Duration in seconds of the leases held on the registries
+while they are harvested or updated. Leases are renewed every third of their
+duration, a lease of a crashed worker is reclaimed once expired.
+"""
+
+OAI_HARVESTER_CHECKPOINT_MAX_AGE = getattr(
+    settings, "OAI_HARVESTER_CHECKPOINT_MAX_AGE", 24 * 60 * 60
+)
+""" :py:class:`int`: Age in seconds after which the resumption token of an
+unfinished harvest is not used anymore, when the Data Provider does not give
+its expiration date. The harvest then restarts from the last update date.
+"""
+
+OAI_HARVESTER_QUARANTINE_MAX_ATTEMPTS = getattr(
+    settings, "OAI_HARVESTER_QUARANTINE_MAX_ATTEMPTS", 5
+)
+""" :py:class:`int`: Number of times a harvested record which could not be
+stored is tried again by the next harvests, before being left in quarantine.
+"""
+
+OAI_HARVESTER_RATE_LIMIT = getattr(settings, "OAI_HARVESTER_RATE_LIMIT", 10)
+""" :py:class:`float`: Maximum number of requests per second sent to a host.
+The rate starts at this maximum, decreases when the host slows down, fails or
+throttles the harvester, and increases again while it answers quickly. 0
+disables the rate limiting.
+"""
+
+OAI_HARVESTER_RATE_LIMIT_MIN = getattr(
+    settings, "OAI_HARVESTER_RATE_LIMIT_MIN", 0.1
+)
+""" :py:class:`float`: Minimum number of requests per second sent to a host.
+"""
+
+OAI_HARVESTER_RATE_LIMIT_LATENCY_FACTOR = getattr(
+    settings, "OAI_HARVESTER_RATE_LIMIT_LATENCY_FACTOR", 2
+)
+""" :py:class:`float`: Ratio between the average latency of a host and its
+lowest average latency above which the host is considered overloaded, and the
+rate of its requests decreased.
+"""
+
+OAI_HARVESTER_MAX_RETRIES = getattr(settings, "OAI_HARVESTER_MAX_RETRIES", 3)
+""" :py:class:`int`: Maximum number of times a request is sent again after a
+connection error or a 429, 502, 503 or 504 response.
+"""
+
+OAI_HARVESTER_RETRY_BACKOFF = getattr(
+    settings, "OAI_HARVESTER_RETRY_BACKOFF", 1
+)
+""" :py:class:`float`: Delay in seconds before the first retry of a request,
+doubled at each retry, when the host does not send a Retry-After header.
+"""
+
+OAI_HARVESTER_MAX_RETRY_DELAY = getattr(
+    settings, "OAI_HARVESTER_MAX_RETRY_DELAY", 120
+)
+""" :py:class:`int`: Maximum delay in seconds before the retry of a request. A
+request is not retried when the host asks to wait longer.
+"""
+
+OAI_HARVESTER_COMPRESS_XML_CONTENT = getattr(
+    settings, "OAI_HARVESTER_COMPRESS_XML_CONTENT", False
+)
+""" :py:class:`bool`: Store the xml content of the harvested records gzip
+compressed. The content is decompressed when it is read, whether it has been
+stored compressed or not, so that the setting can be changed at any time.
+"""
+
+OAI_HARVESTER_XML_CONTENT_COMPRESSION_LEVEL = getattr(
+    settings, "OAI_HARVESTER_XML_CONTENT_COMPRESSION_LEVEL", 6
+)
+""" :py:class:`int`: Compression level, from 1 (fastest) to 9 (smallest), of
+the xml content of the harvested records stored compressed.
+"""
+
+OAI_HARVESTER_EXPORT_CHUNK_SIZE = getattr(
+    settings, "OAI_HARVESTER_EXPORT_CHUNK_SIZE", 500
+)
+""" :py:class:`int`: Number of OaiRecord fetched at a time from the database
+while the records of a registry are exported.
+"""
+
+OAI_HARVESTER_PURGE_BATCH_SIZE = getattr(
+    settings, "OAI_HARVESTER_PURGE_BATCH_SIZE", 1000
+)
+""" :py:class:`int`: Number of OaiRecord deleted at a time while a registry is
+purged.
+"""
+
+OAI_HARVESTER_REGISTRY_INFO_REFRESH_INTERVAL = getattr(
+    settings, "OAI_HARVESTER_REGISTRY_INFO_REFRESH_INTERVAL", 3600
+)
+""" :py:class:`int`: Minimum delay in seconds between two checks of the
+information of a registry (identify, sets and metadata formats) before its
+harvests. The information is updated only if the Data Provider answers
+differently than at the last check.
+"""
+
 # Can anonymous access public document
 CAN_ANONYMOUS_ACCESS_PUBLIC_DOCUMENT = getattr(
     settings, "CAN_ANONYMOUS_ACCESS_PUBLIC_DOCUMENT", False
@@ -1,7 +1,31 @@
 """ System APIs
 """
 
+import logging
+
+from django.db import IntegrityError, transaction, DEFAULT_DB_ALIAS
+from django.db.models.signals import post_save
+
+from core_main_app.commons import exceptions
+from core_main_app.settings import CHECKSUM_ALGORITHM
+from core_main_app.utils.checksum import compute_checksum
+from core_main_app.utils.databases.backend import uses_postgresql_backend
+from core_main_app.utils.datetime import datetime_now
 from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_UPSERT_ON_CONFLICT
+
+logger = logging.getLogger(__name__)
+
+OAI_RECORD_BULK_UPDATE_FIELDS = [
+    "title",
+    "deleted",
+    "dict_content",
+    "file",
+    "checksum",
+    "last_modification_date",
+    "last_change_date",
+    "harvest_digest",
+]
 
 
 def upsert_oai_record(oai_record):
@@ -13,11 +37,197 @@ def upsert_oai_record(oai_record):
         Returns:
             OaiRecord instance.
 
+    """
+    # Do not use save_object, which sets the modification date of a new
+    # record to now instead of its datestamp.
+    now = datetime_now()
+    _prepare_oai_record(oai_record, now)
+    if not oai_record.pk:
+        oai_record.creation_date = now
+    try:
+        oai_record.save()
+    except IntegrityError as exception:
+        raise exceptions.NotUniqueError(str(exception))
+    except Exception as exception:
+        raise exceptions.ModelError(str(exception))
+    return oai_record
+
+
+def bulk_upsert_oai_records(
+    oai_records_to_create, oai_records_to_update, oai_records_harvester_sets
+):
+    """Create or update a list of OaiRecord and their set memberships with
+    bulk queries. Post save signals are sent once the records are saved.
+
+    Args:
+        oai_records_to_create: List of OaiRecord to create.
+        oai_records_to_update: List of OaiRecord to update.
+        oai_records_harvester_sets: List of (OaiRecord, list of OaiHarvesterSet) tuples.
+
+    Returns:
+        List of OaiRecord.
+
+    """
+    if not oai_records_to_create and not oai_records_to_update:
+        return []
+
+    now = datetime_now()
+    for oai_record in oai_records_to_create:
+        _prepare_oai_record(oai_record, now)
+        oai_record.creation_date = now
+    for oai_record in oai_records_to_update:
+        _prepare_oai_record(oai_record, now)
+        # bulk_update does not call pre_save: commit the new file now.
+        OaiRecord._meta.get_field("file").pre_save(oai_record, False)
+
+    with transaction.atomic():
+        if oai_records_to_create:
+            OaiRecord.bulk_create(oai_records_to_create)
+        if oai_records_to_update:
+            OaiRecord.bulk_update(
+                oai_records_to_update, OAI_RECORD_BULK_UPDATE_FIELDS
+            )
+        if oai_records_harvester_sets:
+            OaiRecord.reconcile_harvester_sets(oai_records_harvester_sets)
+
+    # Keep the behavior of a regular save for signal receivers (indexing).
+    for oai_record in oai_records_to_create:
+        _send_post_save(oai_record, created=True)
+    for oai_record in oai_records_to_update:
+        _send_post_save(oai_record, created=False)
+
+    return oai_records_to_create + oai_records_to_update
+
+
+def reconcile_oai_records_harvester_sets(oai_records_harvester_sets):
+    """Reconcile the set memberships of a list of OaiRecord: only the
+    memberships which changed are deleted or inserted.
+
+    Args:
+        oai_records_harvester_sets: List of (OaiRecord, list of OaiHarvesterSet) tuples.
+
+    """
+    OaiRecord.reconcile_harvester_sets(oai_records_harvester_sets)
+
+
+def can_upsert_oai_records_on_conflict():
+    """Check if the records can be upserted with INSERT ... ON CONFLICT
+    queries.
+
+    Returns:
+        Yes or No (bool).
+
+    """
+    return OAI_HARVESTER_UPSERT_ON_CONFLICT and uses_postgresql_backend()
+
+
+def upsert_oai_records_on_conflict(oai_records, oai_records_harvester_sets):
+    """Create or update a list of OaiRecord with a single
+    INSERT ... ON CONFLICT query, then reconcile their set memberships. Records
+    inserted concurrently by another worker are updated instead of failing.
+    Post save signals are sent once the records are saved.
+
+    Args:
+        oai_records: List of OaiRecord to create or update, with distinct
+            identifiers.
+        oai_records_harvester_sets: List of (OaiRecord, list of OaiHarvesterSet) tuples.
+
+    Returns:
+        Set of the ids of the created OaiRecord.
+
+    """
+    if not oai_records:
+        return set()
+
+    now = datetime_now()
+    file_field = OaiRecord._meta.get_field("file")
+    for oai_record in oai_records:
+        _prepare_oai_record(oai_record, now)
+        oai_record.creation_date = now
+        # The query does not call pre_save: commit the new file now.
+        file_field.pre_save(oai_record, True)
+
+    try:
+        with transaction.atomic():
+            created_ids = OaiRecord.upsert_all_on_conflict(oai_records)
+            if oai_records_harvester_sets:
+                OaiRecord.reconcile_harvester_sets(oai_records_harvester_sets)
+    except Exception:
+        # The files have been written before the query: do not leave them in
+        # the storage when the records are not saved.
+        _delete_written_files(oai_records)
+        raise
+
+    # Keep the behavior of a regular save for signal receivers (indexing).
+    for oai_record in oai_records:
+        _send_post_save(oai_record, created=oai_record.pk in created_ids)
+
+    return created_ids
+
+
+def _prepare_oai_record(oai_record, now):
+    """Convert an OaiRecord and set the fields usually set by save_object.
+
+    Args:
+        oai_record: OaiRecord to prepare.
+        now: Date of the save.
+
     """
     # Set the title with the OAI identifier.
     oai_record.title = oai_record.identifier
-    oai_record.convert_and_save()
-    return oai_record
+    oai_record.last_change_date = now
+    # Only convert a content set during the harvest. A record deleted
+    # remotely keeps the content already in DB.
+    if oai_record._content:
+        oai_record.convert_to_dict()
+        oai_record.convert_to_file()
+        if CHECKSUM_ALGORITHM:
+            oai_record.checksum = compute_checksum(
+                str(oai_record.content).encode(), CHECKSUM_ALGORITHM
+            )
+
+
+def _delete_written_files(oai_records):
+    """Delete the files written for the new content of a list of OaiRecord
+    which could not be saved. The files of the records without new content
+    are the files already in DB, and are kept.
+
+    Args:
+        oai_records: List of OaiRecord.
+
+    """
+    for oai_record in oai_records:
+        if (
+            oai_record._content
+            and oai_record.file
+            and oai_record.file._committed
+        ):
+            try:
+                oai_record.file.storage.delete(oai_record.file.name)
+            except Exception as exception:
+                logger.warning(
+                    f"Impossible to delete the file {oai_record.file.name}: "
+                    "%s",
+                    str(exception),
+                )
+
+
+def _send_post_save(oai_record, created):
+    """Send the post_save signal of an OaiRecord saved in bulk.
+
+    Args:
+        oai_record: OaiRecord saved.
+        created: True if the OaiRecord has been created.
+
+    """
+    post_save.send(
+        sender=OaiRecord,
+        instance=oai_record,
+        created=created,
+        update_fields=None,
+        raw=False,
+        using=DEFAULT_DB_ALIAS,
+    )
 
 
 def get_oai_record_by_identifier_and_metadata_format(
@@ -35,3 +245,40 @@ def get_oai_record_by_identifier_and_metadata_format(
     return OaiRecord.get_by_identifier_and_metadata_format(
         identifier, harvester_metadata_format
     )
+
+
+def get_oai_record_harvest_digests_by_identifiers_and_metadata_format(
+    identifiers, harvester_metadata_format
+):
+    """Get the harvest digests of the OaiRecord matching a list of identifiers
+    for a metadata format.
+
+    Args:
+        identifiers: List of OaiRecord identifiers.
+        harvester_metadata_format: harvester_metadata_format of the OaiRecords.
+
+    Returns:
+        Dict of the harvest digests by identifier.
+
+    """
+    return OaiRecord.get_harvest_digests_by_identifiers_and_metadata_format(
+        identifiers, harvester_metadata_format
+    )
+
+
+def get_all_oai_records_by_identifiers_and_metadata_format(
+    identifiers, harvester_metadata_format
+):
+    """Get all OaiRecord matching a list of identifiers for a metadata format.
+
+    Args:
+        identifiers: List of OaiRecord identifiers.
+        harvester_metadata_format: harvester_metadata_format of the OaiRecords.
+
+    Returns:
+        List of OaiRecord.
+
+    """
+    return OaiRecord.get_all_by_identifiers_and_metadata_format(
+        identifiers, harvester_metadata_format
+    )
@@ -9,7 +9,10 @@ from django.db.models.signals import post_save, post_delete
 from itertools import chain
 
 from core_main_app.commons.exceptions import DoesNotExist
-from core_oaipmh_harvester_app.settings import WATCH_REGISTRY_HARVEST_RATE
+from core_oaipmh_harvester_app.settings import (
+    WATCH_REGISTRY_HARVEST_RATE,
+    OAI_HARVESTER_SCHEDULE_BATCH_SIZE,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -35,17 +38,7 @@ def init_mongo_indexing():
 
 def init_harvest():
     """Init harvest process."""
-    from core_oaipmh_harvester_app.components.oai_registry import (
-        api as oai_registry_api,
-    )
-
     try:
-        # Init all registry is_queued to False in case of a server reboot after an issue.
-        registries = oai_registry_api.get_all_activated_registry()
-        for registry in registries:
-            registry.is_queued = False
-            oai_registry_api.upsert(registry)
-
         # Watch Registries
         watch_registry_harvest_task.apply_async()
     except Exception as exc:
@@ -54,27 +47,29 @@ def init_harvest():
 
 @shared_task(name="watch_registry_harvest_task")
 def watch_registry_harvest_task():
-    """Check each WATCH_REGISTRY_HARVEST_RATE seconds if new registries need
+    """Check each WATCH_REGISTRY_HARVEST_RATE seconds which registries are due
     to be harvested."""
+    from core_oaipmh_harvester_app.components.oai_harvest_metrics import (
+        api as oai_harvest_metrics_api,
+    )
     from core_oaipmh_harvester_app.components.oai_registry import (
         api as oai_registry_api,
     )
 
     try:
         logger.info("START watching registries.")
-        registries = oai_registry_api.get_all_activated_registry()
+        # Claim a batch of due registries and schedule their next harvest
+        registry_ids = oai_registry_api.claim_registries_due_for_harvest(
+            OAI_HARVESTER_SCHEDULE_BATCH_SIZE
+        )
         # We launch the background task for each registry
-        for registry in registries:
-            # If we need to harvest and a task doesn't already exist for this
-            # registry.
-            if registry.harvest and not registry.is_queued:
-                harvest_task.apply_async((str(registry.id),))
-                registry.is_queued = True
-                oai_registry_api.upsert(registry)
-                logger.info(
-                    f"Registry {registry.name} has been queued and will be "
-                    "harvested."
-                )
+        for registry_id in registry_ids:
+            harvest_task.apply_async((str(registry_id),))
+            oai_harvest_metrics_api.add(registry_id, {"harvests_queued": 1})
+            logger.info(
+                f"Registry {registry_id} has been queued and will be "
+                "harvested."
+            )
         logger.info("FINISH watching registries.")
     except Exception as exception:
         logger.error(
@@ -90,8 +85,8 @@ def watch_registry_harvest_task():
 
 @shared_task(name="harvest_task")
 def harvest_task(registry_id):
-    """Manage the harvest process of the given registry. Check if the harvest
-    should continue.
+    """Harvest the given registry, if it is activated and has to be harvested.
+    The next harvest is scheduled by watch_registry_harvest_task.
 
     Args:
         registry_id: Registry id.
@@ -106,7 +101,9 @@ def harvest_task(registry_id):
         if registry.is_activated and registry.harvest:
             _harvest_registry(registry)
         else:  # Registry should not be harvested
-            _stop_harvest_registry(registry)
+            logger.info(
+                f"Harvesting for Registry {registry.name} has been deactivated."
+            )
     except DoesNotExist:
         logger.error(
             f"ERROR: Registry {registry_id} does not exist anymore. "
@@ -115,8 +112,9 @@ def harvest_task(registry_id):
 
 
 def _harvest_registry(registry):
-    """Harvest the given registry and schedule the next run based on the registry configuration.
-    1st: Update the registry information (Name, metadata formats, sets ..).
+    """Harvest the given registry.
+    1st: Update the registry information (Name, metadata formats, sets ..), if
+    it changed.
     2nd: Harvest records.
 
     Args:
@@ -130,7 +128,7 @@ def _harvest_registry(registry):
     try:
         logger.info(f"START harvesting registry: {registry.name}")
         if not registry.is_updating and not registry.is_harvesting:
-            oai_registry_api.update_registry_info(registry)
+            oai_registry_api.refresh_registry_info(registry)
             oai_registry_api.harvest_registry(registry)
         else:
             logger.warning(
@@ -142,17 +140,19 @@ def _harvest_registry(registry):
             f"ERROR : Impossible to harvest registry {registry.name}: %s",
             str(exception),
         )
-    finally:
-        # Harvest again in harvest_rate seconds.
-        harvest_task.apply_async(
-            (str(registry.id),), countdown=registry.harvest_rate
-        )
 
 
-def _stop_harvest_registry(registry):
-    """Stop the harvest process for the given registry.
+@shared_task(bind=True, name="purge_registry_task")
+def purge_registry_task(self, registry_id):
+    """Delete the given registry and its records by batches. The progress is
+    reported in the state of the task. The task is retried later if the
+    registry is being harvested.
+
     Args:
-        registry: Registry to stop harvest process.
+        registry_id: Registry id.
+
+    Returns:
+        Dict of the number of deleted records.
 
     """
     from core_oaipmh_harvester_app.components.oai_registry import (
@@ -160,17 +160,39 @@ def _stop_harvest_registry(registry):
     )
 
     try:
-        registry.is_queued = False
-        oai_registry_api.upsert(registry)
+        registry = oai_registry_api.get_by_id(registry_id)
+    except DoesNotExist:
+        logger.warning(f"Registry {registry_id} does not exist anymore.")
+        return {"deleted": 0}
+
+    def report_progress(deleted, total):
+        """Report the progress of the purge.
+
+        Args:
+            deleted: Number of deleted records.
+            total: Number of records to delete.
+
+        """
         logger.info(
-            f"Harvesting for Registry {registry.name} has been deactivated."
+            f"Registry {registry_id}: {deleted}/{total} records deleted."
         )
-    except Exception as exception:
-        logger.error(
-            f"ERROR : Error while stopping the harvest process for the registry "
-            f"{registry.name}: %s",
-            str(exception),
+        if self.request.id:
+            self.update_state(
+                state="PROGRESS", meta={"deleted": deleted, "total": total}
+            )
+
+    logger.info(f"START purging registry: {registry.name}")
+    deleted = oai_registry_api.purge(registry, report_progress)
+    if deleted is None:
+        logger.info(
+            f"Registry {registry.name} is being harvested or updated. "
+            "Purge postponed."
+        )
+        raise self.retry(
+            countdown=WATCH_REGISTRY_HARVEST_RATE, max_retries=None
         )
+    logger.info(f"FINISH purging registry: {registry.name}")
+    return {"deleted": deleted}
 
 
 def revoke_all_scheduled_tasks():
@@ -252,6 +274,22 @@ def index_mongo_oai_record(oai_record_id):
         )
 
 
+@shared_task
+def index_mongo_oai_records(oai_record_ids, dict_contents=None):
+    """Index a batch of OaiRecord in MongoDB"""
+    try:
+        from core_oaipmh_harvester_app.components.mongo.models import (
+            MongoOaiRecord,
+        )
+
+        MongoOaiRecord.bulk_index(oai_record_ids, dict_contents)
+    except Exception as exception:
+        logger.error(
+            "ERROR : An error occurred while indexing oai records : %s",
+            str(exception),
+        )
+
+
 @shared_task
 def delete_mongo_oai_record(oai_record_id):
     """Delete Oai Record in MongoDB"""
@@ -0,0 +1,207 @@
+""" Export operations stream the harvested records as NDJSON, as a tar of xml
+files or as a single xml document, a chunk at a time.
+"""
+
+import io
+import json
+import re
+import tarfile
+from urllib.parse import quote
+from xml.sax.saxutils import quoteattr
+
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_EXPORT_CHUNK_SIZE
+
+NDJSON = "ndjson"
+TAR = "tar"
+XML = "xml"
+
+EXPORT_CONTENT_TYPES = {
+    NDJSON: "application/x-ndjson",
+    TAR: "application/x-tar",
+    XML: "application/xml",
+}
+""" Content type of each export format """
+
+_XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>\s*")
+
+
+def export_records(oai_records, export_format):
+    """Export records. The records are read from the database by chunks, so
+    that the memory used does not depend on the number of records.
+
+    Args:
+        oai_records: List of OaiRecord.
+        export_format: Export format, one of EXPORT_CONTENT_TYPES.
+
+    Returns:
+        Iterator of bytes.
+
+    Raises:
+        ValueError: The export format is not supported.
+
+    """
+    exporters = {
+        NDJSON: _export_ndjson,
+        TAR: _export_tar,
+        XML: _export_xml,
+    }
+    if export_format not in exporters:
+        raise ValueError(
+            f"Export format {export_format} is not supported. Supported "
+            f"formats: {', '.join(exporters)}."
+        )
+    if hasattr(oai_records, "iterator"):
+        oai_records = oai_records.iterator(
+            chunk_size=OAI_HARVESTER_EXPORT_CHUNK_SIZE
+        )
+    return exporters[export_format](oai_records)
+
+
+def record_to_dict(oai_record):
+    """Return the dict exported for a record.
+
+    Args:
+        oai_record: OaiRecord instance.
+
+    Returns:
+        Dict.
+
+    """
+    return {
+        "identifier": oai_record.identifier,
+        "metadata_prefix": (
+            oai_record.harvester_metadata_format.metadata_prefix
+        ),
+        "sets": [
+            harvester_set.set_spec
+            for harvester_set in oai_record.harvester_sets.all()
+        ],
+        "last_modification_date": (
+            oai_record.last_modification_date.isoformat()
+            if oai_record.last_modification_date
+            else None
+        ),
+        "xml_content": oai_record.xml_content,
+    }
+
+
+def get_file_name(oai_record):
+    """Return the name of the file of a record in a tar export.
+
+    Args:
+        oai_record: OaiRecord instance.
+
+    Returns:
+        File name.
+
+    """
+    # The identifier is quoted, so that it can not escape the directory of
+    # its metadata format, and two identifiers never give the same name.
+    return (
+        f"{quote(oai_record.harvester_metadata_format.metadata_prefix, safe='')}/"
+        f"{quote(oai_record.identifier, safe='')}.xml"
+    )
+
+
+def _export_ndjson(oai_records):
+    """Export records as NDJSON, one record per line.
+
+    Args:
+        oai_records: Iterator of OaiRecord.
+
+    Returns:
+        Iterator of bytes.
+
+    """
+    for oai_record in oai_records:
+        yield (json.dumps(record_to_dict(oai_record)) + "\n").encode("utf-8")
+
+
+class _TarStream(io.RawIOBase):
+    """Write-only file buffering the output of a tar archive, until it is
+    read by the export."""
+
+    def __init__(self):
+        """Initialize the stream."""
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        """The stream is writable.
+
+        Returns:
+            True.
+
+        """
+        return True
+
+    def write(self, data):
+        """Buffer bytes.
+
+        Args:
+            data: Bytes.
+
+        Returns:
+            Number of bytes written.
+
+        """
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        """Return the bytes written since the last call.
+
+        Returns:
+            Bytes.
+
+        """
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _export_tar(oai_records):
+    """Export records as a tar archive, one xml file per record.
+
+    Args:
+        oai_records: Iterator of OaiRecord.
+
+    Returns:
+        Iterator of bytes.
+
+    """
+    stream = _TarStream()
+    with tarfile.open(fileobj=stream, mode="w|") as archive:
+        for oai_record in oai_records:
+            content = (oai_record.xml_content or "").encode("utf-8")
+            tar_info = tarfile.TarInfo(get_file_name(oai_record))
+            tar_info.size = len(content)
+            if oai_record.last_modification_date:
+                tar_info.mtime = oai_record.last_modification_date.timestamp()
+            archive.addfile(tar_info, io.BytesIO(content))
+            data = stream.pop()
+            if data:
+                yield data
+    yield stream.pop()
+
+
+def _export_xml(oai_records):
+    """Export records as a single xml document.
+
+    Args:
+        oai_records: Iterator of OaiRecord.
+
+    Returns:
+        Iterator of bytes.
+
+    """
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n<records>\n'
+    for oai_record in oai_records:
+        yield (
+            f"<record identifier={quoteattr(oai_record.identifier)} "
+            "metadataPrefix="
+            f"{quoteattr(oai_record.harvester_metadata_format.metadata_prefix)}>"
+            f"{_XML_DECLARATION.sub('', oai_record.xml_content or '')}"
+            "</record>\n"
+        ).encode("utf-8")
+    yield b"</records>\n"
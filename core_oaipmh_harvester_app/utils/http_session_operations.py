@@ -0,0 +1,244 @@
+""" HTTP session operations provide a process-wide pool of HTTP sessions, one
+per host, so that connections are kept alive between requests.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core_oaipmh_harvester_app.settings import (
+    SSL_CERTIFICATES_DIR,
+    OAI_HARVESTER_HTTP_POOL_MAXSIZE,
+    OAI_HARVESTER_MAX_RETRIES,
+    OAI_HARVESTER_RETRY_BACKOFF,
+    OAI_HARVESTER_MAX_RETRY_DELAY,
+)
+from core_oaipmh_harvester_app.utils import rate_limit_operations
+
+logger = logging.getLogger(__name__)
+
+# Content codings accepted from the hosts: the xml responses compress well.
+# The responses are decoded while they are streamed.
+ACCEPT_ENCODING = "gzip, deflate"
+
+# Statuses of the responses sent when a host is overloaded or unavailable
+RETRY_STATUSES = (429, 502, 503, 504)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _create_session():
+    """Create an HTTP session.
+
+    Returns:
+        requests.Session instance.
+
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=OAI_HARVESTER_HTTP_POOL_MAXSIZE
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    # Do not share cookies between the callers of the session
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session(url):
+    """Get the HTTP session of the host of an url.
+
+    Args:
+        url: Url.
+
+    Returns:
+        requests.Session instance.
+
+    """
+    url_parts = urlsplit(url)
+    host = (url_parts.scheme, url_parts.netloc)
+    session = _sessions.get(host)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = _create_session()
+                _sessions[host] = session
+    return session
+
+
+def clear_sessions():
+    """Close and remove all the HTTP sessions."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _reset_sessions_after_fork():
+    """Forget the sessions inherited from the parent process: their
+    connections can not be shared with a child process.
+    """
+    global _sessions_lock
+    _sessions_lock = threading.Lock()
+    _sessions.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_sessions_after_fork)
+
+
+def _get_backoff_delay(attempt):
+    """Return the delay before a retry, when the host does not give one.
+
+    Args:
+        attempt: Number of the failed attempt, starting at 0.
+
+    Returns:
+        Delay in seconds.
+
+    """
+    delay = OAI_HARVESTER_RETRY_BACKOFF * 2**attempt
+    # Randomize the delay so that the workers do not retry all at once
+    return min(delay * random.uniform(0.5, 1.5), OAI_HARVESTER_MAX_RETRY_DELAY)
+
+
+def _wait_before_retry(limiter, delay):
+    """Wait before the retry of a request. The host is paused for all the
+    requests of the process if it is rate limited.
+
+    Args:
+        limiter: HostRateLimiter instance of the host, None if not limited.
+        delay: Delay in seconds.
+
+    """
+    if limiter is not None:
+        limiter.on_error(retry_after=delay)
+    else:
+        time.sleep(delay)
+
+
+def send_get_request(url, params=None, **kwargs):
+    """Send a GET request with the HTTP session of the host. The requests
+    sent to a host are rate limited, and retried with a backoff on connection
+    errors and when the host is overloaded or unavailable.
+
+    Args:
+        url: Url.
+        params: Dict of query parameters.
+        **kwargs: Arguments of requests.
+
+    Returns:
+        requests.Response.
+
+    Raises:
+        requests.ConnectionError: The host can not be reached.
+        requests.Timeout: The host did not answer in time.
+
+    """
+    if "verify" not in kwargs:
+        kwargs["verify"] = SSL_CERTIFICATES_DIR
+    session = get_session(url)
+    limiter = rate_limit_operations.get_limiter(url)
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        start = time.monotonic()
+        try:
+            response = session.get(url, params=params, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as exception:
+            if attempt >= OAI_HARVESTER_MAX_RETRIES:
+                if limiter is not None:
+                    limiter.on_error()
+                raise
+            delay = _get_backoff_delay(attempt)
+            logger.warning(
+                f"Request to {url} failed, retrying in {delay:.1f}s: %s",
+                str(exception),
+            )
+            _wait_before_retry(limiter, delay)
+            attempt += 1
+            continue
+
+        if response.status_code not in RETRY_STATUSES:
+            if limiter is not None:
+                limiter.on_success(
+                    time.monotonic() - start,
+                    kind=params.get("verb") if params else None,
+                )
+            return response
+
+        retry_after = rate_limit_operations.parse_retry_after(
+            response.headers.get("Retry-After")
+        )
+        if (
+            attempt >= OAI_HARVESTER_MAX_RETRIES
+            or retry_after is not None
+            and retry_after > OAI_HARVESTER_MAX_RETRY_DELAY
+        ):
+            if limiter is not None:
+                limiter.on_error(
+                    retry_after=retry_after
+                    and min(retry_after, OAI_HARVESTER_MAX_RETRY_DELAY)
+                )
+            return response
+
+        delay = (
+            retry_after
+            if retry_after is not None
+            else _get_backoff_delay(attempt)
+        )
+        logger.warning(
+            f"{url} answered {response.status_code}, retrying in {delay:.1f}s."
+        )
+        response.close()
+        _wait_before_retry(limiter, delay)
+        attempt += 1
+
+
+def get_validators(response):
+    """Get the validators of a response, to send conditional requests for the
+    same resource later.
+
+    Args:
+        response: requests.Response.
+
+    Returns:
+        Dict of the ETag and the Last-Modified date sent by the host, if any.
+
+    """
+    validators = {}
+    if response.headers.get("ETag"):
+        validators["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        validators["last_modified"] = response.headers["Last-Modified"]
+    return validators
+
+
+def get_conditional_headers(validators):
+    """Get the headers of a conditional request, answered with a 304 status
+    if the resource did not change since the validators were received.
+
+    Args:
+        validators: Dict of the validators of the last response.
+
+    Returns:
+        Dict of headers.
+
+    """
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
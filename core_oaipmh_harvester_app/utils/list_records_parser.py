@@ -0,0 +1,265 @@
+""" List records parser provides a streaming parser for ListRecords responses.
+"""
+
+from lxml import etree
+from rest_framework import status
+
+from core_main_app.settings import (
+    SEARCHABLE_DATA_OCCURRENCES_LIMIT,
+    XML_POST_PROCESSOR,
+    XML_FORCE_LIST,
+)
+from core_oaipmh_common_app.commons import exceptions as oai_pmh_exceptions
+from core_oaipmh_harvester_app.utils.xml_dict_operations import (
+    element_to_dict,
+)
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+OAI_NAMESPACE = "{http://www.openarchives.org/OAI/2.0/}"
+RECORD_TAG = OAI_NAMESPACE + "record"
+RESUMPTION_TOKEN_TAG = OAI_NAMESPACE + "resumptionToken"
+ERROR_TAG = OAI_NAMESPACE + "error"
+NO_RECORDS_MATCH = "noRecordsMatch"
+BAD_RESUMPTION_TOKEN = "badResumptionToken"
+
+
+class ListRecordsParser:
+    """Parse a ListRecords response in a single pass. The response is read
+    chunk by chunk while it is downloaded. The records keep their parsed
+    elements, so that their metadata is converted to a dict only if they are
+    stored.
+    """
+
+    def __init__(self, metadata_prefix):
+        """Init the parser.
+
+        Args:
+            metadata_prefix: Metadata Prefix of the records.
+        """
+        self.metadata_prefix = metadata_prefix
+        self.resumption_token = None
+        self.cursor = None
+        self.complete_list_size = None
+        self.expiration_date = None
+        self.error_code = None
+        self.error_message = None
+        self._pull_parser = etree.XMLPullParser(
+            events=("end",),
+            tag=(RECORD_TAG, RESUMPTION_TOKEN_TAG, ERROR_TAG),
+            remove_blank_text=True,
+            resolve_entities=False,
+            huge_tree=True,
+        )
+
+    def parse(self, chunks):
+        """Parse the response and yield each record. The resumption token is
+        available once all records have been consumed.
+
+        Args:
+            chunks: Iterable of bytes chunks of the response body.
+
+        Returns:
+            Generator of representations of Oai-Pmh record objects.
+
+        """
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+    def feed(self, chunk):
+        """Feed a chunk of the response and get the records it completes.
+
+        Args:
+            chunk: Bytes chunk of the response body.
+
+        Returns:
+            Generator of representations of Oai-Pmh record objects.
+
+        """
+        self._pull_parser.feed(chunk)
+        return self._read_events()
+
+    def close(self):
+        """Terminate the parsing of the response.
+
+        Returns:
+            Generator of the remaining Oai-Pmh record objects.
+
+        """
+        self._pull_parser.close()
+        return self._read_events()
+
+    def check_error(self):
+        """Check that the response is not an Oai-Pmh error. An empty list of
+        records is not an error.
+
+        Raises:
+            OAIAPILabelledException: The Data Provider returned an Oai-Pmh
+                error.
+
+        """
+        if self.error_code is None or self.error_code == NO_RECORDS_MATCH:
+            return
+        raise oai_pmh_exceptions.OAIAPILabelledException(
+            message=f"{self.error_code}: {self.error_message}",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    def get_resumption_info(self):
+        """Get the resumption token of the response and its attributes.
+
+        Returns:
+            Dict of the resumption token, cursor, complete list size and
+            expiration date.
+
+        """
+        return {
+            "resumption_token": self.resumption_token,
+            "cursor": self.cursor,
+            "complete_list_size": self.complete_list_size,
+            "expiration_date": self.expiration_date,
+        }
+
+    def _read_events(self):
+        """Convert the elements closed since the last call.
+
+        Returns:
+            Generator of representations of Oai-Pmh record objects.
+
+        """
+        for _, element in self._pull_parser.read_events():
+            if element.tag == RECORD_TAG:
+                # The element is kept with the record to convert it later
+                yield get_record_dict(element, self.metadata_prefix)
+                continue
+            if element.tag == RESUMPTION_TOKEN_TAG:
+                self.resumption_token = (element.text or "").strip(" \t\r\n")
+                self.cursor = _get_int_attribute(element, "cursor")
+                self.complete_list_size = _get_int_attribute(
+                    element, "completeListSize"
+                )
+                self.expiration_date = element.get("expirationDate")
+            else:
+                self.error_code = element.get("code", "UNKNOWN")
+                self.error_message = element.text or ""
+            element.clear(keep_tail=True)
+
+
+def _get_int_attribute(element, name):
+    """Get an integer attribute of an element.
+
+    Args:
+        element: XML element.
+        name: Name of the attribute.
+
+    Returns:
+        Value of the attribute, None if missing or not an integer.
+
+    """
+    try:
+        return int(element.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_record(raw, metadata_prefix):
+    """Parse the raw XML of a single Oai-Pmh record.
+
+    Args:
+        raw: Raw XML of the record, as given by get_raw.
+        metadata_prefix: Metadata Prefix of the record.
+
+    Returns:
+        Representation of an Oai-Pmh record object.
+
+    """
+    parser = etree.XMLParser(
+        remove_blank_text=True, resolve_entities=False, huge_tree=True
+    )
+    return get_record_dict(
+        etree.fromstring(raw.encode("utf-8"), parser), metadata_prefix
+    )
+
+
+def get_record_dict(record_elt, metadata_prefix):
+    """Get the representation of an Oai-Pmh record from its xml element.
+
+    Args:
+        record_elt: XML element of the record.
+        metadata_prefix: Metadata Prefix
+
+    Returns:
+        Representation of an Oai-Pmh record object. The parsed element is
+        kept to convert the metadata to a dict if the record is stored, and
+        to serialize the record if it is quarantined.
+
+    """
+    header_elt = record_elt.find(OAI_NAMESPACE + "header")
+    deleted = header_elt.get("status") == "deleted"
+    metadata_elt = (
+        record_elt.find(OAI_NAMESPACE + "metadata/*") if not deleted else None
+    )
+    return {
+        "identifier": header_elt.findtext(OAI_NAMESPACE + "identifier"),
+        "datestamp": header_elt.findtext(OAI_NAMESPACE + "datestamp"),
+        "deleted": deleted,
+        "sets": [
+            set_spec_elt.text
+            for set_spec_elt in header_elt.iterfind(OAI_NAMESPACE + "setSpec")
+        ],
+        "metadataPrefix": metadata_prefix,
+        "metadata": (
+            XSDTree.tostring(metadata_elt)
+            if metadata_elt is not None
+            else None
+        ),
+        "element": record_elt,
+    }
+
+
+def get_raw(record):
+    """Get the raw XML of a record. The parsed element is only serialized when
+    the raw XML is needed.
+
+    Args:
+        record: Representation of an Oai-Pmh record object.
+
+    Returns:
+        Raw XML of the record.
+
+    """
+    if "raw" not in record:
+        record["raw"] = etree.tounicode(record["element"])
+    return record["raw"]
+
+
+def get_dict_content(record):
+    """Get the metadata of a record as a dict. The metadata is converted from
+    the parsed element on the first call only.
+
+    Args:
+        record: Representation of an Oai-Pmh record object.
+
+    Returns:
+        Dict content, None if the record has no metadata or was not parsed by
+        ListRecordsParser.
+
+    """
+    if "dict_content" not in record:
+        record_elt = record.get("element")
+        metadata_elt = (
+            record_elt.find(OAI_NAMESPACE + "metadata/*")
+            if record_elt is not None and not record["deleted"]
+            else None
+        )
+        record["dict_content"] = (
+            element_to_dict(
+                metadata_elt,
+                postprocessor=XML_POST_PROCESSOR,
+                force_list=XML_FORCE_LIST,
+                list_limit=SEARCHABLE_DATA_OCCURRENCES_LIMIT,
+            )
+            if metadata_elt is not None
+            else None
+        )
+    return record["dict_content"]
@@ -0,0 +1,66 @@
+""" Prefetch operations provide tools to produce items in a background thread
+while they are consumed.
+"""
+
+import queue
+import threading
+
+_END_OF_ITEMS = object()
+
+
+class _ProducerError:
+    """Wrap an exception raised by the producer thread"""
+
+    def __init__(self, exception):
+        self.exception = exception
+
+
+def prefetch(iterable, queue_size, name=None):
+    """Iterate over an iterable consumed ahead in a background thread. At most
+    queue_size items are produced in advance: the producer waits for the
+    consumer when the queue is full.
+
+    Args:
+        iterable: Iterable to prefetch.
+        queue_size: Maximum number of items produced in advance.
+        name: Name of the producer thread.
+
+    Returns:
+        Generator of the items of the iterable.
+
+    """
+    item_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+
+    def _put(item):
+        # Stop waiting for a free slot if the consumer is gone.
+        while not stop_event.is_set():
+            try:
+                item_queue.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        try:
+            for item in iterable:
+                if not _put(item):
+                    return
+        except Exception as exception:
+            _put(_ProducerError(exception))
+        finally:
+            _put(_END_OF_ITEMS)
+
+    producer = threading.Thread(target=_produce, name=name, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = item_queue.get()
+            if item is _END_OF_ITEMS:
+                return
+            if isinstance(item, _ProducerError):
+                raise item.exception
+            yield item
+    finally:
+        stop_event.set()
@@ -0,0 +1,223 @@
+""" Rate limit operations provide a process-wide adaptive rate limiter per host,
+so that the requests sent to a Data Provider do not overload it.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from core_oaipmh_harvester_app.settings import (
+    OAI_HARVESTER_RATE_LIMIT,
+    OAI_HARVESTER_RATE_LIMIT_MIN,
+    OAI_HARVESTER_RATE_LIMIT_LATENCY_FACTOR,
+)
+
+# Requests per second added to the rate after each fast response
+RATE_INCREASE = 0.1
+# Factor applied to the rate when the Data Provider is slow
+LATENCY_DECREASE_FACTOR = 0.75
+# Factor applied to the rate when the Data Provider fails or throttles
+ERROR_DECREASE_FACTOR = 0.5
+# Weight of the last latency in the moving average
+LATENCY_SMOOTHING = 0.2
+# Weight of the average latency in the lowest average latency, so that a
+# latency seen once does not stay the reference forever
+BASELINE_DECAY = 0.01
+# Average latency in seconds under which a host is never considered overloaded
+MIN_OVERLOAD_LATENCY = 0.1
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class HostRateLimiter:
+    """Token bucket limiting the requests sent to a host. The rate increases
+    additively while the host answers quickly, and decreases multiplicatively
+    when it slows down, fails or asks the harvester to wait. The latencies
+    are compared by kind of request: the verbs of a Data Provider do not
+    answer in the same time."""
+
+    def __init__(self, max_rate, min_rate, latency_factor):
+        """Initialize the rate limiter.
+
+        Args:
+            max_rate: Maximum number of requests per second.
+            min_rate: Minimum number of requests per second.
+            latency_factor: Ratio between the average latency and the lowest
+                average latency of a kind of request above which the host is
+                considered overloaded.
+
+        """
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.latency_factor = latency_factor
+        self.rate = max_rate
+        self.tokens = max(max_rate, 1.0)
+        # Average and lowest average latencies by kind of request
+        self.latencies = {}
+        self.blocked_until = 0.0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        """Add the tokens earned since the last refill.
+
+        Args:
+            now: Monotonic time.
+
+        """
+        self.tokens = min(
+            self.tokens + (now - self._updated_at) * self.rate,
+            max(self.rate, 1.0),
+        )
+        self._updated_at = now
+
+    def acquire(self):
+        """Wait until a request can be sent to the host."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self, latency, kind=None):
+        """Adapt the rate to the latency of a successful request.
+
+        Args:
+            latency: Duration of the request in seconds.
+            kind: Kind of request, e.g. the Oai-Pmh verb.
+
+        """
+        with self._lock:
+            average_latency, baseline_latency = self.latencies.get(
+                kind, (None, None)
+            )
+            if average_latency is None:
+                average_latency = latency
+            else:
+                average_latency += LATENCY_SMOOTHING * (
+                    latency - average_latency
+                )
+            if baseline_latency is None or average_latency < baseline_latency:
+                baseline_latency = average_latency
+            else:
+                baseline_latency += BASELINE_DECAY * (
+                    average_latency - baseline_latency
+                )
+            self.latencies[kind] = (average_latency, baseline_latency)
+
+            if average_latency > max(
+                self.latency_factor * baseline_latency,
+                MIN_OVERLOAD_LATENCY,
+            ):
+                self._decrease(LATENCY_DECREASE_FACTOR)
+            else:
+                self.rate = min(self.rate + RATE_INCREASE, self.max_rate)
+
+    def on_error(self, retry_after=None):
+        """Slow down after a failed or throttled request.
+
+        Args:
+            retry_after: Delay in seconds requested by the host before the
+                next request, if any.
+
+        """
+        with self._lock:
+            self._decrease(ERROR_DECREASE_FACTOR)
+            if retry_after:
+                self.tokens = 0.0
+                self.blocked_until = max(
+                    self.blocked_until, time.monotonic() + retry_after
+                )
+
+    def _decrease(self, factor):
+        """Decrease the rate.
+
+        Args:
+            factor: Factor applied to the rate.
+
+        """
+        self.rate = max(self.rate * factor, self.min_rate)
+        self.tokens = min(self.tokens, max(self.rate, 1.0))
+
+
+def get_limiter(url):
+    """Get the rate limiter of the host of an url.
+
+    Args:
+        url: Url.
+
+    Returns:
+        HostRateLimiter instance, None if the requests are not limited.
+
+    """
+    if not OAI_HARVESTER_RATE_LIMIT:
+        return None
+
+    url_parts = urlsplit(url)
+    host = (url_parts.scheme, url_parts.netloc)
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(host)
+            if limiter is None:
+                limiter = HostRateLimiter(
+                    OAI_HARVESTER_RATE_LIMIT,
+                    OAI_HARVESTER_RATE_LIMIT_MIN,
+                    OAI_HARVESTER_RATE_LIMIT_LATENCY_FACTOR,
+                )
+                _limiters[host] = limiter
+    return limiter
+
+
+def clear_limiters():
+    """Remove all the rate limiters."""
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def _reset_limiters_after_fork():
+    """Forget the rate limiters inherited from the parent process: their locks
+    can not be shared with a child process.
+    """
+    global _limiters_lock
+    _limiters_lock = threading.Lock()
+    _limiters.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_limiters_after_fork)
+
+
+def parse_retry_after(value):
+    """Parse the value of a Retry-After header.
+
+    Args:
+        value: Delay in seconds or HTTP date.
+
+    Returns:
+        Delay in seconds, None if the value is missing or invalid.
+
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_date is None or retry_date.tzinfo is None:
+        return None
+    return max((retry_date - datetime.now(timezone.utc)).total_seconds(), 0.0)
@@ -8,10 +8,36 @@ from sickle.oaiexceptions import NoSetHierarchy, NoMetadataFormat
 
 from core_oaipmh_common_app.commons.messages import OaiPmhMessage
 from core_oaipmh_harvester_app.settings import SSL_CERTIFICATES_DIR
-from core_oaipmh_harvester_app.utils import sickle_serializers
+from core_oaipmh_harvester_app.utils import (
+    http_session_operations,
+    sickle_serializers,
+)
 from xml_utils.xsd_tree.xsd_tree import XSDTree
 
 
+class PooledSickle(Sickle):
+    """Sickle client sending its requests with the HTTP session of the
+    Data Provider host. GET requests are rate limited and retried like the
+    other requests sent to the host.
+    """
+
+    def _request(self, kwargs):
+        """Send a request to the Data Provider.
+
+        Args:
+            kwargs: Oai-Pmh parameters.
+
+        Returns:
+            requests.Response.
+        """
+        if self.http_method == "GET":
+            return http_session_operations.send_get_request(
+                self.endpoint, params=kwargs, **self.request_args
+            )
+        session = http_session_operations.get_session(self.endpoint)
+        return session.post(self.endpoint, data=kwargs, **self.request_args)
+
+
 def _sickle_init(url):
     """Initialize Sickle object. Allows for proper HTTPS handling, similar to
     core_main_app request_utils.
@@ -22,7 +48,7 @@ def _sickle_init(url):
     Returns:
         Sickle object
     """
-    return Sickle(url, verify=SSL_CERTIFICATES_DIR)
+    return PooledSickle(url, verify=SSL_CERTIFICATES_DIR)
 
 
 def sickle_identify(url):
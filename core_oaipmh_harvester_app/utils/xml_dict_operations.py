@@ -0,0 +1,116 @@
+""" XML dict operations provide tools to convert parsed XML to dict.
+"""
+
+import xmltodict
+from lxml import etree
+
+from core_main_app.commons import exceptions
+from core_main_app.utils.xml import (
+    XML_POST_PROCESSORS,
+    remove_lists_from_xml_dict,
+)
+
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+
+
+def element_to_dict(
+    element, postprocessor=None, force_list=None, list_limit=None
+):
+    """Transform an lxml element to dict without serializing and parsing it
+    again. The result is the same as raw_xml_to_dict on the serialized
+    element.
+
+    Args:
+        element: lxml element.
+        postprocessor:
+        force_list:
+        list_limit:
+
+    Returns:
+        Dict representation of the element.
+
+    """
+    if postprocessor:
+        # set postprocessor function if found in the list (XML_POST_PROCESSORS)
+        postprocessor = XML_POST_PROCESSORS.get(postprocessor, postprocessor)
+        # check if postprocessor is callable
+        if not callable(postprocessor):
+            raise exceptions.CoreError("postprocessor is not callable")
+
+    # Send the events expat would send to xmltodict for the serialized
+    # element.
+    handler = xmltodict._DictSAXHandler(
+        postprocessor=postprocessor, force_list=force_list
+    )
+    _send_element_events(handler, element, parent_nsmap={})
+    dict_raw = handler.item
+    if list_limit:
+        # Remove lists which size exceed the limit size
+        remove_lists_from_xml_dict(dict_raw, list_limit)
+    return dict_raw
+
+
+def _send_element_events(handler, element, parent_nsmap):
+    """Send the SAX events of an element and its descendants.
+
+    Args:
+        handler: xmltodict SAX handler.
+        element: lxml element.
+        parent_nsmap: Namespaces declared in the scope of the parent.
+
+    """
+    nsmap = element.nsmap
+    attributes = []
+    # Namespace declarations are regular attributes for a parser without
+    # namespace processing.
+    for prefix, uri in nsmap.items():
+        if prefix in parent_nsmap and parent_nsmap[prefix] == uri:
+            continue
+        attributes.append("xmlns:" + prefix if prefix else "xmlns")
+        attributes.append(uri)
+    for name, value in element.attrib.items():
+        attributes.append(_get_qualified_name(etree.QName(name), nsmap))
+        attributes.append(value)
+
+    name = _get_qualified_name(etree.QName(element), nsmap, element.prefix)
+    handler.startElement(name, attributes)
+    if element.text:
+        handler.characters(element.text)
+    for child in element:
+        # Comments, processing instructions and entities are ignored by
+        # xmltodict, but not the text following them.
+        if isinstance(child.tag, str):
+            _send_element_events(handler, child, nsmap)
+        if child.tail:
+            handler.characters(child.tail)
+    handler.endElement(name)
+
+
+def _get_qualified_name(qname, nsmap, prefix=None):
+    """Get the name of a node as written in the XML document.
+
+    Args:
+        qname: QName of the node.
+        nsmap: Namespaces declared in the scope of the node.
+        prefix: Prefix of the node, if known.
+
+    Returns:
+        Qualified name.
+
+    """
+    if qname.namespace is None:
+        return qname.localname
+    if prefix is None:
+        if qname.namespace == XML_NAMESPACE:
+            prefix = "xml"
+        else:
+            # Attributes in a namespace always have a prefix
+            prefix = next(
+                (
+                    key
+                    for key, uri in nsmap.items()
+                    if key and uri == qname.namespace
+                ),
+                None,
+            )
+    return f"{prefix}:{qname.localname}" if prefix else qname.localname
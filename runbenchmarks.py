@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+""" Run benchmarks
+"""
+import argparse
+import json
+import os
+import sys
+
+import django
+from django.core.management import execute_from_command_line
+
+
+def parse_args():
+    """Parse the command line arguments.
+
+    Returns:
+        argparse.Namespace.
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the harvest against a mock Data Provider."
+    )
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--record-size", type=int, default=1024)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--sets", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--deleted-ratio", type=float, default=0.0)
+    parser.add_argument(
+        "--no-token-attributes",
+        action="store_true",
+        help="Omit cursor, completeListSize and expirationDate.",
+    )
+    parser.add_argument(
+        "--no-empty-last-token",
+        action="store_true",
+        help="End the lists without a resumption token.",
+    )
+    parser.add_argument(
+        "--bad-token-after",
+        type=int,
+        default=None,
+        help="Reject the resumption tokens after this number of pages.",
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        help="Scenario to run, all by default. Can be repeated.",
+    )
+    parser.add_argument("--output", help="Write the results to a JSON file.")
+    parser.add_argument(
+        "--baseline", help="JSON results to compare the throughput with."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Ratio of throughput lost accepted against the baseline.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    execute_from_command_line(["", "migrate", "--verbosity", "0"])
+    django.setup()
+
+    from benchmarks import scenarios
+    from benchmarks.provider import MockDataProvider
+
+    provider = MockDataProvider(
+        record_count=args.records,
+        record_size=args.record_size,
+        page_size=args.page_size,
+        set_count=args.sets,
+        latency=args.latency,
+        deleted_ratio=args.deleted_ratio,
+        token_attributes=not args.no_token_attributes,
+        empty_last_token=not args.no_empty_last_token,
+        bad_token_after=args.bad_token_after,
+    )
+    registry = scenarios.create_registry(provider)
+    results = [
+        scenarios.run_scenario(name, provider, registry)
+        for name in args.scenario or scenarios.SCENARIOS
+    ]
+    for result in results:
+        print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = scenarios.compare_to_baseline(
+                results, json.load(file), args.tolerance
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+    sys.exit(bool(regressions))
@@ -0,0 +1,107 @@
+""" Int Test Benchmarks
+"""
+
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+from benchmarks import scenarios
+from benchmarks.provider import MockDataProvider
+from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from tests.components.oai_registry.fixtures.fixtures import OaiPmhFixtures
+
+
+class TestBenchmarkScenarios(IntegrationBaseTestCase):
+    """Test the benchmark scenarios on a small Data Provider"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        # Write the files of the records in a temporary directory
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_root_override = override_settings(MEDIA_ROOT=media_root)
+        media_root_override.enable()
+        self.addCleanup(media_root_override.disable)
+        self.provider = MockDataProvider(
+            record_count=30, record_size=64, page_size=10, set_count=2
+        )
+        self.registry = scenarios.create_registry(self.provider)
+
+    def test_first_harvest_stores_all_records(self):
+        """test_first_harvest_stores_all_records"""
+        # Act
+        result = scenarios.run_scenario(
+            "first_harvest", self.provider, self.registry
+        )
+
+        # Assert
+        self.assertEqual(result["errors"], 0)
+        self.assertEqual(result["records"], 30)
+        self.assertEqual(result["requests"], 3)
+        self.assertGreater(result["queries"], 0)
+        self.assertEqual(
+            OaiRecord.objects.filter(registry=self.registry).count(), 30
+        )
+
+    def test_incremental_harvests_updated_records(self):
+        """test_incremental_harvests_updated_records"""
+        # Arrange
+        scenarios.run_scenario("first_harvest", self.provider, self.registry)
+
+        # Act
+        result = scenarios.run_scenario(
+            "incremental", self.provider, self.registry
+        )
+
+        # Assert
+        self.assertEqual(result["errors"], 0)
+        self.assertEqual(result["records"], 2)
+
+    def test_deletion_heavy_marks_records_deleted(self):
+        """test_deletion_heavy_marks_records_deleted"""
+        # Act
+        result = scenarios.run_scenario(
+            "deletion_heavy", self.provider, self.registry
+        )
+
+        # Assert
+        self.assertEqual(result["errors"], 0)
+        self.assertEqual(
+            OaiRecord.objects.filter(
+                registry=self.registry, deleted=True
+            ).count(),
+            15,
+        )
+
+    def test_expired_token_returns_error(self):
+        """test_expired_token_returns_error"""
+        # Arrange
+        self.provider.bad_token_after = 1
+
+        # Act
+        result = scenarios.run_scenario(
+            "first_harvest", self.provider, self.registry
+        )
+
+        # Assert
+        self.assertEqual(result["errors"], 1)
+        self.assertEqual(result["records"], 20)
+
+    def test_compare_to_baseline_reports_regressions(self):
+        """test_compare_to_baseline_reports_regressions"""
+        # Arrange
+        baseline = [{"scenario": "first_harvest", "records_per_second": 100}]
+        results = [{"scenario": "first_harvest", "records_per_second": 70}]
+
+        # Act
+        regressions = scenarios.compare_to_baseline(results, baseline, 0.2)
+
+        # Assert
+        self.assertEqual(len(regressions), 1)
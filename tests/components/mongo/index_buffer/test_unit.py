@@ -0,0 +1,143 @@
+""" Unit tests for the MongoOaiRecord index buffer
+"""
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from core_oaipmh_harvester_app.components.mongo import index_buffer
+
+
+class TestIndexOaiRecord(TestCase):
+    """Test index_oai_record method"""
+
+    @patch.object(index_buffer, "index_mongo_oai_records")
+    def test_index_without_buffering_sends_task(
+        self, mock_index_mongo_oai_records
+    ):
+        """test_index_without_buffering_sends_task"""
+        # Act
+        index_buffer.index_oai_record(1)
+
+        # Assert
+        mock_index_mongo_oai_records.apply_async.assert_called_once_with(
+            ([1], None)
+        )
+
+    @patch.object(index_buffer, "index_mongo_oai_records")
+    def test_buffered_indexing_sends_one_task_on_exit(
+        self, mock_index_mongo_oai_records
+    ):
+        """test_buffered_indexing_sends_one_task_on_exit"""
+        # Act
+        with index_buffer.buffered_indexing():
+            for oai_record_id in [1, 2, 1, 3]:
+                index_buffer.index_oai_record(oai_record_id)
+            mock_index_mongo_oai_records.apply_async.assert_not_called()
+
+        # Assert
+        mock_index_mongo_oai_records.apply_async.assert_called_once_with(
+            ([1, 2, 3], None)
+        )
+
+    @patch.object(index_buffer, "OAI_HARVESTER_MONGO_INDEX_BATCH_SIZE", 2)
+    @patch.object(index_buffer, "index_mongo_oai_records")
+    def test_buffered_indexing_flushes_full_batches(
+        self, mock_index_mongo_oai_records
+    ):
+        """test_buffered_indexing_flushes_full_batches"""
+        # Act
+        with index_buffer.buffered_indexing():
+            for oai_record_id in range(5):
+                index_buffer.index_oai_record(oai_record_id)
+
+        # Assert
+        self.assertEqual(
+            [
+                call.args[0]
+                for call in mock_index_mongo_oai_records.apply_async.call_args_list
+            ],
+            [([0, 1], None), ([2, 3], None), ([4], None)],
+        )
+
+    @patch.object(index_buffer, "index_mongo_oai_records")
+    def test_buffered_indexing_flushes_on_error(
+        self, mock_index_mongo_oai_records
+    ):
+        """test_buffered_indexing_flushes_on_error"""
+        # Act
+        with self.assertRaises(ValueError):
+            with index_buffer.buffered_indexing():
+                index_buffer.index_oai_record(1)
+                raise ValueError("error")
+
+        # Assert
+        mock_index_mongo_oai_records.apply_async.assert_called_once_with(
+            ([1], None)
+        )
+        index_buffer.index_oai_record(2)
+        mock_index_mongo_oai_records.apply_async.assert_called_with(
+            ([2], None)
+        )
+
+    @patch.object(index_buffer, "index_mongo_oai_records")
+    def test_buffered_indexing_sends_dict_contents(
+        self, mock_index_mongo_oai_records
+    ):
+        """test_buffered_indexing_sends_dict_contents"""
+        # Act
+        with index_buffer.buffered_indexing():
+            index_buffer.index_oai_record(1, {"root": "1"})
+            index_buffer.index_oai_record(2)
+
+        # Assert
+        mock_index_mongo_oai_records.apply_async.assert_called_once_with(
+            ([1, 2], {"1": {"root": "1"}})
+        )
+
+    @patch.object(
+        index_buffer, "OAI_HARVESTER_MONGO_INDEX_MAX_MESSAGE_SIZE", 30
+    )
+    @patch.object(index_buffer, "index_mongo_oai_records")
+    def test_buffered_indexing_flushes_before_message_is_too_large(
+        self, mock_index_mongo_oai_records
+    ):
+        """test_buffered_indexing_flushes_before_message_is_too_large"""
+        # Act
+        with index_buffer.buffered_indexing():
+            # 17 bytes each once serialized
+            for oai_record_id in range(3):
+                index_buffer.index_oai_record(
+                    oai_record_id, {"root": str(oai_record_id) * 5}
+                )
+
+        # Assert
+        self.assertEqual(
+            [
+                call.args[0]
+                for call in mock_index_mongo_oai_records.apply_async.call_args_list
+            ],
+            [
+                ([0], {"0": {"root": "00000"}}),
+                ([1], {"1": {"root": "11111"}}),
+                ([2], {"2": {"root": "22222"}}),
+            ],
+        )
+
+    @patch.object(
+        index_buffer, "OAI_HARVESTER_MONGO_INDEX_MAX_MESSAGE_SIZE", 40
+    )
+    @patch.object(index_buffer, "index_mongo_oai_records")
+    def test_buffered_indexing_does_not_count_records_without_content(
+        self, mock_index_mongo_oai_records
+    ):
+        """test_buffered_indexing_does_not_count_records_without_content"""
+        # Act
+        with index_buffer.buffered_indexing():
+            index_buffer.index_oai_record(1, {"root": "11111"})
+            index_buffer.index_oai_record(2)
+            index_buffer.index_oai_record(3, {"root": "33333"})
+
+        # Assert
+        mock_index_mongo_oai_records.apply_async.assert_called_once_with(
+            ([1, 2, 3], {"1": {"root": "11111"}, "3": {"root": "33333"}})
+        )
@@ -78,6 +78,113 @@ class TestMongoOaiRecordPostDeleteData(TestCase):
         mock_delete_mongo_oai_record.apply_async.assert_called_with((mock_id,))
 
 
+class TestMongoOaiRecordPostSaveData(TestCase):
+    """Test MongoOaiRecord post_save_data method"""
+
+    @patch(
+        "core_oaipmh_harvester_app.components.mongo.models.index_buffer.index_oai_record"
+    )
+    @override_settings(MONGODB_INDEXING=True)
+    @override_settings(MONGODB_ASYNC_SAVE=True)
+    @tag("mongodb")
+    def test_mongo_async_true_uses_index_buffer(self, mock_index_oai_record):
+        """test_mongo_async_true_uses_index_buffer"""
+        from core_oaipmh_harvester_app.components.mongo.models import (
+            MongoOaiRecord,
+        )
+
+        MongoOaiRecord.post_save_data(
+            None, MockObject(id=1, harvested_dict_content=None)
+        )
+        mock_index_oai_record.assert_called_with(1, None)
+
+
+class TestMongoOaiRecordBulkIndex(TestCase):
+    """Test MongoOaiRecord bulk_index method"""
+
+    @patch(
+        "core_oaipmh_harvester_app.components.mongo.models.MongoOaiRecord._get_collection"
+    )
+    @patch.object(OaiRecord, "objects")
+    @override_settings(MONGODB_INDEXING=True)
+    @tag("mongodb")
+    def test_bulk_index_writes_all_records_at_once(
+        self, mock_oai_record_objects, mock_get_collection
+    ):
+        """test_bulk_index_writes_all_records_at_once"""
+        from core_oaipmh_harvester_app.components.mongo.models import (
+            MongoOaiRecord,
+        )
+
+        mock_oai_record_objects.prefetch_related.return_value.in_bulk.return_value = {
+            oai_record_id: MagicMock(
+                id=oai_record_id,
+                xml_content="<tag></tag>",
+                harvester_metadata_format_id=1,
+                registry_id=1,
+            )
+            for oai_record_id in [1, 2]
+        }
+
+        MongoOaiRecord.bulk_index([1, 2])
+
+        operations = mock_get_collection.return_value.bulk_write.call_args[0][
+            0
+        ]
+        self.assertEqual(len(operations), 2)
+        mock_get_collection.return_value.bulk_write.assert_called_once()
+
+
+class TestMongoOaiRecordLoadRelatedData(TestCase):
+    """Test MongoOaiRecord load_related_data method"""
+
+    @patch(
+        "core_oaipmh_harvester_app.components.mongo.models.OaiHarvesterMetadataFormat.objects"
+    )
+    @patch.object(OaiRecord, "objects")
+    @override_settings(MONGODB_INDEXING=True)
+    @tag("mongodb")
+    def test_load_related_data_queries_each_model_once(
+        self, mock_oai_record_objects, mock_metadata_format_objects
+    ):
+        """test_load_related_data_queries_each_model_once"""
+        from core_oaipmh_harvester_app.components.mongo.models import (
+            MongoOaiRecord,
+        )
+
+        mock_metadata_format = MockObject(id=1)
+        mock_oai_record_objects.in_bulk.return_value = {
+            oai_record_id: MockObject(
+                id=oai_record_id, content=f"<tag>{oai_record_id}</tag>"
+            )
+            for oai_record_id in [1, 2]
+        }
+        mock_metadata_format_objects.in_bulk.return_value = {
+            1: mock_metadata_format
+        }
+        mongo_oai_records = []
+        for oai_record_id in [1, 2]:
+            mongo_oai_record = MongoOaiRecord(_harvester_metadata_format_id=1)
+            mongo_oai_record.data_id = oai_record_id
+            mongo_oai_records.append(mongo_oai_record)
+
+        MongoOaiRecord.load_related_data(mongo_oai_records)
+
+        mock_oai_record_objects.in_bulk.assert_called_once()
+        mock_metadata_format_objects.in_bulk.assert_called_once()
+        self.assertEqual(
+            [
+                mongo_oai_record.content
+                for mongo_oai_record in mongo_oai_records
+            ],
+            ["<tag>1</tag>", "<tag>2</tag>"],
+        )
+        self.assertEqual(
+            mongo_oai_records[1].harvester_metadata_format,
+            mock_metadata_format,
+        )
+
+
 class TestMongoOaiRecordContent(TestCase):
     @tag("mongodb")
     def test_oai_record_content_returns_content_if_set(self):
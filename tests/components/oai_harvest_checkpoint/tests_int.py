@@ -0,0 +1,322 @@
+""" Int Test OaiHarvestCheckpoint
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from core_main_app.utils import datetime as datetime_utils
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+from core_oaipmh_common_app.commons import exceptions as oai_pmh_exceptions
+from core_oaipmh_harvester_app.components.oai_harvest_checkpoint import (
+    api as oai_harvest_checkpoint_api,
+)
+from core_oaipmh_harvester_app.components.oai_harvest_checkpoint.models import (
+    OaiHarvestCheckpoint,
+)
+from core_oaipmh_harvester_app.components.oai_registry import (
+    api as oai_registry_api,
+)
+from core_oaipmh_harvester_app.components.oai_registry_lease import (
+    api as oai_registry_lease_api,
+)
+from core_oaipmh_harvester_app.components.oai_registry_lease.models import (
+    OaiRegistryLease,
+)
+from core_oaipmh_harvester_app.components.oai_verbs import api as oai_verbs_api
+from tests.components.oai_registry.fixtures.fixtures import OaiPmhFixtures
+
+FROM_DATE = "2023-01-01T00:00:00Z"
+
+
+class TestGetResumableCheckpoint(IntegrationBaseTestCase):
+    """Test Get Resumable Checkpoint"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry(insert_records=False)
+        self.metadata_format = self.fixture.oai_metadata_formats[0]
+
+    def _save_checkpoint(self, **kwargs):
+        """Save a checkpoint of the metadata format.
+
+        Args:
+            **kwargs: Fields of the checkpoint.
+
+        Returns:
+            OaiHarvestCheckpoint instance.
+
+        """
+        checkpoint = oai_harvest_checkpoint_api.init_checkpoint(
+            self.metadata_format, None, FROM_DATE
+        )
+        return oai_harvest_checkpoint_api.upsert(
+            checkpoint,
+            {
+                "resumption_token": "token",
+                "cursor": 10,
+                "complete_list_size": 100,
+                "expiration_date": None,
+                **kwargs,
+            },
+        )
+
+    def test_no_checkpoint_returns_none(self):
+        """test_no_checkpoint_returns_none"""
+        # Act
+        result = oai_harvest_checkpoint_api.get_resumable_checkpoint(
+            self.metadata_format, None, FROM_DATE
+        )
+
+        # Assert
+        self.assertIsNone(result)
+
+    def test_saved_checkpoint_is_returned(self):
+        """test_saved_checkpoint_is_returned"""
+        # Arrange
+        checkpoint = self._save_checkpoint()
+
+        # Act
+        result = oai_harvest_checkpoint_api.get_resumable_checkpoint(
+            self.metadata_format, None, FROM_DATE
+        )
+
+        # Assert
+        self.assertEqual(result.pk, checkpoint.pk)
+        self.assertEqual(result.resumption_token, "token")
+        self.assertEqual(result.cursor, 10)
+
+    def test_checkpoint_of_another_from_date_is_deleted(self):
+        """test_checkpoint_of_another_from_date_is_deleted"""
+        # Arrange
+        self._save_checkpoint()
+
+        # Act
+        result = oai_harvest_checkpoint_api.get_resumable_checkpoint(
+            self.metadata_format, None, None
+        )
+
+        # Assert
+        self.assertIsNone(result)
+        self.assertFalse(OaiHarvestCheckpoint.objects.exists())
+
+    def test_expired_checkpoint_is_deleted(self):
+        """test_expired_checkpoint_is_deleted"""
+        # Arrange
+        self._save_checkpoint(
+            expiration_date=datetime_utils.datetime_to_utc_datetime_iso8601(
+                datetime_utils.datetime_now() - timedelta(minutes=1)
+            )
+        )
+
+        # Act
+        result = oai_harvest_checkpoint_api.get_resumable_checkpoint(
+            self.metadata_format, None, FROM_DATE
+        )
+
+        # Assert
+        self.assertIsNone(result)
+        self.assertFalse(OaiHarvestCheckpoint.objects.exists())
+
+    def test_second_checkpoint_without_set_is_rejected(self):
+        """test_second_checkpoint_without_set_is_rejected"""
+        # Arrange
+        self._save_checkpoint()
+
+        # Act + Assert
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self._save_checkpoint()
+        self.assertEqual(OaiHarvestCheckpoint.objects.count(), 1)
+
+
+class TestHarvestRecordsCheckpoint(IntegrationBaseTestCase):
+    """Test the checkpoints of _harvest_records"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry(insert_records=False)
+        self.metadata_format = self.fixture.oai_metadata_formats[0]
+
+    @staticmethod
+    def _resumption_info(resumption_token):
+        """Return the resumption information of a page.
+
+        Args:
+            resumption_token: Resumption token of the page.
+
+        Returns:
+            Resumption information dict.
+
+        """
+        return {
+            "resumption_token": resumption_token,
+            "cursor": None,
+            "complete_list_size": None,
+            "expiration_date": None,
+        }
+
+    @patch.object(oai_verbs_api, "list_records_page")
+    def test_failed_harvest_is_resumed_from_last_stored_page(
+        self, mock_list_records_page
+    ):
+        """test_failed_harvest_is_resumed_from_last_stored_page"""
+        # Arrange
+        mock_list_records_page.side_effect = [
+            (
+                Response([], status=status.HTTP_200_OK),
+                self._resumption_info("1"),
+            ),
+            (
+                Response(
+                    {"message": "error"},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                ),
+                None,
+            ),
+        ]
+        started_at, errors = oai_registry_api._harvest_records_with_start_date(
+            self.fixture.registry, self.metadata_format, FROM_DATE, []
+        )
+        self.assertEqual(len(errors), 1)
+        mock_list_records_page.reset_mock()
+        mock_list_records_page.side_effect = [
+            (
+                Response([], status=status.HTTP_200_OK),
+                self._resumption_info(""),
+            ),
+        ]
+
+        # Act
+        resumed_at, errors = oai_registry_api._harvest_records_with_start_date(
+            self.fixture.registry, self.metadata_format, FROM_DATE, []
+        )
+
+        # Assert
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            mock_list_records_page.call_args.kwargs["resumption_token"], "1"
+        )
+        self.assertEqual(resumed_at, started_at)
+        self.assertFalse(OaiHarvestCheckpoint.objects.exists())
+
+    @patch.object(oai_verbs_api, "list_records_page")
+    def test_rejected_checkpoint_token_restarts_harvest(
+        self, mock_list_records_page
+    ):
+        """test_rejected_checkpoint_token_restarts_harvest"""
+        # Arrange
+        checkpoint = oai_harvest_checkpoint_api.upsert(
+            oai_harvest_checkpoint_api.init_checkpoint(
+                self.metadata_format, None, FROM_DATE
+            ),
+            self._resumption_info("expired"),
+        )
+        mock_list_records_page.side_effect = [
+            (
+                oai_pmh_exceptions.OAIAPILabelledException(
+                    message="badResumptionToken: The token is unknown",
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                ).response(),
+                None,
+            ),
+            (
+                Response([], status=status.HTTP_200_OK),
+                self._resumption_info(""),
+            ),
+        ]
+
+        # Act
+        started_at, errors = oai_registry_api._harvest_records_with_start_date(
+            self.fixture.registry, self.metadata_format, FROM_DATE, []
+        )
+
+        # Assert
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            [
+                call.kwargs["resumption_token"]
+                for call in mock_list_records_page.call_args_list
+            ],
+            ["expired", None],
+        )
+        self.assertEqual(
+            mock_list_records_page.call_args.kwargs["from_date"], FROM_DATE
+        )
+        self.assertGreater(started_at, checkpoint.harvest_started_at)
+        self.assertFalse(OaiHarvestCheckpoint.objects.exists())
+
+    @patch.object(oai_verbs_api, "list_records_page")
+    def test_checkpoint_is_not_saved_after_a_failed_page(
+        self, mock_list_records_page
+    ):
+        """test_checkpoint_is_not_saved_after_a_failed_page"""
+        # Arrange
+        mock_list_records_page.side_effect = [
+            (
+                Response(
+                    {"message": "error"},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                ),
+                self._resumption_info("1"),
+            ),
+            (
+                Response([], status=status.HTTP_200_OK),
+                self._resumption_info("2"),
+            ),
+            (Response([], status=status.HTTP_200_OK), None),
+        ]
+
+        # Act
+        oai_registry_api._harvest_records_with_start_date(
+            self.fixture.registry, self.metadata_format, FROM_DATE, []
+        )
+
+        # Assert
+        self.assertFalse(OaiHarvestCheckpoint.objects.exists())
+
+    @patch.object(oai_verbs_api, "list_records_page")
+    def test_harvest_stops_when_lease_is_lost(self, mock_list_records_page):
+        """test_harvest_stops_when_lease_is_lost"""
+        # Arrange
+        lease = oai_registry_lease_api.HeldLease(
+            self.fixture.registry.id, OaiRegistryLease.HARVEST, "owner"
+        )
+
+        def _list_records_page(**kwargs):
+            # The lease is lost while the second page is downloaded
+            if mock_list_records_page.call_count == 2:
+                lease.lost_event.set()
+            return (
+                Response([], status=status.HTTP_200_OK),
+                self._resumption_info(str(mock_list_records_page.call_count)),
+            )
+
+        mock_list_records_page.side_effect = _list_records_page
+
+        # Act
+        _, errors = oai_registry_api._harvest_records_with_start_date(
+            self.fixture.registry,
+            self.metadata_format,
+            FROM_DATE,
+            [],
+            lease=lease,
+        )
+
+        # Assert
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0]["status_code"], status.HTTP_409_CONFLICT)
+        self.assertEqual(mock_list_records_page.call_count, 2)
+        self.assertEqual(
+            OaiHarvestCheckpoint.objects.get().resumption_token, "1"
+        )
@@ -0,0 +1,151 @@
+""" Int Test OaiHarvestMetrics
+"""
+
+import requests
+from rest_framework import status
+from unittest.mock import patch
+
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+from core_oaipmh_harvester_app.components.oai_harvest_metrics import (
+    api as oai_harvest_metrics_api,
+)
+from core_oaipmh_harvester_app.components.oai_harvest_metrics.collector import (
+    HarvestMetrics,
+    HarvestProgress,
+)
+from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from core_oaipmh_harvester_app.components.oai_registry import (
+    api as oai_registry_api,
+)
+from tests.components.oai_registry.fixtures.fixtures import (
+    OaiPmhFixtures,
+    OaiPmhMock,
+)
+
+
+class TestOaiHarvestMetrics(IntegrationBaseTestCase):
+    """Test OaiHarvestMetrics"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry(insert_records=False)
+        self.registry = self.fixture.registry
+
+    def test_add_creates_and_increments_counters(self):
+        """test_add_creates_and_increments_counters"""
+        # Act
+        oai_harvest_metrics_api.add(self.registry.id, {"pages_fetched": 1})
+        oai_harvest_metrics_api.add(
+            self.registry.id, {"pages_fetched": 2}, cursor=10
+        )
+
+        # Assert
+        metrics = oai_harvest_metrics_api.get_by_registry(self.registry)
+        self.assertEqual(metrics.pages_fetched, 3)
+        self.assertEqual(metrics.cursor, 10)
+
+    def test_flush_adds_progress_of_all_lists(self):
+        """test_flush_adds_progress_of_all_lists"""
+        # Arrange
+        progress = HarvestProgress()
+        first_list_metrics = HarvestMetrics(
+            self.registry.id, progress=progress, progress_key=(1, 1)
+        )
+        second_list_metrics = HarvestMetrics(
+            self.registry.id, progress=progress, progress_key=(1, 2)
+        )
+        first_list_metrics.set_progress(
+            {"cursor": 10, "complete_list_size": 100}
+        )
+        second_list_metrics.set_progress(
+            {"cursor": 20, "complete_list_size": 50}
+        )
+        oai_harvest_metrics_api.flush(second_list_metrics)
+
+        # Act
+        first_list_metrics.set_progress(
+            {"cursor": 30, "complete_list_size": None}
+        )
+        oai_harvest_metrics_api.flush(first_list_metrics)
+
+        # Assert
+        metrics = oai_harvest_metrics_api.get_by_registry(self.registry)
+        self.assertEqual(metrics.cursor, 50)
+        self.assertEqual(metrics.complete_list_size, 150)
+
+    def test_harvest_finished_counts_failed_harvest(self):
+        """test_harvest_finished_counts_failed_harvest"""
+        # Arrange
+        started_at = oai_harvest_metrics_api.harvest_started(self.registry.id)
+
+        # Act
+        oai_harvest_metrics_api.harvest_finished(
+            self.registry.id, started_at, failed=True
+        )
+
+        # Assert
+        metrics = oai_harvest_metrics_api.get_by_registry(self.registry)
+        self.assertEqual(metrics.harvests_started, 1)
+        self.assertEqual(metrics.harvests_finished, 1)
+        self.assertEqual(metrics.harvests_failed, 1)
+        self.assertIsNone(metrics.current_harvest_started_at)
+        self.assertIsNotNone(metrics.last_harvest_duration)
+
+    @patch.object(requests.Session, "get")
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_harvest_records_counts_pages_and_records(
+        self, mock_convert_file, mock_get
+    ):
+        """test_harvest_records_counts_pages_and_records"""
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.side_effect = (
+            lambda **kwargs: OaiPmhMock.mock_oai_response_list_records_chunks(
+                with_resumption_token=False
+            )
+        )
+        metadata_format = self.fixture.oai_metadata_formats[0]
+
+        # Act
+        oai_registry_api._harvest_records(
+            self.registry, metadata_format, None, []
+        )
+        oai_registry_api._harvest_records(
+            self.registry, metadata_format, None, []
+        )
+
+        # Assert
+        metrics = oai_harvest_metrics_api.get_by_registry(self.registry)
+        self.assertEqual(metrics.pages_fetched, 2)
+        self.assertGreater(metrics.records_inserted, 0)
+        self.assertEqual(metrics.records_skipped, metrics.records_inserted)
+        self.assertGreater(metrics.bytes_downloaded, 0)
+        self.assertGreater(metrics.parse_seconds, 0)
+        self.assertGreater(metrics.db_seconds, 0)
+
+    def test_to_prometheus_text_escapes_label_values(self):
+        """test_to_prometheus_text_escapes_label_values"""
+        # Arrange
+        self.registry.name = 'Registry "1"'
+        self.registry.save()
+        oai_harvest_metrics_api.add(self.registry.id, {"pages_fetched": 1})
+
+        # Act
+        text = oai_harvest_metrics_api.to_prometheus_text(
+            oai_harvest_metrics_api.get_all()
+        )
+
+        # Assert
+        self.assertIn("# TYPE oai_harvester_pages_fetched_total counter", text)
+        self.assertIn(
+            f'oai_harvester_pages_fetched_total{{registry_id="'
+            f'{self.registry.id}",registry="Registry \\"1\\""}} 1',
+            text,
+        )
+        # Unknown gauges are not exposed
+        self.assertNotIn("oai_harvester_cursor{", text)
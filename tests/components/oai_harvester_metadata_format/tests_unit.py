@@ -377,7 +377,7 @@ class TestInitSchemaInfo(TestCase):
     """Test Init Schema Info"""
 
     @patch.object(api_template, "get_all_accessible_by_hash")
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_init_schema_info_return_object(
         self, mock_get, mock_get_all_by_hash
     ):
@@ -403,7 +403,7 @@ class TestInitSchemaInfo(TestCase):
         self.assertIsInstance(result, OaiHarvesterMetadataFormat)
 
     @patch.object(api_template, "get_all_accessible_by_hash")
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_init_schema_info_return_object_with_xml_schema(
         self, mock_get, mock_get_all_by_hash
     ):
@@ -431,7 +431,7 @@ class TestInitSchemaInfo(TestCase):
 
     @patch.object(harvester_metadata_format_api, "get_hash")
     @patch.object(api_template, "get_all_accessible_by_hash")
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_init_schema_info_return_object_with_hash(
         self, mock_get, mock_get_all_by_hash, mock_get_hash
     ):
@@ -459,7 +459,7 @@ class TestInitSchemaInfo(TestCase):
         self.assertEqual(result.hash, hash_)
 
     @patch.object(api_template, "get_all_accessible_by_hash")
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_init_schema_info_return_object_with_template(
         self, mock_get, mock_get_all_by_hash
     ):
@@ -485,7 +485,7 @@ class TestInitSchemaInfo(TestCase):
         # Assert
         self.assertEqual(result.template, list_template[0])
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_init_schema_info_raises_api_error_if_bad_status_code(
         self, mock_get
     ):
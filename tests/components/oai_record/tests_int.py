@@ -0,0 +1,224 @@
+""" Int Test OaiRecord
+"""
+
+import re
+from unittest.mock import Mock
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete
+
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from tests.components.oai_registry.fixtures.fixtures import OaiPmhFixtures
+
+# Plan of a query reading the whole record table, on SQLite or PostgreSQL
+FULL_SCAN = re.compile(
+    rf"(\bSCAN |Seq Scan on ){OaiRecord._meta.db_table}(\s|$)",
+    flags=re.MULTILINE,
+)
+
+
+class TestOaiRecordQueryPlans(IntegrationBaseTestCase):
+    """Test that the hot lookups on OaiRecord use an index"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry()
+        self.metadata_format = self.fixture.oai_metadata_formats[0]
+
+    def test_upsert_lookup_uses_unique_index(self):
+        """test_upsert_lookup_uses_unique_index"""
+        # Act
+        plan = OaiRecord.objects.filter(
+            identifier=self.fixture.oai_records[0].identifier,
+            harvester_metadata_format=self.metadata_format,
+        ).explain()
+
+        # Assert
+        self.assertNotRegex(plan, FULL_SCAN)
+        self.assertIn("identifier=?", plan)
+
+    def test_bulk_upsert_lookup_uses_unique_index(self):
+        """test_bulk_upsert_lookup_uses_unique_index"""
+        # Act
+        plan = OaiRecord.objects.filter(
+            identifier__in=[
+                oai_record.identifier
+                for oai_record in self.fixture.oai_records
+            ],
+            harvester_metadata_format=self.metadata_format,
+        ).explain()
+
+        # Assert
+        self.assertNotRegex(plan, FULL_SCAN)
+        self.assertIn("identifier=?", plan)
+
+    def test_query_by_registries_uses_index(self):
+        """test_query_by_registries_uses_index"""
+        # Act
+        plan = OaiRecord.execute_query(
+            Q(registry__in=[self.fixture.registry.id]) & Q(deleted=False),
+            ["-last_modification_date"],
+        ).explain()
+
+        # Assert
+        self.assertNotRegex(plan, FULL_SCAN)
+
+    def test_query_by_metadata_formats_uses_partial_index(self):
+        """test_query_by_metadata_formats_uses_partial_index"""
+        # Act
+        plan = OaiRecord.execute_query(
+            Q(harvester_metadata_format__in=[self.metadata_format.id])
+            & Q(deleted=False),
+            ["-last_modification_date"],
+        ).explain()
+
+        # Assert
+        self.assertNotRegex(plan, FULL_SCAN)
+
+    def test_duplicate_record_is_rejected(self):
+        """test_duplicate_record_is_rejected"""
+        # Arrange
+        oai_record = self.fixture.oai_records[0]
+        oai_record.pk = None
+
+        # Act + Assert
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            oai_record.save()
+
+
+class TestOaiRecordReconcileHarvesterSets(IntegrationBaseTestCase):
+    """Test reconcile_harvester_sets"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry()
+        self.oai_record = self.fixture.oai_records[0]
+        self.oai_record.harvester_sets.set(self.fixture.oai_sets[:2])
+
+    def test_reconcile_adds_and_removes_memberships(self):
+        """test_reconcile_adds_and_removes_memberships"""
+        # Arrange
+        wanted_sets = [self.fixture.oai_sets[1], self.fixture.oai_sets[2]]
+
+        # Act
+        OaiRecord.reconcile_harvester_sets([(self.oai_record, wanted_sets)])
+
+        # Assert
+        self.assertCountEqual(
+            self.oai_record.harvester_sets.all(), wanted_sets
+        )
+
+    def test_reconcile_keeps_unchanged_memberships(self):
+        """test_reconcile_keeps_unchanged_memberships"""
+        # Arrange
+        through_model = OaiRecord.harvester_sets.through
+        membership_ids = set(
+            through_model.objects.filter(
+                oairecord_id=self.oai_record.id
+            ).values_list("id", flat=True)
+        )
+
+        # Act
+        with self.assertNumQueries(1):
+            OaiRecord.reconcile_harvester_sets(
+                [(self.oai_record, self.fixture.oai_sets[:2])]
+            )
+
+        # Assert
+        self.assertEqual(
+            set(
+                through_model.objects.filter(
+                    oairecord_id=self.oai_record.id
+                ).values_list("id", flat=True)
+            ),
+            membership_ids,
+        )
+
+    def test_reconcile_uses_three_queries_for_a_page(self):
+        """test_reconcile_uses_three_queries_for_a_page"""
+        # Arrange
+        oai_records_harvester_sets = [
+            (oai_record, self.fixture.oai_sets[2:])
+            for oai_record in self.fixture.oai_records
+        ]
+
+        # Act
+        with self.assertNumQueries(3):
+            OaiRecord.reconcile_harvester_sets(oai_records_harvester_sets)
+
+        # Assert
+        for oai_record in self.fixture.oai_records:
+            self.assertCountEqual(
+                oai_record.harvester_sets.all(), self.fixture.oai_sets[2:]
+            )
+
+
+class TestOaiRecordDeleteBatchByRegistryId(IntegrationBaseTestCase):
+    """Test delete_batch_by_registry_id"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry()
+        self.oai_record_ids = sorted(
+            oai_record.id for oai_record in self.fixture.oai_records
+        )
+        for oai_record in self.fixture.oai_records:
+            oai_record.harvester_sets.set(self.fixture.oai_sets)
+
+    def test_delete_batch_deletes_next_records_by_id(self):
+        """test_delete_batch_deletes_next_records_by_id"""
+        # Act
+        result = OaiRecord.delete_batch_by_registry_id(
+            self.fixture.registry.id, self.oai_record_ids[0], 2
+        )
+
+        # Assert
+        self.assertEqual(result, self.oai_record_ids[1:3])
+        self.assertCountEqual(
+            OaiRecord.objects.values_list("id", flat=True),
+            self.oai_record_ids[:1] + self.oai_record_ids[3:],
+        )
+        self.assertFalse(
+            OaiRecord.harvester_sets.through.objects.filter(
+                oairecord_id__in=result
+            ).exists()
+        )
+
+    def test_delete_batch_does_not_send_signals(self):
+        """test_delete_batch_does_not_send_signals"""
+        # Arrange
+        receiver = Mock()
+        post_delete.connect(receiver, sender=OaiRecord)
+        self.addCleanup(post_delete.disconnect, receiver, sender=OaiRecord)
+
+        # Act
+        OaiRecord.delete_batch_by_registry_id(
+            self.fixture.registry.id, 0, len(self.oai_record_ids)
+        )
+
+        # Assert
+        receiver.assert_not_called()
+        self.assertEqual(OaiRecord.objects.count(), 0)
+
+    def test_delete_batch_returns_empty_list_when_no_record_left(self):
+        """test_delete_batch_returns_empty_list_when_no_record_left"""
+        # Act
+        result = OaiRecord.delete_batch_by_registry_id(
+            self.fixture.registry.id, self.oai_record_ids[-1], 2
+        )
+
+        # Assert
+        self.assertEqual(result, [])
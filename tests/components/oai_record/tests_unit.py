@@ -8,6 +8,7 @@ from django.test import override_settings, tag
 from tests.mocks import MockMongoOaiRecord
 
 import core_oaipmh_harvester_app.components.oai_record.api as oai_record_api
+import core_oaipmh_harvester_app.components.oai_record.models as oai_record_models
 from core_main_app.commons import exceptions
 from core_main_app.utils.datetime import datetime_now
 from core_main_app.utils.tests_tools.MockUser import create_mock_user
@@ -236,6 +237,60 @@ class TestOaiRecord(TestCase):
         self.assertTrue(mock_content.encode)
 
 
+class TestOaiRecordConvertToFile(TestCase):
+    """Test OaiRecord convert_to_file"""
+
+    @patch.object(
+        oai_record_models, "OAI_HARVESTER_COMPRESS_XML_CONTENT", True
+    )
+    def test_compressed_content_is_stored_gzipped(self):
+        """test_compressed_content_is_stored_gzipped"""
+        # Arrange
+        oai_record = _create_oai_record()
+
+        # Act
+        oai_record.convert_to_file()
+
+        # Assert
+        self.assertTrue(
+            oai_record.file.read().startswith(
+                oai_record_models.GZIP_MAGIC_NUMBER
+            )
+        )
+
+    @patch.object(
+        oai_record_models, "OAI_HARVESTER_COMPRESS_XML_CONTENT", True
+    )
+    def test_compressed_content_is_read_decompressed(self):
+        """test_compressed_content_is_read_decompressed"""
+        # Arrange
+        oai_record = _create_oai_record()
+        oai_record.convert_to_file()
+        saved_oai_record = OaiRecord(file=oai_record.file)
+
+        # Act
+        result = saved_oai_record.content
+
+        # Assert
+        self.assertEqual(result, oai_record.xml_content)
+
+    @patch.object(
+        oai_record_models, "OAI_HARVESTER_COMPRESS_XML_CONTENT", False
+    )
+    def test_uncompressed_content_is_read_as_is(self):
+        """test_uncompressed_content_is_read_as_is"""
+        # Arrange
+        oai_record = _create_oai_record()
+        oai_record.convert_to_file()
+        saved_oai_record = OaiRecord(file=oai_record.file)
+
+        # Act
+        result = saved_oai_record.content
+
+        # Assert
+        self.assertEqual(result, oai_record.xml_content)
+
+
 def _generic_get_all_test(self, mock_get_all, act_function):
     """_generic_get_all_test
 
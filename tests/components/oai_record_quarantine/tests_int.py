@@ -0,0 +1,174 @@
+""" Int Test OaiRecordQuarantine
+"""
+
+from unittest.mock import patch
+
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+from core_oaipmh_harvester_app.components.oai_record import (
+    api as oai_record_api,
+)
+from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from core_oaipmh_harvester_app.components.oai_record_quarantine import (
+    api as oai_record_quarantine_api,
+)
+from core_oaipmh_harvester_app.components.oai_registry import (
+    api as oai_registry_api,
+)
+from core_oaipmh_harvester_app.system import api as oai_harvester_system_api
+from core_oaipmh_harvester_app.utils import list_records_parser
+from core_oaipmh_harvester_app.utils.list_records_parser import (
+    ListRecordsParser,
+)
+from tests.components.oai_registry.fixtures.fixtures import (
+    OaiPmhFixtures,
+    OaiPmhMock,
+)
+
+
+class TestOaiRecordQuarantine(IntegrationBaseTestCase):
+    """Test the quarantine of the records which can not be stored"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry(insert_records=False)
+        self.registry = self.fixture.registry
+        self.metadata_format = self.fixture.oai_metadata_formats[0]
+        self.records = list(
+            ListRecordsParser(self.metadata_format.metadata_prefix).parse(
+                OaiPmhMock.mock_oai_response_list_records_chunks(
+                    with_resumption_token=False
+                )
+            )
+        )
+        self.failing_identifier = self.records[0]["identifier"]
+        self.upsert_oai_record = oai_harvester_system_api.upsert_oai_record
+
+    def _upsert_oai_record_failing(self, oai_record):
+        """Store an OaiRecord, unless it is the failing one.
+
+        Args:
+            oai_record: OaiRecord to store.
+
+        Returns:
+            OaiRecord instance.
+
+        """
+        if oai_record.identifier == self.failing_identifier:
+            raise Exception("error")
+        return self.upsert_oai_record(oai_record)
+
+    def _get_stored_identifiers(self):
+        """Return the identifiers of the records stored for the registry.
+
+        Returns:
+            Set of identifiers.
+
+        """
+        return {
+            oai_record.identifier
+            for oai_record in oai_record_api.get_all_by_registry_id(
+                self.registry.id
+            )
+        }
+
+    @patch.object(OaiRecord, "convert_to_file")
+    @patch.object(oai_registry_api, "_upsert_records_for_registry")
+    @patch.object(oai_harvester_system_api, "upsert_oai_record")
+    def test_failing_record_is_quarantined_and_page_is_stored(
+        self, mock_upsert_oai_record, mock_upsert_records, mock_convert_file
+    ):
+        """test_failing_record_is_quarantined_and_page_is_stored"""
+        # Arrange
+        mock_upsert_oai_record.side_effect = self._upsert_oai_record_failing
+        mock_upsert_records.side_effect = Exception("bulk error")
+
+        # Act
+        oai_registry_api._upsert_page_for_registry(
+            self.records, self.metadata_format, self.registry, {}
+        )
+
+        # Assert
+        quarantined = list(
+            oai_record_quarantine_api.get_all_by_registry_id(self.registry.id)
+        )
+        self.assertEqual(len(quarantined), 1)
+        self.assertEqual(quarantined[0].identifier, self.failing_identifier)
+        self.assertEqual(
+            quarantined[0].raw, list_records_parser.get_raw(self.records[0])
+        )
+        self.assertEqual(quarantined[0].error, "error")
+        self.assertEqual(
+            self._get_stored_identifiers(),
+            {record["identifier"] for record in self.records[1:]},
+        )
+
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_retry_stores_quarantined_record(self, mock_convert_file):
+        """test_retry_stores_quarantined_record"""
+        # Arrange
+        oai_record_quarantine_api.quarantine(
+            self.registry, self.metadata_format, self.records[0], "error"
+        )
+
+        # Act
+        oai_registry_api._retry_quarantined_records(self.registry, [])
+
+        # Assert
+        self.assertEqual(
+            self._get_stored_identifiers(), {self.failing_identifier}
+        )
+        self.assertFalse(
+            oai_record_quarantine_api.get_all_by_registry_id(
+                self.registry.id
+            ).exists()
+        )
+
+    @patch.object(OaiRecord, "convert_to_file")
+    @patch.object(oai_harvester_system_api, "upsert_oai_record")
+    def test_retry_failure_increments_attempts(
+        self, mock_upsert_oai_record, mock_convert_file
+    ):
+        """test_retry_failure_increments_attempts"""
+        # Arrange
+        mock_upsert_oai_record.side_effect = Exception("new error")
+        oai_record_quarantine_api.quarantine(
+            self.registry, self.metadata_format, self.records[0], "error"
+        )
+
+        # Act
+        oai_registry_api._retry_quarantined_records(self.registry, [])
+
+        # Assert
+        quarantined = oai_record_quarantine_api.get_all_by_registry_id(
+            self.registry.id
+        ).get()
+        self.assertEqual(quarantined.attempts, 2)
+        self.assertEqual(quarantined.error, "new error")
+
+    @patch.object(oai_registry_api, "_upsert_record_for_registry")
+    def test_record_is_not_retried_after_max_attempts(
+        self, mock_upsert_record
+    ):
+        """test_record_is_not_retried_after_max_attempts"""
+        # Arrange
+        oai_record_quarantine = oai_record_quarantine_api.quarantine(
+            self.registry, self.metadata_format, self.records[0], "error"
+        )
+        oai_record_quarantine.attempts = 5
+        oai_record_quarantine.save()
+
+        # Act
+        with patch.object(
+            oai_record_quarantine_api,
+            "OAI_HARVESTER_QUARANTINE_MAX_ATTEMPTS",
+            5,
+        ):
+            oai_registry_api._retry_quarantined_records(self.registry, [])
+
+        # Assert
+        self.assertFalse(mock_upsert_record.called)
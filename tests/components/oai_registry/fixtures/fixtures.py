@@ -350,3 +350,25 @@ class OaiPmhMock:
             data = file.read()
 
         return data
+
+    @staticmethod
+    def mock_oai_response_list_records_chunks(
+        with_resumption_token=True, chunk_size=1024
+    ):
+        """mock_oai_response_list_records_chunks
+
+        Args:
+            with_resumption_token:
+            chunk_size:
+
+        Returns:
+
+        """
+        data = OaiPmhMock.mock_oai_response_list_records(
+            with_resumption_token=with_resumption_token
+        ).encode("utf-8")
+
+        return [
+            data[index : index + chunk_size]
+            for index in range(0, len(data), chunk_size)
+        ]
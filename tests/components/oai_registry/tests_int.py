@@ -1,11 +1,21 @@
 """ Int Test OaiRegistry
 """
 
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+
 import requests
+from django.test import override_settings
 from rest_framework import status
 from unittest.mock import patch
 
 from core_main_app.commons import exceptions
+from core_main_app.utils import datetime as datetime_utils
+from core_main_app.utils.datetime import datetime_now
+from core_main_app.components.template.models import Template
 from core_main_app.utils.integration_tests.integration_base_test_case import (
     IntegrationBaseTestCase,
 )
@@ -24,6 +34,12 @@ from core_oaipmh_harvester_app.components.oai_harvester_metadata_format_set impo
 from core_oaipmh_harvester_app.components.oai_harvester_set import (
     api as oai_harvester_set_api,
 )
+from core_oaipmh_harvester_app.components.oai_harvest_checkpoint import (
+    api as oai_harvest_checkpoint_api,
+)
+from core_oaipmh_harvester_app.components.oai_harvest_metrics.collector import (
+    HarvestMetrics,
+)
 from core_oaipmh_harvester_app.components.oai_identify import (
     api as oai_identify_api,
 )
@@ -34,9 +50,16 @@ from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
 from core_oaipmh_harvester_app.components.oai_registry import (
     api as oai_registry_api,
 )
+from core_oaipmh_harvester_app.components.oai_registry import query_cache
 from core_oaipmh_harvester_app.components.oai_registry.models import (
     OaiRegistry,
 )
+from core_oaipmh_harvester_app.components.oai_registry_lease import (
+    api as oai_registry_lease_api,
+)
+from core_oaipmh_harvester_app.components.oai_registry_lease.models import (
+    OaiRegistryLease,
+)
 from core_oaipmh_harvester_app.components.oai_verbs import api as oai_verbs_api
 from core_oaipmh_harvester_app.system import api as oai_harvester_system_api
 from tests.components.oai_registry.fixtures.fixtures import OaiPmhFixtures
@@ -52,7 +75,7 @@ class TestAddRegistry(IntegrationBaseTestCase):
 
     fixture = fixture_data
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     @patch.object(oai_verbs_api, "list_sets_as_object")
     @patch.object(oai_verbs_api, "list_metadata_formats_as_object")
     @patch.object(oai_verbs_api, "identify_as_object")
@@ -142,7 +165,7 @@ class TestAddRegistryNoSetsNoMetadataFormats(IntegrationBaseTestCase):
 
     fixture = fixture_data
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     @patch.object(oai_verbs_api, "list_sets_as_object")
     @patch.object(oai_verbs_api, "list_metadata_formats_as_object")
     @patch.object(oai_verbs_api, "identify_as_object")
@@ -191,7 +214,7 @@ class TestAddRegistryIdentify(IntegrationBaseTestCase):
 
     fixture = fixture_data
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     @patch.object(oai_verbs_api, "list_sets_as_object")
     @patch.object(oai_verbs_api, "list_metadata_formats_as_object")
     @patch.object(oai_verbs_api, "identify_as_object")
@@ -238,7 +261,7 @@ class TestAddRegistrySets(IntegrationBaseTestCase):
 
     fixture = fixture_data
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     @patch.object(oai_verbs_api, "list_sets_as_object")
     @patch.object(oai_verbs_api, "list_metadata_formats_as_object")
     @patch.object(oai_verbs_api, "identify_as_object")
@@ -288,7 +311,7 @@ class TestAddRegistryMetadataFormats(IntegrationBaseTestCase):
 
     fixture = fixture_data
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     @patch.object(oai_verbs_api, "list_sets_as_object")
     @patch.object(oai_verbs_api, "list_metadata_formats_as_object")
     @patch.object(oai_verbs_api, "identify_as_object")
@@ -375,7 +398,7 @@ class TestUpdateRegistryInfo(IntegrationBaseTestCase):
         super().setUp()
         self.fixture.insert_registry()
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     @patch.object(oai_verbs_api, "list_sets_as_object")
     @patch.object(oai_verbs_api, "list_metadata_formats_as_object")
     @patch.object(oai_verbs_api, "identify_as_object")
@@ -410,6 +433,146 @@ class TestUpdateRegistryInfo(IntegrationBaseTestCase):
         _assert_metadata_format(self, first_metadata_format, result.id)
         _assert_set(self, first_set, result.id)
 
+    @patch.object(oai_verbs_api, "identify_as_object")
+    def test_update_registry_being_updated_returns_registry(
+        self, mock_identify
+    ):
+        """test_update_registry_being_updated_returns_registry"""
+        # Arrange
+        oai_registry_lease_api.acquire(
+            self.fixture.registry.id, OaiRegistryLease.UPDATE
+        )
+
+        # Act
+        result = oai_registry_api.update_registry_info(self.fixture.registry)
+
+        # Assert
+        self.assertEqual(result, self.fixture.registry)
+        mock_identify.assert_not_called()
+
+
+class TestRefreshRegistryInfo(IntegrationBaseTestCase):
+    """
+    Test Refresh Registry Info
+    """
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+
+        super().setUp()
+        self.fixture.insert_registry()
+        self.registry = self.fixture.registry
+
+    @patch.object(oai_registry_api, "_update_registry_info")
+    @patch.object(oai_verbs_api, "check_registry_info")
+    def test_refresh_updates_changed_info(
+        self, mock_check_registry_info, mock_update_registry_info
+    ):
+        """test_refresh_updates_changed_info"""
+        # Arrange
+        info_validators = {"Identify": {"digest": "123"}}
+        mock_check_registry_info.return_value = True, info_validators
+
+        # Act
+        oai_registry_api.refresh_registry_info(self.registry)
+
+        # Assert
+        mock_update_registry_info.assert_called_once_with(self.registry)
+        registry = oai_registry_api.get_by_id(self.registry.id)
+        self.assertEqual(registry.info_validators, info_validators)
+        self.assertIsNotNone(registry.info_updated_at)
+
+    @patch.object(oai_registry_api, "_update_registry_info")
+    @patch.object(oai_verbs_api, "check_registry_info")
+    def test_refresh_skips_unchanged_info(
+        self, mock_check_registry_info, mock_update_registry_info
+    ):
+        """test_refresh_skips_unchanged_info"""
+        # Arrange
+        mock_check_registry_info.return_value = False, {}
+
+        # Act
+        oai_registry_api.refresh_registry_info(self.registry)
+
+        # Assert
+        mock_update_registry_info.assert_not_called()
+        self.assertIsNotNone(
+            oai_registry_api.get_by_id(self.registry.id).info_updated_at
+        )
+
+    @patch.object(oai_registry_api, "_update_registry_info")
+    @patch.object(oai_verbs_api, "check_registry_info")
+    def test_refresh_failure_keeps_previous_check(
+        self, mock_check_registry_info, mock_update_registry_info
+    ):
+        """test_refresh_failure_keeps_previous_check"""
+        # Arrange
+        mock_check_registry_info.return_value = True, {}
+        mock_update_registry_info.side_effect = (
+            oai_pmh_exceptions.OAIAPILabelledException(
+                message="error",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        )
+
+        # Act
+        with self.assertRaises(oai_pmh_exceptions.OAIAPILabelledException):
+            oai_registry_api.refresh_registry_info(self.registry)
+
+        # Assert
+        self.assertIsNone(
+            oai_registry_api.get_by_id(self.registry.id).info_updated_at
+        )
+
+    @patch.object(oai_verbs_api, "check_registry_info")
+    def test_refresh_within_interval_does_not_check(
+        self, mock_check_registry_info
+    ):
+        """test_refresh_within_interval_does_not_check"""
+        # Arrange
+        self.registry.info_updated_at = datetime_now()
+
+        # Act
+        result = oai_registry_api.refresh_registry_info(self.registry)
+
+        # Assert
+        self.assertEqual(result, self.registry)
+        mock_check_registry_info.assert_not_called()
+
+    @patch.object(oai_verbs_api, "check_registry_info")
+    def test_refresh_after_interval_checks(self, mock_check_registry_info):
+        """test_refresh_after_interval_checks"""
+        # Arrange
+        mock_check_registry_info.return_value = False, {}
+        self.registry.info_updated_at = datetime_now() - timedelta(
+            seconds=oai_registry_api.OAI_HARVESTER_REGISTRY_INFO_REFRESH_INTERVAL
+        )
+
+        # Act
+        oai_registry_api.refresh_registry_info(self.registry)
+
+        # Assert
+        mock_check_registry_info.assert_called_once()
+
+    @patch.object(oai_verbs_api, "check_registry_info")
+    def test_refresh_of_registry_being_updated_returns_registry(
+        self, mock_check_registry_info
+    ):
+        """test_refresh_of_registry_being_updated_returns_registry"""
+        # Arrange
+        oai_registry_lease_api.acquire(
+            self.registry.id, OaiRegistryLease.UPDATE
+        )
+
+        # Act
+        result = oai_registry_api.refresh_registry_info(self.registry)
+
+        # Assert
+        self.assertEqual(result, self.registry)
+        mock_check_registry_info.assert_not_called()
+
 
 class TestUpsertIdentifyForRegistry(IntegrationBaseTestCase):
     """
@@ -461,7 +624,7 @@ class TestUpsertMetadataFormatForRegistry(IntegrationBaseTestCase):
 
     fixture = fixture_data
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_upsert_updates_if_does_exist(self, mock_get):
         """Test upsert update
         Args:
@@ -493,7 +656,7 @@ class TestUpsertMetadataFormatForRegistry(IntegrationBaseTestCase):
         )
         self.assertEqual(metadata_format_in_database.schema, schema)
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_upsert_creates_if_does_not_exist(self, mock_get):
         """Test upsert create
         Args:
@@ -602,7 +765,7 @@ class TestUpsertRecordForRegistry(IntegrationBaseTestCase):
 
         # Act
         record_in_database = oai_registry_api._upsert_record_for_registry(
-            oai_record, metadata_format, self.fixture.registry, []
+            oai_record, metadata_format, self.fixture.registry, {}
         )
 
         # Assert
@@ -625,7 +788,7 @@ class TestUpsertRecordForRegistry(IntegrationBaseTestCase):
 
         # Act
         saved_record = oai_registry_api._upsert_record_for_registry(
-            oai_record, metadata_format, self.fixture.registry, []
+            oai_record, metadata_format, self.fixture.registry, {}
         )
 
         # Assert
@@ -635,201 +798,174 @@ class TestUpsertRecordForRegistry(IntegrationBaseTestCase):
 
         self.assertEqual(record_in_database, saved_record)
 
-
-class TestHarvestByMetadataFormats(IntegrationBaseTestCase):
-    """
-    Test Harvest By Metadata Formats
-    """
-
-    fixture = fixture_data
-
-    def setUp(self):
-        """Set up test"""
-
-        super().setUp()
-        self.fixture.insert_registry(insert_records=False)
-
-    @patch.object(requests, "get")
+    @patch.object(
+        oai_harvester_system_api,
+        "upsert_oai_record",
+        wraps=oai_harvester_system_api.upsert_oai_record,
+    )
     @patch.object(OaiRecord, "convert_to_file")
-    def test_harvest_by_metadata_formats_saves_record(
-        self, mock_convert_file, mock_get
+    def test_upsert_skips_unchanged_record(
+        self, mock_convert_file, mock_upsert_oai_record
     ):
-        """Test harvest by metadata formats save
-        Args:
-            mock_get:
+        """Test upsert does not save a record harvested again unchanged"""
+        # Arrange
+        self.fixture.insert_registry(insert_records=False)
+        metadata_format = self.fixture.oai_metadata_formats[0]
+        mock_convert_file.return_value = None
+        oai_registry_api._upsert_record_for_registry(
+            _build_record("oai:id/1", sets=["all"]),
+            metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
 
-        Returns:
+        # Act
+        oai_registry_api._upsert_record_for_registry(
+            _build_record("oai:id/1", sets=["all"]),
+            metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
 
-        """
+        # Assert
+        self.assertEqual(mock_upsert_oai_record.call_count, 1)
+
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_upsert_saves_record_with_new_sets(self, mock_convert_file):
+        """Test upsert saves a record harvested again with other sets"""
         # Arrange
-        mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.mock_oai_response_list_records(
-            with_resumption_token=False
-        )
-        metadata_format = [self.fixture.oai_metadata_formats[0]]
+        self.fixture.insert_registry(insert_records=False)
+        metadata_format = self.fixture.oai_metadata_formats[0]
         mock_convert_file.return_value = None
+        oai_registry_api._upsert_record_for_registry(
+            _build_record("oai:id/1", sets=["all"]),
+            metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
 
         # Act
-        result = oai_registry_api._harvest_by_metadata_formats(
-            self.fixture.registry, metadata_format, self.fixture.oai_sets
+        oai_registry_api._upsert_record_for_registry(
+            _build_record("oai:id/1", sets=["demo"]),
+            metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
         )
 
         # Assert
-        record_in_database = oai_record_api.get_all_by_registry_id(
-            self.fixture.registry.id
+        record_in_database = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", metadata_format
+        )
+        self.assertEqual(
+            [x.set_spec for x in record_in_database.harvester_sets.all()],
+            ["demo"],
         )
-        self.assertEqual(result, [])
-        self.assertTrue(len(record_in_database) > 0)
 
-    @patch.object(requests, "get")
+    @patch("core_oaipmh_harvester_app.components.oai_record.models.xml_utils")
     @patch.object(OaiRecord, "convert_to_file")
-    def test_harvest_by_metadata_formats_updates_dates(
-        self, mock_convert_file, mock_get
+    def test_upsert_uses_harvested_dict_content(
+        self, mock_convert_file, mock_xml_utils
     ):
-        """Test harvest by metadata formats update
-        Args:
-            mock_get:
-
-        Returns:
-
-        """
+        """Test upsert does not convert the xml content again"""
         # Arrange
-        mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.mock_oai_response_list_records(
-            with_resumption_token=False
-        )
+        self.fixture.insert_registry(insert_records=False)
         metadata_format = self.fixture.oai_metadata_formats[0]
-        set_ = self.fixture.oai_sets[0]
         mock_convert_file.return_value = None
-
-        # Assert
-        # Metadata Format date
-        self.assertEqual(metadata_format.last_update, None)
-        # Metadata Format + Set date
-        with self.assertRaises(exceptions.DoesNotExist):
-            oai_harvester_metadata_format_set_api.get_by_metadata_format_and_set(
-                metadata_format, set_
-            )
+        record = _build_record("oai:id/1")
+        record["dict_content"] = {"root": {"value": "harvested"}}
 
         # Act
-        result = oai_registry_api._harvest_by_metadata_formats(
-            self.fixture.registry, [metadata_format], self.fixture.oai_sets
+        oai_registry_api._upsert_record_for_registry(
+            record,
+            metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
         )
 
         # Assert
-        self.assertEqual(result, [])
-        # Metadata Format date
-        metadata_format_in_database = (
-            oai_harvester_metadata_format_api.get_by_id(metadata_format.id)
+        record_in_database = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", metadata_format
         )
-        self.assertNotEqual(metadata_format_in_database.last_update, None)
-        # Metadata Format + Set date
-        oai_h_mf_set = oai_harvester_metadata_format_set_api.get_by_metadata_format_and_set(
-            metadata_format, set_
+        self.assertEqual(
+            record_in_database.dict_content, {"root": {"value": "harvested"}}
         )
-        self.assertNotEqual(oai_h_mf_set.last_update, None)
+        mock_xml_utils.raw_xml_to_dict.assert_not_called()
 
-
-class TestHarvestByMetadataFormatsAndSets(IntegrationBaseTestCase):
-    """
-    Test Harvest By Metadata Formats And Sets
-    """
-
-    fixture = fixture_data
-
-    def setUp(self):
-        """Set up test"""
-        super().setUp()
-        self.fixture.insert_registry(insert_records=False)
-
-    @patch.object(requests, "get")
     @patch.object(OaiRecord, "convert_to_file")
-    def test_harvest_by_metadata_formats_and_sets_saves_record(
-        self, mock_convert_file, mock_get
+    def test_upsert_stores_datestamp_as_modification_date(
+        self, mock_convert_file
     ):
-        """Test harvest by metadata formats and sets save
-        Args:
-            mock_get:
-
-        Returns:
-
-        """
+        """Test upsert stores the datestamp of the record"""
         # Arrange
-        mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.mock_oai_response_list_records(
-            with_resumption_token=False
-        )
-        metadata_format = [self.fixture.oai_metadata_formats[0]]
-        set_ = [self.fixture.oai_sets[0]]
+        self.fixture.insert_registry(insert_records=False)
+        metadata_format = self.fixture.oai_metadata_formats[0]
         mock_convert_file.return_value = None
+        oai_registry_api._upsert_record_for_registry(
+            _build_record("oai:id/1"),
+            metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
+        created_record = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", metadata_format
+        )
 
         # Act
-        result = oai_registry_api._harvest_by_metadata_formats_and_sets(
-            self.fixture.registry, metadata_format, set_, self.fixture.oai_sets
+        oai_registry_api._upsert_record_for_registry(
+            _build_record("oai:id/1", deleted=True),
+            metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
         )
 
         # Assert
-        record_in_database = oai_record_api.get_all_by_registry_id(
-            self.fixture.registry.id
+        updated_record = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", metadata_format
         )
-        self.assertEqual(result, [])
-        self.assertTrue(len(record_in_database) > 0)
+        datestamp = datetime_utils.utc_datetime_iso8601_to_datetime(
+            "2017-04-24T18:01:08Z"
+        )
+        self.assertEqual(created_record.last_modification_date, datestamp)
+        self.assertEqual(updated_record.last_modification_date, datestamp)
 
-    @patch.object(requests, "get")
     @patch.object(OaiRecord, "convert_to_file")
-    def test_harvest_by_metadata_formats_and_sets_updates_dates(
-        self, mock_convert_file, mock_get
+    def test_upsert_saves_record_once_its_set_is_known(
+        self, mock_convert_file
     ):
-        """Test harvest by metadata formats and sets update
-        Args:
-            mock_get:
-
-        Returns:
-
-        """
+        """Test upsert saves a record harvested again unchanged once a set it
+        references has been added to the registry"""
         # Arrange
-        mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.mock_oai_response_list_records(
-            with_resumption_token=False
-        )
+        self.fixture.insert_registry(insert_records=False)
         metadata_format = self.fixture.oai_metadata_formats[0]
-        set_ = self.fixture.oai_sets[0]
         mock_convert_file.return_value = None
-
-        # Assert
-        # Metadata Format date
-        self.assertEqual(metadata_format.last_update, None)
-        # Metadata Format + Set date
-        with self.assertRaises(exceptions.DoesNotExist):
-            oai_harvester_metadata_format_set_api.get_by_metadata_format_and_set(
-                metadata_format, set_
-            )
+        oai_registry_api._upsert_record_for_registry(
+            _build_record("oai:id/1", sets=["all"]),
+            metadata_format,
+            self.fixture.registry,
+            {},
+        )
 
         # Act
-        result = oai_registry_api._harvest_by_metadata_formats_and_sets(
+        oai_registry_api._upsert_record_for_registry(
+            _build_record("oai:id/1", sets=["all"]),
+            metadata_format,
             self.fixture.registry,
-            [metadata_format],
-            [set_],
-            self.fixture.oai_sets,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
         )
 
         # Assert
-        self.assertEqual(result, [])
-        # Metadata Format date
-        metadata_format_in_database = (
-            oai_harvester_metadata_format_api.get_by_id(metadata_format.id)
+        record_in_database = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", metadata_format
         )
-        self.assertIsNotNone(metadata_format_in_database.last_update)
-        # Metadata Format + Set date
-        oai_h_mf_set = oai_harvester_metadata_format_set_api.get_by_metadata_format_and_set(
-            metadata_format, set_
+        self.assertEqual(
+            [x.set_spec for x in record_in_database.harvester_sets.all()],
+            ["all"],
         )
-        self.assertIsNotNone(oai_h_mf_set.last_update)
 
 
-class TestHarvestRegistry(IntegrationBaseTestCase):
+class TestUpsertRecordsForRegistry(IntegrationBaseTestCase):
     """
-    Test class
+    Test Upsert Records For Registry
     """
 
     fixture = fixture_data
@@ -838,36 +974,954 @@ class TestHarvestRegistry(IntegrationBaseTestCase):
         """Set up test"""
         super().setUp()
         self.fixture.insert_registry(insert_records=False)
+        self.metadata_format = self.fixture.oai_metadata_formats[0]
 
-    @patch.object(requests, "get")
     @patch.object(OaiRecord, "convert_to_file")
-    def test_harvest_registry_saves_record(self, mock_convert_file, mock_get):
-        """Test harvest save
-        Args:
-            mock_get:
-            mock_convert_file:
-
-        Returns:
-
-        """
+    def test_upsert_creates_records(self, mock_convert_file):
+        """Test bulk upsert create"""
         # Arrange
-        mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.mock_oai_response_list_records(
-            with_resumption_token=False
-        )
+        records = [
+            _build_record("oai:id/1", sets=["all"]),
+            _build_record("oai:id/2", sets=[]),
+        ]
         mock_convert_file.return_value = None
 
         # Act
-        result = oai_registry_api.harvest_registry(self.fixture.registry)
+        oai_registry_api._upsert_records_for_registry(
+            records,
+            self.metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
 
         # Assert
-        record_in_database = oai_record_api.get_all_by_registry_id(
-            self.fixture.registry.id
+        record_in_database = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", self.metadata_format
+        )
+        self.assertEqual(record_in_database.title, "oai:id/1")
+        self.assertIsNotNone(record_in_database.creation_date)
+        self.assertEqual(
+            [x.set_spec for x in record_in_database.harvester_sets.all()],
+            ["all"],
+        )
+        self.assertEqual(
+            len(
+                oai_record_api.get_all_by_registry_id(self.fixture.registry.id)
+            ),
+            2,
+        )
+
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_upsert_updates_existing_records(self, mock_convert_file):
+        """Test bulk upsert update"""
+        # Arrange
+        mock_convert_file.return_value = None
+        oai_registry_api._upsert_records_for_registry(
+            [_build_record("oai:id/1", sets=["all"])],
+            self.metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
+        saved_record = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", self.metadata_format
+        )
+
+        # Act
+        oai_registry_api._upsert_records_for_registry(
+            [_build_record("oai:id/1", sets=["demo", "soft"], deleted=True)],
+            self.metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
+
+        # Assert
+        record_in_database = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", self.metadata_format
+        )
+        self.assertEqual(record_in_database.pk, saved_record.pk)
+        self.assertTrue(record_in_database.deleted)
+        self.assertEqual(
+            record_in_database.creation_date, saved_record.creation_date
+        )
+        self.assertEqual(
+            sorted(
+                x.set_spec for x in record_in_database.harvester_sets.all()
+            ),
+            ["demo", "soft"],
+        )
+
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_upsert_keeps_dict_content_of_deleted_records(
+        self, mock_convert_file
+    ):
+        """Test bulk upsert keeps the content of records deleted remotely"""
+        # Arrange
+        mock_convert_file.return_value = None
+        oai_registry_api._upsert_records_for_registry(
+            [_build_record("oai:id/1")],
+            self.metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
+
+        # Act
+        oai_registry_api._upsert_records_for_registry(
+            [_build_record("oai:id/1", deleted=True)],
+            self.metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
+
+        # Assert
+        record_in_database = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", self.metadata_format
+        )
+        self.assertEqual(
+            record_in_database.dict_content, {"root": {"value": "oai:id/1"}}
+        )
+
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_upsert_skips_unchanged_records(self, mock_convert_file):
+        """Test bulk upsert only reads records harvested again unchanged"""
+        # Arrange
+        mock_convert_file.return_value = None
+        records = [
+            _build_record("oai:id/{0}".format(index), sets=["all"])
+            for index in range(5)
+        ]
+        oai_registry_api._upsert_records_for_registry(
+            records,
+            self.metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
+
+        # Act / Assert
+        # select
+        with self.assertNumQueries(1):
+            result = oai_registry_api._upsert_records_for_registry(
+                records,
+                self.metadata_format,
+                self.fixture.registry,
+                oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+            )
+        self.assertEqual(result, [])
+
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_upsert_uses_constant_number_of_queries(self, mock_convert_file):
+        """Test bulk upsert query count does not depend on the page size"""
+        # Arrange
+        mock_convert_file.return_value = None
+        records = [
+            _build_record("oai:id/{0}".format(index), sets=["all"])
+            for index in range(20)
+        ]
+
+        # Act / Assert
+        # select, insert, delete sets, insert sets (+ savepoint)
+        with self.assertNumQueries(6):
+            oai_registry_api._upsert_records_for_registry(
+                records,
+                self.metadata_format,
+                self.fixture.registry,
+                oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+            )
+
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_upsert_stores_datestamp_as_modification_date(
+        self, mock_convert_file
+    ):
+        """Test bulk upsert stores the datestamp of the records"""
+        # Arrange
+        mock_convert_file.return_value = None
+        oai_registry_api._upsert_records_for_registry(
+            [_build_record("oai:id/1")],
+            self.metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
+        created_record = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", self.metadata_format
+        )
+
+        # Act
+        oai_registry_api._upsert_records_for_registry(
+            [_build_record("oai:id/1", deleted=True)],
+            self.metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
+
+        # Assert
+        updated_record = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", self.metadata_format
+        )
+        datestamp = datetime_utils.utc_datetime_iso8601_to_datetime(
+            "2017-04-24T18:01:08Z"
+        )
+        self.assertEqual(created_record.last_modification_date, datestamp)
+        self.assertEqual(updated_record.last_modification_date, datestamp)
+
+
+class TestUpsertRecordsForRegistryOnConflict(IntegrationBaseTestCase):
+    """
+    Test Upsert Records For Registry On Conflict
+    """
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """Set up test"""
+        super().setUp()
+        # Write the files of the records in a temporary directory
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_root_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_root_override.enable()
+        self.addCleanup(media_root_override.disable)
+        self.fixture.insert_registry(insert_records=False)
+        self.metadata_format = self.fixture.oai_metadata_formats[0]
+
+    def _upsert(self, records):
+        """Upsert records with the INSERT ... ON CONFLICT query.
+
+        Args:
+            records:
+
+        Returns:
+
+        """
+        return oai_registry_api._upsert_records_for_registry_on_conflict(
+            records,
+            self.metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+        )
+
+    def test_upsert_creates_records(self):
+        """Test upsert on conflict create"""
+        # Act
+        self._upsert(
+            [
+                _build_record("oai:id/1", sets=["all"]),
+                _build_record("oai:id/2", sets=[]),
+            ]
+        )
+
+        # Assert
+        record_in_database = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", self.metadata_format
+        )
+        self.assertEqual(record_in_database.title, "oai:id/1")
+        self.assertEqual(
+            record_in_database.xml_content,
+            "<root><value>oai:id/1</value></root>",
+        )
+        self.assertEqual(
+            [x.set_spec for x in record_in_database.harvester_sets.all()],
+            ["all"],
+        )
+        self.assertEqual(
+            len(
+                oai_record_api.get_all_by_registry_id(self.fixture.registry.id)
+            ),
+            2,
+        )
+
+    def test_upsert_updates_existing_records(self):
+        """Test upsert on conflict update"""
+        # Arrange
+        self._upsert([_build_record("oai:id/1", sets=["all"])])
+        saved_record = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", self.metadata_format
+        )
+        record = _build_record("oai:id/1", sets=["demo", "soft"])
+        record["metadata"] = "<root><value>updated</value></root>"
+
+        # Act
+        result = self._upsert([record])
+
+        # Assert
+        record_in_database = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", self.metadata_format
+        )
+        self.assertEqual(result[0].pk, saved_record.pk)
+        self.assertEqual(record_in_database.pk, saved_record.pk)
+        self.assertEqual(
+            record_in_database.creation_date, saved_record.creation_date
+        )
+        self.assertEqual(
+            record_in_database.dict_content, {"root": {"value": "updated"}}
+        )
+        self.assertEqual(
+            sorted(
+                x.set_spec for x in record_in_database.harvester_sets.all()
+            ),
+            ["demo", "soft"],
+        )
+
+    def test_upsert_keeps_content_of_deleted_records(self):
+        """Test upsert on conflict keeps the content of records deleted
+        remotely"""
+        # Arrange
+        self._upsert([_build_record("oai:id/1")])
+
+        # Act
+        result = self._upsert([_build_record("oai:id/1", deleted=True)])
+
+        # Assert
+        record_in_database = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+            "oai:id/1", self.metadata_format
+        )
+        self.assertTrue(record_in_database.deleted)
+        self.assertEqual(
+            record_in_database.dict_content, {"root": {"value": "oai:id/1"}}
+        )
+        self.assertEqual(
+            record_in_database.xml_content,
+            "<root><value>oai:id/1</value></root>",
+        )
+        self.assertEqual(result[0].file.name, record_in_database.file.name)
+
+    def test_upsert_stores_datestamp_as_modification_date(self):
+        """Test upsert on conflict stores the datestamp of the records"""
+        # Act
+        self._upsert(
+            [
+                _build_record("oai:id/1"),
+                _build_record("oai:id/2", deleted=True),
+            ]
+        )
+
+        # Assert
+        for identifier in ("oai:id/1", "oai:id/2"):
+            record_in_database = oai_harvester_system_api.get_oai_record_by_identifier_and_metadata_format(
+                identifier, self.metadata_format
+            )
+            self.assertEqual(
+                record_in_database.last_modification_date,
+                datetime_utils.utc_datetime_iso8601_to_datetime(
+                    "2017-04-24T18:01:08Z"
+                ),
+            )
+
+    def test_upsert_failure_deletes_written_files(self):
+        """Test upsert on conflict does not leave files when it fails"""
+        # Arrange
+        with patch.object(
+            OaiRecord,
+            "reconcile_harvester_sets",
+            side_effect=exceptions.ModelError("error"),
+        ):
+            # Act
+            with self.assertRaises(exceptions.ModelError):
+                self._upsert([_build_record("oai:id/1", sets=["all"])])
+
+        # Assert
+        self.assertEqual(
+            [
+                file_name
+                for _, _, file_names in os.walk(self.media_root)
+                for file_name in file_names
+            ],
+            [],
+        )
+        self.assertEqual(
+            len(
+                oai_record_api.get_all_by_registry_id(self.fixture.registry.id)
+            ),
+            0,
+        )
+
+    def test_upsert_counts_created_updated_and_skipped_records(self):
+        """Test upsert on conflict metrics"""
+        # Arrange
+        self._upsert([_build_record("oai:id/1"), _build_record("oai:id/2")])
+        metrics = HarvestMetrics(self.fixture.registry.id)
+
+        # Act
+        oai_registry_api._upsert_records_for_registry_on_conflict(
+            [
+                _build_record("oai:id/1"),
+                _build_record("oai:id/2", deleted=True),
+                _build_record("oai:id/3"),
+            ],
+            self.metadata_format,
+            self.fixture.registry,
+            oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+            metrics,
+        )
+
+        # Assert
+        self.assertEqual(
+            metrics.pop_counters(),
+            {
+                "records_skipped": 1,
+                "records_deleted": 1,
+                "records_inserted": 1,
+            },
+        )
+
+    def test_upsert_uses_constant_number_of_queries(self):
+        """Test upsert on conflict query count does not depend on the page
+        size"""
+        # Arrange
+        records = [
+            _build_record("oai:id/{0}".format(index), sets=["all"])
+            for index in range(20)
+        ]
+
+        # Act / Assert
+        # select digests, upsert, delete sets, insert sets (+ savepoint)
+        with self.assertNumQueries(6):
+            self._upsert(records)
+
+    @patch.object(
+        oai_harvester_system_api,
+        "can_upsert_oai_records_on_conflict",
+        return_value=True,
+    )
+    def test_upsert_page_uses_on_conflict_query_when_supported(
+        self, mock_can_upsert
+    ):
+        """Test upsert page on conflict"""
+        # Act
+        with patch.object(
+            oai_registry_api,
+            "_upsert_record_for_registry",
+        ) as mock_upsert_record:
+            oai_registry_api._upsert_page_for_registry(
+                [_build_record("oai:id/1")],
+                self.metadata_format,
+                self.fixture.registry,
+                oai_registry_api._get_sets_by_spec(self.fixture.oai_sets),
+            )
+
+        # Assert
+        mock_upsert_record.assert_not_called()
+        self.assertEqual(
+            len(
+                oai_record_api.get_all_by_registry_id(self.fixture.registry.id)
+            ),
+            1,
+        )
+
+
+class TestHarvestByMetadataFormats(IntegrationBaseTestCase):
+    """
+    Test Harvest By Metadata Formats
+    """
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """Set up test"""
+
+        super().setUp()
+        self.fixture.insert_registry(insert_records=False)
+
+    @patch.object(requests.Session, "get")
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_harvest_by_metadata_formats_saves_record(
+        self, mock_convert_file, mock_get
+    ):
+        """Test harvest by metadata formats save
+        Args:
+            mock_get:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.return_value = (
+            OaiPmhMock.mock_oai_response_list_records_chunks(
+                with_resumption_token=False
+            )
+        )
+        metadata_format = [self.fixture.oai_metadata_formats[0]]
+        mock_convert_file.return_value = None
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats(
+            self.fixture.registry, metadata_format, self.fixture.oai_sets
+        )
+
+        # Assert
+        record_in_database = oai_record_api.get_all_by_registry_id(
+            self.fixture.registry.id
+        )
+        self.assertEqual(result, [])
+        self.assertTrue(len(record_in_database) > 0)
+
+    @patch.object(oai_registry_api, "OAI_HARVESTER_BULK_UPSERT", True)
+    @patch.object(requests.Session, "get")
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_harvest_by_metadata_formats_saves_record_in_bulk_mode(
+        self, mock_convert_file, mock_get
+    ):
+        """Test harvest by metadata formats save with bulk upsert
+        Args:
+            mock_get:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.return_value = (
+            OaiPmhMock.mock_oai_response_list_records_chunks(
+                with_resumption_token=False
+            )
+        )
+        metadata_format = [self.fixture.oai_metadata_formats[0]]
+        mock_convert_file.return_value = None
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats(
+            self.fixture.registry, metadata_format, self.fixture.oai_sets
+        )
+
+        # Assert
+        record_in_database = oai_record_api.get_all_by_registry_id(
+            self.fixture.registry.id
+        )
+        self.assertEqual(result, [])
+        self.assertTrue(len(record_in_database) > 0)
+        self.assertEqual(
+            [x.set_spec for x in record_in_database[0].harvester_sets.all()],
+            ["demo"],
+        )
+
+    @patch.object(oai_registry_api, "OAI_HARVESTER_PREFETCH_PAGES", 2)
+    @patch.object(requests.Session, "get")
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_harvest_by_metadata_formats_saves_record_with_prefetch(
+        self, mock_convert_file, mock_get
+    ):
+        """Test harvest by metadata formats save with page prefetch
+        Args:
+            mock_get:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.return_value = (
+            OaiPmhMock.mock_oai_response_list_records_chunks(
+                with_resumption_token=False
+            )
+        )
+        metadata_format = [self.fixture.oai_metadata_formats[0]]
+        mock_convert_file.return_value = None
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats(
+            self.fixture.registry, metadata_format, self.fixture.oai_sets
+        )
+
+        # Assert
+        record_in_database = oai_record_api.get_all_by_registry_id(
+            self.fixture.registry.id
+        )
+        self.assertEqual(result, [])
+        self.assertTrue(len(record_in_database) > 0)
+
+    @patch.object(requests.Session, "get")
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_harvest_by_metadata_formats_updates_dates(
+        self, mock_convert_file, mock_get
+    ):
+        """Test harvest by metadata formats update
+        Args:
+            mock_get:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.return_value = (
+            OaiPmhMock.mock_oai_response_list_records_chunks(
+                with_resumption_token=False
+            )
+        )
+        metadata_format = self.fixture.oai_metadata_formats[0]
+        set_ = self.fixture.oai_sets[0]
+        mock_convert_file.return_value = None
+
+        # Assert
+        # Metadata Format date
+        self.assertEqual(metadata_format.last_update, None)
+        # Metadata Format + Set date
+        with self.assertRaises(exceptions.DoesNotExist):
+            oai_harvester_metadata_format_set_api.get_by_metadata_format_and_set(
+                metadata_format, set_
+            )
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats(
+            self.fixture.registry, [metadata_format], self.fixture.oai_sets
+        )
+
+        # Assert
+        self.assertEqual(result, [])
+        # Metadata Format date
+        metadata_format_in_database = (
+            oai_harvester_metadata_format_api.get_by_id(metadata_format.id)
+        )
+        self.assertNotEqual(metadata_format_in_database.last_update, None)
+        # Metadata Format + Set date
+        oai_h_mf_set = oai_harvester_metadata_format_set_api.get_by_metadata_format_and_set(
+            metadata_format, set_
+        )
+        self.assertNotEqual(oai_h_mf_set.last_update, None)
+
+
+class TestHarvestByMetadataFormatsAndSets(IntegrationBaseTestCase):
+    """
+    Test Harvest By Metadata Formats And Sets
+    """
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """Set up test"""
+        super().setUp()
+        self.fixture.insert_registry(insert_records=False)
+
+    @patch.object(requests.Session, "get")
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_harvest_by_metadata_formats_and_sets_saves_record(
+        self, mock_convert_file, mock_get
+    ):
+        """Test harvest by metadata formats and sets save
+        Args:
+            mock_get:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.return_value = (
+            OaiPmhMock.mock_oai_response_list_records_chunks(
+                with_resumption_token=False
+            )
+        )
+        metadata_format = [self.fixture.oai_metadata_formats[0]]
+        set_ = [self.fixture.oai_sets[0]]
+        mock_convert_file.return_value = None
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats_and_sets(
+            self.fixture.registry, metadata_format, set_, self.fixture.oai_sets
+        )
+
+        # Assert
+        record_in_database = oai_record_api.get_all_by_registry_id(
+            self.fixture.registry.id
+        )
+        self.assertEqual(result, [])
+        self.assertTrue(len(record_in_database) > 0)
+
+    @patch.object(requests.Session, "get")
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_harvest_by_metadata_formats_and_sets_updates_dates(
+        self, mock_convert_file, mock_get
+    ):
+        """Test harvest by metadata formats and sets update
+        Args:
+            mock_get:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.return_value = (
+            OaiPmhMock.mock_oai_response_list_records_chunks(
+                with_resumption_token=False
+            )
+        )
+        metadata_format = self.fixture.oai_metadata_formats[0]
+        set_ = self.fixture.oai_sets[0]
+        mock_convert_file.return_value = None
+
+        # Assert
+        # Metadata Format date
+        self.assertEqual(metadata_format.last_update, None)
+        # Metadata Format + Set date
+        with self.assertRaises(exceptions.DoesNotExist):
+            oai_harvester_metadata_format_set_api.get_by_metadata_format_and_set(
+                metadata_format, set_
+            )
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats_and_sets(
+            self.fixture.registry,
+            [metadata_format],
+            [set_],
+            self.fixture.oai_sets,
+        )
+
+        # Assert
+        self.assertEqual(result, [])
+        # Metadata Format date
+        metadata_format_in_database = (
+            oai_harvester_metadata_format_api.get_by_id(metadata_format.id)
+        )
+        self.assertIsNotNone(metadata_format_in_database.last_update)
+        # Metadata Format + Set date
+        oai_h_mf_set = oai_harvester_metadata_format_set_api.get_by_metadata_format_and_set(
+            metadata_format, set_
+        )
+        self.assertIsNotNone(oai_h_mf_set.last_update)
+
+    @patch.object(oai_registry_api, "OAI_HARVESTER_MAX_CONCURRENT_HARVESTS", 4)
+    @patch.object(oai_harvest_checkpoint_api, "get_resumable_checkpoint")
+    @patch.object(oai_registry_api, "_harvest_records")
+    def test_harvest_by_metadata_formats_and_sets_harvests_all_pairs_concurrently(
+        self, mock_harvest_records, mock_get_resumable_checkpoint
+    ):
+        """Test harvest by metadata formats and sets with a worker pool
+        Args:
+            mock_harvest_records:
+            mock_get_resumable_checkpoint:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_harvest_records.return_value = []
+        mock_get_resumable_checkpoint.return_value = None
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats_and_sets(
+            self.fixture.registry,
+            self.fixture.oai_metadata_formats,
+            self.fixture.oai_sets,
+            self.fixture.oai_sets,
+        )
+
+        # Assert
+        self.assertEqual(result, [])
+        self.assertEqual(
+            mock_harvest_records.call_count,
+            len(self.fixture.oai_metadata_formats)
+            * len(self.fixture.oai_sets),
+        )
+        for metadata_format in self.fixture.oai_metadata_formats:
+            for set_ in self.fixture.oai_sets:
+                self.assertIsNotNone(
+                    oai_harvester_metadata_format_set_api.get_last_update_by_metadata_format_and_set(
+                        metadata_format, set_
+                    )
+                )
+
+    @patch.object(oai_registry_api, "OAI_HARVESTER_MAX_CONCURRENT_HARVESTS", 4)
+    @patch.object(
+        oai_harvester_system_api, "can_upsert_oai_records_on_conflict"
+    )
+    @patch.object(oai_harvest_checkpoint_api, "init_checkpoint")
+    @patch.object(oai_harvest_checkpoint_api, "get_resumable_checkpoint")
+    @patch.object(oai_registry_api, "_harvest_records")
+    def test_harvest_by_metadata_formats_and_sets_harvests_sets_of_a_metadata_format_concurrently_on_conflict(
+        self,
+        mock_harvest_records,
+        mock_get_resumable_checkpoint,
+        mock_init_checkpoint,
+        mock_can_upsert_on_conflict,
+    ):
+        """Test harvest by metadata formats and sets harvests two sets of a
+        metadata format at the same time if the records are upserted on
+        conflict
+        Args:
+            mock_harvest_records:
+            mock_get_resumable_checkpoint:
+            mock_init_checkpoint:
+            mock_can_upsert_on_conflict:
+
+        Returns:
+
+        """
+        # Arrange
+        # Each harvest waits for the other one: it fails if they do not run
+        # at the same time.
+        sets = self.fixture.oai_sets[:2]
+        barrier = threading.Barrier(len(sets), timeout=5)
+
+        def _harvest_records(
+            registry, metadata_format, last_update, all_sets, set_, **kwargs
+        ):
+            barrier.wait()
+            return []
+
+        mock_harvest_records.side_effect = _harvest_records
+        mock_get_resumable_checkpoint.return_value = None
+        mock_init_checkpoint.return_value.resumption_token = None
+        mock_init_checkpoint.return_value.harvest_started_at = datetime_now()
+        mock_can_upsert_on_conflict.return_value = True
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats_and_sets(
+            self.fixture.registry,
+            [self.fixture.oai_metadata_formats[0]],
+            sets,
+            self.fixture.oai_sets,
+        )
+
+        # Assert
+        self.assertEqual(result, [])
+        self.assertEqual(mock_harvest_records.call_count, len(sets))
+
+    @patch.object(oai_registry_api, "OAI_HARVESTER_MAX_CONCURRENT_HARVESTS", 4)
+    @patch.object(
+        oai_harvester_system_api, "can_upsert_oai_records_on_conflict"
+    )
+    @patch.object(oai_harvest_checkpoint_api, "get_resumable_checkpoint")
+    @patch.object(oai_registry_api, "_harvest_records")
+    def test_harvest_by_metadata_formats_and_sets_harvests_sets_of_a_metadata_format_in_one_thread(
+        self,
+        mock_harvest_records,
+        mock_get_resumable_checkpoint,
+        mock_can_upsert_on_conflict,
+    ):
+        """Test harvest by metadata formats and sets does not harvest two
+        sets of a metadata format at the same time if the records are not
+        upserted on conflict
+        Args:
+            mock_harvest_records:
+            mock_get_resumable_checkpoint:
+            mock_can_upsert_on_conflict:
+
+        Returns:
+
+        """
+        # Arrange
+        threads_by_metadata_format = {}
+
+        def _harvest_records(
+            registry, metadata_format, last_update, all_sets, set_, **kwargs
+        ):
+            threads_by_metadata_format.setdefault(
+                metadata_format.id, set()
+            ).add(threading.get_ident())
+            return []
+
+        mock_harvest_records.side_effect = _harvest_records
+        mock_get_resumable_checkpoint.return_value = None
+        mock_can_upsert_on_conflict.return_value = False
+
+        # Act
+        oai_registry_api._harvest_by_metadata_formats_and_sets(
+            self.fixture.registry,
+            self.fixture.oai_metadata_formats,
+            self.fixture.oai_sets,
+            self.fixture.oai_sets,
+        )
+
+        # Assert
+        self.assertEqual(
+            len(threads_by_metadata_format),
+            len(self.fixture.oai_metadata_formats),
+        )
+        for threads in threads_by_metadata_format.values():
+            self.assertEqual(len(threads), 1)
+
+    @patch.object(oai_registry_api, "OAI_HARVESTER_MAX_CONCURRENT_HARVESTS", 4)
+    @patch.object(oai_harvest_checkpoint_api, "get_resumable_checkpoint")
+    @patch.object(oai_registry_api, "_harvest_records")
+    def test_harvest_by_metadata_formats_and_sets_does_not_update_dates_of_failed_pairs(
+        self, mock_harvest_records, mock_get_resumable_checkpoint
+    ):
+        """Test harvest by metadata formats and sets with errors
+        Args:
+            mock_harvest_records:
+            mock_get_resumable_checkpoint:
+
+        Returns:
+
+        """
+        # Arrange
+        failing_set = self.fixture.oai_sets[0]
+        error = {"status_code": status.HTTP_400_BAD_REQUEST, "error": "error"}
+        mock_harvest_records.side_effect = lambda registry, metadata_format, last_update, all_sets, set_, **kwargs: (
+            [error] if set_ == failing_set else []
+        )
+        mock_get_resumable_checkpoint.return_value = None
+        metadata_format = self.fixture.oai_metadata_formats[0]
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats_and_sets(
+            self.fixture.registry,
+            [metadata_format],
+            self.fixture.oai_sets,
+            self.fixture.oai_sets,
+        )
+
+        # Assert
+        self.assertEqual(result, [[error]])
+        self.assertIsNone(
+            oai_harvester_metadata_format_api.get_by_id(
+                metadata_format.id
+            ).last_update
+        )
+        with self.assertRaises(exceptions.DoesNotExist):
+            oai_harvester_metadata_format_set_api.get_by_metadata_format_and_set(
+                metadata_format, failing_set
+            )
+        self.assertIsNotNone(
+            oai_harvester_metadata_format_set_api.get_last_update_by_metadata_format_and_set(
+                metadata_format, self.fixture.oai_sets[1]
+            )
+        )
+
+
+class TestHarvestRegistry(IntegrationBaseTestCase):
+    """
+    Test class
+    """
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """Set up test"""
+        super().setUp()
+        self.fixture.insert_registry(insert_records=False)
+
+    @patch.object(requests.Session, "get")
+    @patch.object(OaiRecord, "convert_to_file")
+    def test_harvest_registry_saves_record(self, mock_convert_file, mock_get):
+        """Test harvest save
+        Args:
+            mock_get:
+            mock_convert_file:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.return_value = (
+            OaiPmhMock.mock_oai_response_list_records_chunks(
+                with_resumption_token=False
+            )
+        )
+        mock_convert_file.return_value = None
+
+        # Act
+        result = oai_registry_api.harvest_registry(self.fixture.registry)
+
+        # Assert
+        record_in_database = oai_record_api.get_all_by_registry_id(
+            self.fixture.registry.id
         )
         self.assertEqual(result, [])
         self.assertTrue(len(record_in_database) > 0)
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     @patch.object(OaiRecord, "convert_to_file")
     def test_harvest_registry_updates_dates(self, mock_convert_file, mock_get):
         """Test harvest update
@@ -880,8 +1934,10 @@ class TestHarvestRegistry(IntegrationBaseTestCase):
         """
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.mock_oai_response_list_records(
-            with_resumption_token=False
+        mock_get.return_value.iter_content.return_value = (
+            OaiPmhMock.mock_oai_response_list_records_chunks(
+                with_resumption_token=False
+            )
         )
         mock_convert_file.return_value = None
 
@@ -978,6 +2034,319 @@ class TestHandleDeleteMetadataFormat(IntegrationBaseTestCase):
         )
 
 
+class TestQueryCache(IntegrationBaseTestCase):
+    """Test Query Cache"""
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry(insert_records=False)
+        query_cache.clear()
+        self.template = Template.objects.create(
+            filename="template.xsd", _hash="hash"
+        )
+        self.metadata_format = self.fixture.oai_metadata_formats[0]
+        self.metadata_format.template = self.template
+        self.metadata_format.save()
+
+    def tearDown(self):
+        """tearDown"""
+        query_cache.clear()
+        super().tearDown()
+
+    def test_get_metadata_format_ids_by_templates(self):
+        """test_get_metadata_format_ids_by_templates"""
+        # Act
+        result = query_cache.get_metadata_format_ids_by_templates(
+            [self.fixture.registry.id], [self.template.id]
+        )
+        # Assert
+        self.assertEqual(result, [self.metadata_format.id])
+
+    def test_cached_lookups_do_not_query(self):
+        """test_cached_lookups_do_not_query"""
+        # Arrange
+        query_cache.get_activated_registry_ids()
+        # Act
+        with self.assertNumQueries(0):
+            registry_ids = query_cache.get_activated_registry_ids()
+            query_cache.get_metadata_format_ids_by_templates(
+                registry_ids, [self.template.id]
+            )
+        # Assert
+        self.assertEqual(registry_ids, [self.fixture.registry.id])
+
+    def test_registry_deactivation_clears_cache(self):
+        """test_registry_deactivation_clears_cache"""
+        # Arrange
+        query_cache.get_activated_registry_ids()
+        # Act
+        self.fixture.registry.is_activated = False
+        oai_registry_api.upsert(self.fixture.registry)
+        # Assert
+        self.assertEqual(query_cache.get_activated_registry_ids(), [])
+        self.assertEqual(
+            query_cache.get_metadata_format_ids_by_templates(
+                [self.fixture.registry.id], [self.template.id]
+            ),
+            [],
+        )
+
+    def test_metadata_format_template_change_clears_cache(self):
+        """test_metadata_format_template_change_clears_cache"""
+        # Arrange
+        query_cache.get_activated_registry_ids()
+        # Act
+        self.metadata_format.template = None
+        oai_harvester_metadata_format_api.upsert(self.metadata_format)
+        # Assert
+        self.assertEqual(
+            query_cache.get_metadata_format_ids_by_templates(
+                [self.fixture.registry.id], [self.template.id]
+            ),
+            [],
+        )
+
+
+class TestUpsert(IntegrationBaseTestCase):
+    """Test Upsert"""
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry(
+            insert_related_collections=False, insert_records=False
+        )
+        self.registry = self.fixture.registry
+        self.registry.harvest = True
+        self.registry.harvest_rate = 60
+        oai_registry_api.upsert(self.registry)
+        self.registry.next_harvest_at = datetime_now() + timedelta(days=1)
+        oai_registry_api.upsert(self.registry)
+
+    def test_upsert_with_new_harvest_rate_resets_next_harvest(self):
+        """test_upsert_with_new_harvest_rate_resets_next_harvest"""
+        # Arrange
+        self.registry.harvest_rate = 120
+
+        # Act
+        oai_registry_api.upsert(self.registry)
+
+        # Assert
+        self.assertIsNone(
+            oai_registry_api.get_by_id(self.registry.id).next_harvest_at
+        )
+
+    def test_upsert_with_harvest_enabled_again_resets_next_harvest(self):
+        """test_upsert_with_harvest_enabled_again_resets_next_harvest"""
+        # Arrange
+        self.registry.harvest = False
+        oai_registry_api.upsert(self.registry)
+        self.registry.next_harvest_at = datetime_now() + timedelta(days=1)
+        oai_registry_api.upsert(self.registry)
+        self.registry.harvest = True
+
+        # Act
+        oai_registry_api.upsert(self.registry)
+
+        # Assert
+        self.assertIsNone(
+            oai_registry_api.get_by_id(self.registry.id).next_harvest_at
+        )
+
+    def test_upsert_with_same_schedule_keeps_next_harvest(self):
+        """test_upsert_with_same_schedule_keeps_next_harvest"""
+        # Arrange
+        self.registry.description = "description"
+
+        # Act
+        oai_registry_api.upsert(self.registry)
+
+        # Assert
+        self.assertIsNotNone(
+            oai_registry_api.get_by_id(self.registry.id).next_harvest_at
+        )
+
+
+class TestClaimRegistriesDueForHarvest(IntegrationBaseTestCase):
+    """Test Claim Registries Due For Harvest"""
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry(
+            insert_related_collections=False, insert_records=False
+        )
+        self.registry = self.fixture.registry
+        self.registry.harvest = True
+        oai_registry_api.upsert(self.registry)
+
+    def test_new_registry_is_claimed_once(self):
+        """test_new_registry_is_claimed_once"""
+        # Act
+        first_claim = oai_registry_api.claim_registries_due_for_harvest(10)
+        second_claim = oai_registry_api.claim_registries_due_for_harvest(10)
+
+        # Assert
+        self.assertEqual(first_claim, [self.registry.id])
+        self.assertEqual(second_claim, [])
+
+    def test_claim_schedules_next_harvest(self):
+        """test_claim_schedules_next_harvest"""
+        # Arrange
+        now = datetime_now()
+        self.registry.next_harvest_at = now - timedelta(seconds=1)
+        oai_registry_api.upsert(self.registry)
+
+        # Act
+        oai_registry_api.claim_registries_due_for_harvest(10)
+
+        # Assert
+        registry = oai_registry_api.get_by_id(self.registry.id)
+        self.assertGreaterEqual(
+            registry.next_harvest_at,
+            now + timedelta(seconds=self.registry.harvest_rate),
+        )
+        self.assertTrue(registry.is_queued)
+
+    def test_registry_not_due_is_not_claimed(self):
+        """test_registry_not_due_is_not_claimed"""
+        # Arrange
+        self.registry.next_harvest_at = datetime_now() + timedelta(hours=1)
+        oai_registry_api.upsert(self.registry)
+
+        # Act
+        result = oai_registry_api.claim_registries_due_for_harvest(10)
+
+        # Assert
+        self.assertEqual(result, [])
+
+    def test_registry_not_to_harvest_is_not_claimed(self):
+        """test_registry_not_to_harvest_is_not_claimed"""
+        # Arrange
+        self.registry.harvest = False
+        oai_registry_api.upsert(self.registry)
+
+        # Act
+        result = oai_registry_api.claim_registries_due_for_harvest(10)
+
+        # Assert
+        self.assertEqual(result, [])
+
+    def test_claim_is_limited_to_batch_size(self):
+        """test_claim_is_limited_to_batch_size"""
+        # Arrange
+        OaiRegistry(
+            name="Registry 2", url="http://registry2.com", harvest=True
+        ).save()
+
+        # Act
+        result = oai_registry_api.claim_registries_due_for_harvest(1)
+
+        # Assert
+        self.assertEqual(len(result), 1)
+
+
+class TestPurge(IntegrationBaseTestCase):
+    """Test Purge"""
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry()
+        self.registry = self.fixture.registry
+
+    @patch.object(oai_registry_api, "OAI_HARVESTER_PURGE_BATCH_SIZE", 2)
+    def test_purge_deletes_registry_and_records_by_batches(self):
+        """test_purge_deletes_registry_and_records_by_batches"""
+        # Arrange
+        registry_id = self.registry.id
+        records_count = len(self.fixture.oai_records)
+        progress = []
+
+        # Act
+        result = oai_registry_api.purge(
+            self.registry, lambda deleted, total: progress.append(deleted)
+        )
+
+        # Assert
+        self.assertEqual(result, records_count)
+        self.assertEqual(progress[-1], records_count)
+        self.assertEqual(len(progress), (records_count + 1) // 2)
+        self.assertEqual(OaiRecord.objects.count(), 0)
+        self.assertEqual(OaiRecord.harvester_sets.through.objects.count(), 0)
+        with self.assertRaises(exceptions.DoesNotExist):
+            oai_registry_api.get_by_id(registry_id)
+
+    def test_purge_keeps_registry_being_harvested(self):
+        """test_purge_keeps_registry_being_harvested"""
+        # Arrange
+        oai_registry_lease_api.acquire(
+            self.registry.id, OaiRegistryLease.HARVEST
+        )
+
+        # Act
+        result = oai_registry_api.purge(self.registry)
+
+        # Assert
+        self.assertIsNone(result)
+        self.assertEqual(
+            OaiRecord.objects.count(), len(self.fixture.oai_records)
+        )
+        registry = oai_registry_api.get_by_id(self.registry.id)
+        self.assertFalse(registry.is_activated)
+        self.assertFalse(registry.harvest)
+
+    def test_purge_keeps_registry_being_updated(self):
+        """test_purge_keeps_registry_being_updated"""
+        # Arrange
+        oai_registry_lease_api.acquire(
+            self.registry.id, OaiRegistryLease.UPDATE
+        )
+
+        # Act
+        result = oai_registry_api.purge(self.registry)
+
+        # Assert
+        self.assertIsNone(result)
+        self.assertEqual(
+            OaiRecord.objects.count(), len(self.fixture.oai_records)
+        )
+        self.assertIsNotNone(oai_registry_api.get_by_id(self.registry.id))
+
+
+def _build_record(identifier, sets=None, deleted=False):
+    """Build a record as returned by the ListRecords verb.
+
+    Args:
+        identifier:
+        sets:
+        deleted:
+
+    Returns:
+
+    """
+    return {
+        "identifier": identifier,
+        "datestamp": "2017-04-24T18:01:08Z",
+        "deleted": deleted,
+        "sets": sets if sets is not None else [],
+        "metadata": (
+            None
+            if deleted
+            else "<root><value>{0}</value></root>".format(identifier)
+        ),
+    }
+
+
 def _assert_identify(self, mock, registry_id):
     """Assert identify
     Args:
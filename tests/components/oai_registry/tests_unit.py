@@ -13,6 +13,9 @@ from core_main_app.utils.tests_tools.MockUser import create_mock_user
 from core_main_app.utils.tests_tools.RequestMock import create_mock_request
 from core_oaipmh_common_app.commons import exceptions as oai_pmh_exceptions
 from core_oaipmh_common_app.commons.messages import OaiPmhMessage
+from core_oaipmh_harvester_app.components.oai_harvest_metrics import (
+    api as oai_harvest_metrics_api,
+)
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import (
     api as oai_harvester_metadata_format_api,
 )
@@ -28,6 +31,9 @@ from core_oaipmh_harvester_app.components.oai_registry import (
 from core_oaipmh_harvester_app.components.oai_registry.models import (
     OaiRegistry,
 )
+from core_oaipmh_harvester_app.components.oai_registry_lease import (
+    api as oai_registry_lease_api,
+)
 from core_oaipmh_harvester_app.components.oai_verbs import api as oai_verbs_api
 from tests.components.oai_registry.fixtures.fixtures import OaiPmhMock
 
@@ -586,11 +592,12 @@ class TestUpdateRegistryInfo(TestCase):
         """Set up the test"""
         self.error_message = "An error occurred: %s"
 
+    @patch.object(oai_registry_lease_api, "hold")
     @patch.object(oai_verbs_api, "identify_as_object")
     @patch.object(OaiRegistry, "check_registry_url_already_exists")
     @patch.object(OaiRegistry, "get_by_id")
     def test_update_registry_info_raises_exception_if_bad_identify(
-        self, mock_get, mock_registry, mock
+        self, mock_get, mock_registry, mock, mock_hold
     ):
         """test_update_registry_info_raises_exception_if_bad_identify
 
@@ -628,12 +635,13 @@ class TestUpdateRegistryInfo(TestCase):
             ex.exception.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+    @patch.object(oai_registry_lease_api, "hold")
     @patch.object(oai_verbs_api, "identify_as_object")
     @patch.object(oai_verbs_api, "list_sets_as_object")
     @patch.object(OaiRegistry, "check_registry_url_already_exists")
     @patch.object(OaiRegistry, "get_by_id")
     def test_update_registry_info_raises_exception_if_bad_sets(
-        self, mock_get, mock_registry, mock_sets, mock_identify
+        self, mock_get, mock_registry, mock_sets, mock_identify, mock_hold
     ):
         """test_update_registry_info_raises_exception_if_bad_sets
 
@@ -671,6 +679,7 @@ class TestUpdateRegistryInfo(TestCase):
             ex.exception.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+    @patch.object(oai_registry_lease_api, "hold")
     @patch.object(oai_verbs_api, "list_sets_as_object")
     @patch.object(oai_verbs_api, "identify_as_object")
     @patch.object(oai_verbs_api, "list_metadata_formats_as_object")
@@ -683,6 +692,7 @@ class TestUpdateRegistryInfo(TestCase):
         mock_metadata_formats,
         mock_identify,
         mock_sets,
+        mock_hold,
     ):
         """test_update_registry_info_raises_exception_if_bad_metadata_formats
 
@@ -732,6 +742,9 @@ class TestHarvestRegistry(TestCase):
     Test OaiRegistry Harvest
     """
 
+    @patch.object(oai_harvest_metrics_api, "add")
+    @patch.object(oai_registry_api, "_retry_quarantined_records")
+    @patch.object(oai_registry_lease_api, "hold")
     @patch.object(oai_registry_api, "_harvest_by_metadata_formats")
     @patch.object(oai_registry_api, "_harvest_by_metadata_formats_and_sets")
     @patch.object(oai_harvester_set_api, "get_all_to_harvest_by_registry_id")
@@ -748,6 +761,9 @@ class TestHarvestRegistry(TestCase):
         mock_sets_to_harvest,
         mock_harvest_metadata_formats_and_sets,
         mock_harvest_by_metadata_formats,
+        mock_hold,
+        mock_retry_quarantined_records,
+        mock_add_metrics,
     ):
         """test_harvest_by_metadata_formats_and_sets
 
@@ -777,6 +793,9 @@ class TestHarvestRegistry(TestCase):
         self.assertTrue(mock_harvest_metadata_formats_and_sets.called)
         self.assertFalse(mock_harvest_by_metadata_formats.called)
 
+    @patch.object(oai_harvest_metrics_api, "add")
+    @patch.object(oai_registry_api, "_retry_quarantined_records")
+    @patch.object(oai_registry_lease_api, "hold")
     @patch.object(oai_registry_api, "_harvest_by_metadata_formats")
     @patch.object(oai_registry_api, "_harvest_by_metadata_formats_and_sets")
     @patch.object(oai_harvester_set_api, "get_all_to_harvest_by_registry_id")
@@ -793,6 +812,9 @@ class TestHarvestRegistry(TestCase):
         mock_sets_to_harvest,
         mock_harvest_metadata_formats_and_sets,
         mock_harvest_by_metadata_formats,
+        mock_hold,
+        mock_retry_quarantined_records,
+        mock_add_metrics,
     ):
         """test_harvest_by_metadata_formats"""
 
@@ -811,6 +833,9 @@ class TestHarvestRegistry(TestCase):
         self.assertTrue(mock_harvest_by_metadata_formats.called)
         self.assertFalse(mock_harvest_metadata_formats_and_sets.called)
 
+    @patch.object(oai_harvest_metrics_api, "add")
+    @patch.object(oai_registry_api, "_retry_quarantined_records")
+    @patch.object(oai_registry_lease_api, "hold")
     @patch.object(oai_registry_api, "_harvest_by_metadata_formats_and_sets")
     @patch.object(oai_harvester_set_api, "get_all_to_harvest_by_registry_id")
     @patch.object(oai_harvester_set_api, "get_all_by_registry_id")
@@ -825,6 +850,9 @@ class TestHarvestRegistry(TestCase):
         mock_sets_all,
         mock_sets_to_harvest,
         mock_harvest_metadata_formats_and_sets,
+        mock_hold,
+        mock_retry_quarantined_records,
+        mock_add_metrics,
     ):
         """test_harvest_by_metadata_formats_and_sets_returns_errors
 
@@ -859,6 +887,9 @@ class TestHarvestRegistry(TestCase):
         # Assert
         self.assertEqual(result, errors)
 
+    @patch.object(oai_harvest_metrics_api, "add")
+    @patch.object(oai_registry_api, "_retry_quarantined_records")
+    @patch.object(oai_registry_lease_api, "hold")
     @patch.object(oai_registry_api, "_harvest_by_metadata_formats")
     @patch.object(oai_harvester_set_api, "get_all_to_harvest_by_registry_id")
     @patch.object(oai_harvester_set_api, "get_all_by_registry_id")
@@ -873,6 +904,9 @@ class TestHarvestRegistry(TestCase):
         mock_sets_all,
         mock_sets_to_harvest,
         mock_harvest_by_metadata_formats,
+        mock_hold,
+        mock_retry_quarantined_records,
+        mock_add_metrics,
     ):
         """test_harvest_by_metadata_formats_returns_errors
 
@@ -907,32 +941,34 @@ class TestHarvestRegistry(TestCase):
         # Assert
         self.assertEqual(result, errors)
 
-    @patch.object(oai_verbs_api, "list_records")
+    @patch.object(oai_harvest_metrics_api, "add")
+    @patch.object(oai_verbs_api, "list_records_page")
     def test_harvest_records_returns_errors_if_not_http_204_no_content(
-        self, mock_list_records
+        self, mock_list_records_page, mock_add_metrics
     ):
         """test_harvest_records_returns_errors_if_not_http_204_no_content
 
         Args:
-            mock_list_records:
+            mock_list_records_page:
 
         Returns:
 
         """
         # Arrange
-        resumption_token = None
+        resumption_info = None
         content = OaiPmhMessage.get_message_labelled("Error")
         status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-        mock_list_records.return_value = (
+        mock_list_records_page.return_value = (
             Response(content, status=status_code),
-            resumption_token,
+            resumption_info,
         )
         expected_error = [{"status_code": status_code, "error": "Error"}]
         registry = Mock(spec=OaiRegistry())
         registry.url = "dummy_url"
         metadata_format = Mock(spec=OaiHarvesterMetadataFormat())
         metadata_format.metadata_prefix = "oai_dummy"
-        last_update = registry_all_sets = None
+        last_update = None
+        registry_all_sets = []
 
         # Act
         result = oai_registry_api._harvest_records(
@@ -1201,9 +1237,6 @@ def _set_oai_registry_fields(oai_registry):
     oai_registry.description = "This is the registry"
     oai_registry.harvest = True
     oai_registry.last_update = datetime_now()
-    oai_registry.is_harvesting = False
-    oai_registry.is_updating = False
     oai_registry.is_activated = True
-    oai_registry.is_queued = True
 
     return oai_registry
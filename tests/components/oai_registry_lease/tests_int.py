@@ -0,0 +1,185 @@
+""" Int Test OaiRegistryLease
+"""
+
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+
+from core_main_app.utils import datetime as datetime_utils
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+from core_oaipmh_harvester_app.components.oai_registry import (
+    api as oai_registry_api,
+)
+from core_oaipmh_harvester_app.components.oai_registry_lease import (
+    api as oai_registry_lease_api,
+)
+from core_oaipmh_harvester_app.components.oai_registry_lease.models import (
+    OaiRegistryLease,
+)
+from tests.components.oai_registry.fixtures.fixtures import OaiPmhFixtures
+
+
+class TestOaiRegistryLease(IntegrationBaseTestCase):
+    """Test OaiRegistryLease"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.fixture.insert_registry(
+            insert_related_collections=False, insert_records=False
+        )
+        self.registry = self.fixture.registry
+
+    def test_acquire_free_lease_returns_owner(self):
+        """test_acquire_free_lease_returns_owner"""
+        # Act
+        owner = oai_registry_lease_api.acquire(
+            self.registry.id, OaiRegistryLease.HARVEST
+        )
+
+        # Assert
+        self.assertIsNotNone(owner)
+        self.assertTrue(self.registry.is_harvesting)
+        self.assertFalse(self.registry.is_updating)
+
+    def test_acquire_held_lease_returns_none(self):
+        """test_acquire_held_lease_returns_none"""
+        # Arrange
+        oai_registry_lease_api.acquire(
+            self.registry.id, OaiRegistryLease.HARVEST
+        )
+
+        # Act
+        owner = oai_registry_lease_api.acquire(
+            self.registry.id, OaiRegistryLease.HARVEST
+        )
+
+        # Assert
+        self.assertIsNone(owner)
+
+    def test_acquire_expired_lease_reclaims_it(self):
+        """test_acquire_expired_lease_reclaims_it"""
+        # Arrange
+        OaiRegistryLease.objects.create(
+            registry=self.registry,
+            name=OaiRegistryLease.HARVEST,
+            owner="crashed",
+            expires_at=datetime_utils.datetime_now() - timedelta(seconds=1),
+        )
+        self.assertFalse(self.registry.is_harvesting)
+
+        # Act
+        owner = oai_registry_lease_api.acquire(
+            self.registry.id, OaiRegistryLease.HARVEST
+        )
+
+        # Assert
+        self.assertIsNotNone(owner)
+        self.assertEqual(
+            OaiRegistryLease.objects.get(registry=self.registry).owner, owner
+        )
+
+    def test_renew_by_another_owner_returns_false(self):
+        """test_renew_by_another_owner_returns_false"""
+        # Arrange
+        oai_registry_lease_api.acquire(
+            self.registry.id, OaiRegistryLease.UPDATE
+        )
+
+        # Act
+        result = oai_registry_lease_api.renew(
+            self.registry.id, OaiRegistryLease.UPDATE, "other"
+        )
+
+        # Assert
+        self.assertFalse(result)
+
+    def test_release_frees_lease(self):
+        """test_release_frees_lease"""
+        # Arrange
+        owner = oai_registry_lease_api.acquire(
+            self.registry.id, OaiRegistryLease.UPDATE
+        )
+
+        # Act
+        oai_registry_lease_api.release(
+            self.registry.id, OaiRegistryLease.UPDATE, owner
+        )
+
+        # Assert
+        self.assertFalse(self.registry.is_updating)
+
+    def test_hold_releases_lease_on_exit(self):
+        """test_hold_releases_lease_on_exit"""
+        # Act
+        with oai_registry_lease_api.hold(
+            self.registry.id, OaiRegistryLease.UPDATE
+        ) as lease:
+            is_updating = self.registry.is_updating
+
+        # Assert
+        self.assertFalse(lease.is_lost)
+        self.assertTrue(is_updating)
+        self.assertFalse(self.registry.is_updating)
+
+    def test_hold_held_lease_is_not_acquired(self):
+        """test_hold_held_lease_is_not_acquired"""
+        # Arrange
+        oai_registry_lease_api.acquire(
+            self.registry.id, OaiRegistryLease.UPDATE
+        )
+
+        # Act
+        with oai_registry_lease_api.hold(
+            self.registry.id, OaiRegistryLease.UPDATE
+        ) as lease:
+            pass
+
+        # Assert
+        self.assertIsNone(lease)
+        self.assertTrue(self.registry.is_updating)
+
+    @patch.object(oai_registry_lease_api, "OAI_HARVESTER_LEASE_DURATION", 0.03)
+    @patch.object(oai_registry_lease_api, "renew")
+    def test_lease_not_renewed_is_lost(self, mock_renew):
+        """test_lease_not_renewed_is_lost"""
+        # Arrange
+        mock_renew.return_value = False
+        lease = oai_registry_lease_api.HeldLease(
+            self.registry.id, OaiRegistryLease.HARVEST, "owner"
+        )
+        stop_event = threading.Event()
+
+        # Act
+        with self.assertLogs(oai_registry_lease_api.logger, "WARNING"):
+            heartbeat = threading.Thread(
+                target=oai_registry_lease_api._renew_until_stopped,
+                args=(lease, stop_event),
+            )
+            heartbeat.start()
+            heartbeat.join(timeout=5)
+
+        # Assert
+        self.assertFalse(heartbeat.is_alive())
+        self.assertTrue(lease.is_lost)
+
+    def test_listed_registries_do_not_query_their_leases(self):
+        """test_listed_registries_do_not_query_their_leases"""
+        # Arrange
+        oai_registry_lease_api.acquire(
+            self.registry.id, OaiRegistryLease.HARVEST
+        )
+
+        # Act
+        with self.assertNumQueries(1):
+            flags = [
+                (registry.is_harvesting, registry.is_updating)
+                for registry in oai_registry_api.get_all()
+            ]
+
+        # Assert
+        self.assertEqual(flags, [(True, False)])
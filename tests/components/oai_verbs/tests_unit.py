@@ -4,7 +4,7 @@
 import requests
 from rest_framework import status
 from unittest.case import TestCase
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import core_oaipmh_harvester_app.components.oai_verbs.api as oai_verbs_api
 from core_oaipmh_common_app.commons import exceptions as oai_pmh_exceptions
@@ -116,14 +116,14 @@ class TestListRecordsParameter(TestCase):
         self.from_ = "2017-04-24T02:00:00Z"
         self.until = "2018-04-24T02:00:00Z"
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_harvest_params(self, mock_get):
         """test_harvest_params"""
 
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = (
-            OaiPmhMock.mock_oai_response_list_records()
+        mock_get.return_value.iter_content.return_value = (
+            OaiPmhMock.mock_oai_response_list_records_chunks()
         )
         expected_params = {
             "verb": "ListRecords",
@@ -144,17 +144,20 @@ class TestListRecordsParameter(TestCase):
 
         # Assert
         mock_get.assert_called_with(
-            self.url, expected_params, verify=SSL_CERTIFICATES_DIR
+            self.url,
+            params=expected_params,
+            verify=SSL_CERTIFICATES_DIR,
+            stream=True,
         )
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_harvest_params_with_resumption_token(self, mock_get):
         """test_harvest_params_with_resumption_token"""
 
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = (
-            OaiPmhMock.mock_oai_response_list_records()
+        mock_get.return_value.iter_content.return_value = (
+            OaiPmhMock.mock_oai_response_list_records_chunks()
         )
         resumption_token = "h34fh"
         expected_params = {"verb": "ListRecords", "resumptionToken": "h34fh"}
@@ -171,10 +174,13 @@ class TestListRecordsParameter(TestCase):
 
         # Asset
         mock_get.assert_called_with(
-            self.url, expected_params, verify=SSL_CERTIFICATES_DIR
+            self.url,
+            params=expected_params,
+            verify=SSL_CERTIFICATES_DIR,
+            stream=True,
         )
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_harvest_params_returns_error_if_not_200_OK(self, mock_get):
         """test_harvest_params_returns_error_if_not_200_OK"""
 
@@ -193,7 +199,7 @@ class TestListRecordsParameter(TestCase):
         )
         self.assertEqual(result.status_code, status_code)
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_harvest_params_returns_error_if_404_not_found(self, mock_get):
         """test_harvest_params_returns_error_if_404_not_found"""
 
@@ -212,7 +218,7 @@ class TestListRecordsParameter(TestCase):
         )
         self.assertEqual(result.status_code, status_code)
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     def test_harvest_params_returns_serialized_data_and_resumption_token(
         self, mock_get
     ):
@@ -220,8 +226,8 @@ class TestListRecordsParameter(TestCase):
 
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = (
-            OaiPmhMock.mock_oai_response_list_records()
+        mock_get.return_value.iter_content.return_value = (
+            OaiPmhMock.mock_oai_response_list_records_chunks()
         )
         resumption_token = "h34fh"
 
@@ -239,3 +245,119 @@ class TestListRecordsParameter(TestCase):
         self.assertEqual(result.status_code, status.HTTP_200_OK)
         self.assertNotEqual(resumption_token, None)
         self.assertTrue(len(result.data), 1)
+
+
+class TestCheckRegistryInfo(TestCase):
+    """Test Check Registry Info"""
+
+    def setUp(self):
+        """setUp"""
+
+        super().setUp()
+        self.url = "http://dummy_url.com"
+
+    @staticmethod
+    def _mock_response(status_code, content=b"", headers=None):
+        """Return a mock response.
+
+        Args:
+            status_code: Status of the response.
+            content: Content of the response.
+            headers: Dict of the headers of the response.
+
+        Returns:
+            Mock response.
+
+        """
+        response = Mock()
+        response.status_code = status_code
+        response.content = content
+        response.headers = headers or {}
+        return response
+
+    @patch.object(requests.Session, "get")
+    def test_first_check_returns_changed(self, mock_get):
+        """test_first_check_returns_changed"""
+        # Arrange
+        mock_get.return_value = self._mock_response(
+            status.HTTP_200_OK, b"<OAI-PMH/>", {"ETag": '"abc"'}
+        )
+
+        # Act
+        changed, info_validators = oai_verbs_api.check_registry_info(
+            self.url, {}
+        )
+
+        # Assert
+        self.assertTrue(changed)
+        self.assertEqual(
+            list(info_validators), list(oai_verbs_api.REGISTRY_INFO_VERBS)
+        )
+        self.assertEqual(info_validators["Identify"]["etag"], '"abc"')
+
+    @patch.object(requests.Session, "get")
+    def test_same_content_with_new_response_date_returns_unchanged(
+        self, mock_get
+    ):
+        """test_same_content_with_new_response_date_returns_unchanged"""
+        # Arrange
+        mock_get.return_value = self._mock_response(
+            status.HTTP_200_OK,
+            b"<OAI-PMH><responseDate>2024-01-01T00:00:00Z</responseDate>"
+            b"<Identify/></OAI-PMH>",
+        )
+        _, info_validators = oai_verbs_api.check_registry_info(self.url, {})
+        mock_get.return_value = self._mock_response(
+            status.HTTP_200_OK,
+            b"<OAI-PMH><responseDate>2024-01-02T00:00:00Z</responseDate>"
+            b"<Identify/></OAI-PMH>",
+        )
+
+        # Act
+        changed, _ = oai_verbs_api.check_registry_info(
+            self.url, info_validators
+        )
+
+        # Assert
+        self.assertFalse(changed)
+
+    @patch.object(requests.Session, "get")
+    def test_not_modified_returns_unchanged(self, mock_get):
+        """test_not_modified_returns_unchanged"""
+        # Arrange
+        validators = {"etag": '"abc"', "digest": "123"}
+        info_validators = {
+            verb: validators for verb in oai_verbs_api.REGISTRY_INFO_VERBS
+        }
+        mock_get.return_value = self._mock_response(
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+        # Act
+        changed, result = oai_verbs_api.check_registry_info(
+            self.url, info_validators
+        )
+
+        # Assert
+        self.assertFalse(changed)
+        self.assertEqual(result, info_validators)
+        self.assertEqual(
+            mock_get.call_args.kwargs["headers"], {"If-None-Match": '"abc"'}
+        )
+
+    @patch.object(requests.Session, "get")
+    def test_error_returns_changed_without_validators(self, mock_get):
+        """test_error_returns_changed_without_validators"""
+        # Arrange
+        mock_get.return_value = self._mock_response(
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+        # Act
+        changed, info_validators = oai_verbs_api.check_registry_info(
+            self.url, {}
+        )
+
+        # Assert
+        self.assertTrue(changed)
+        self.assertEqual(info_validators, {})
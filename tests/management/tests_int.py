@@ -0,0 +1,73 @@
+""" Int Test management commands
+"""
+
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+
+from django.core.management import call_command, CommandError
+from django.test import override_settings
+
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+from tests.components.oai_registry.fixtures.fixtures import (
+    OaiPmhFixtures,
+    OaiPmhMock,
+)
+
+
+class TestExportOaiRecords(IntegrationBaseTestCase):
+    """Test export_oai_records"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        # Write the files of the records in the temporary directory
+        media_root_override = override_settings(
+            MEDIA_ROOT=os.path.join(self.tmp_dir, "media")
+        )
+        media_root_override.enable()
+        self.addCleanup(media_root_override.disable)
+        self.fixture.insert_registry(insert_records=False)
+        self.oai_records = [
+            oai_record
+            for oai_record in OaiPmhMock.mock_oai_record(version=1)
+            if not oai_record.deleted
+        ]
+        for oai_record in self.oai_records:
+            oai_record.title = oai_record.identifier
+            oai_record.registry = self.fixture.registry
+            oai_record.harvester_metadata_format = (
+                self.fixture.oai_metadata_formats[0]
+            )
+            oai_record.convert_and_save()
+
+    def test_export_tar_writes_one_file_per_record(self):
+        """test_export_tar_writes_one_file_per_record"""
+        # Arrange
+        output = os.path.join(self.tmp_dir, "export.tar")
+
+        # Act
+        call_command(
+            "export_oai_records",
+            str(self.fixture.registry.id),
+            export_format="tar",
+            output=output,
+        )
+
+        # Assert
+        with tarfile.open(output) as archive:
+            self.assertEqual(len(archive.getnames()), len(self.oai_records))
+
+    def test_export_unknown_registry_raises_command_error(self):
+        """test_export_unknown_registry_raises_command_error"""
+        # Act + Assert
+        with self.assertRaises(CommandError):
+            call_command("export_oai_records", "-1", stdout=io.StringIO())
@@ -1,8 +1,14 @@
 """ Int Test Rest OaiRegistry
 """
 
+import json
+import shutil
+import tempfile
+
 import requests
+from django.test import override_settings
 from rest_framework import status
+from rest_framework.test import APIRequestFactory
 from unittest.mock import patch
 
 from core_main_app.utils.integration_tests.integration_base_test_case import (
@@ -10,6 +16,9 @@ from core_main_app.utils.integration_tests.integration_base_test_case import (
 )
 from core_main_app.utils.tests_tools.MockUser import create_mock_user
 from core_main_app.utils.tests_tools.RequestMock import RequestMock
+from core_oaipmh_harvester_app.components.oai_harvest_metrics import (
+    api as oai_harvest_metrics_api,
+)
 from core_oaipmh_harvester_app.components.oai_verbs import api as oai_verbs_api
 from core_oaipmh_harvester_app.rest.oai_registry import (
     views as rest_oai_registry,
@@ -48,6 +57,23 @@ class TestSelectRegistry(IntegrationBaseTestCase):
         # Assert
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_select_registry_does_not_return_info_validators(self):
+        """test_select_registry_does_not_return_info_validators"""
+
+        # Arrange
+        user = create_mock_user("1", has_perm=True, is_staff=True)
+
+        # Act
+        response = RequestMock.do_request_get(
+            rest_oai_registry.RegistryDetail.as_view(),
+            user=user,
+            param=self.param,
+        )
+
+        # Assert
+        self.assertIn("info_updated_at", response.data)
+        self.assertNotIn("info_validators", response.data)
+
 
 class TestSelectAllRegistries(IntegrationBaseTestCase):
     """Test Select All Registries"""
@@ -88,7 +114,7 @@ class TestUpdateRegistryInfo(IntegrationBaseTestCase):
         self.fixture.insert_registry()
         self.param = {"registry_id": self.fixture.registry.id}
 
-    @patch.object(requests, "get")
+    @patch.object(requests.Session, "get")
     @patch.object(oai_verbs_api, "list_sets_as_object")
     @patch.object(oai_verbs_api, "list_metadata_formats_as_object")
     @patch.object(oai_verbs_api, "identify_as_object")
@@ -229,3 +255,206 @@ class TestDeleteRegistry(IntegrationBaseTestCase):
 
         # Assert
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    @patch.object(rest_oai_registry, "purge_registry_task")
+    def test_delete_registry_with_purge_queues_task(
+        self, mock_purge_registry_task
+    ):
+        """test_delete_registry_with_purge_queues_task"""
+        # Arrange
+        mock_purge_registry_task.apply_async.return_value.id = "task_id"
+
+        request = APIRequestFactory().delete("/dummy_url?purge=true")
+        request.user = create_mock_user("1", is_staff=True)
+
+        # Act
+        response = rest_oai_registry.RegistryDetail.as_view()(
+            request, **self.param
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data, {"task_id": "task_id"})
+        mock_purge_registry_task.apply_async.assert_called_once_with(
+            (self.param["registry_id"],)
+        )
+
+
+class TestHarvestProgress(IntegrationBaseTestCase):
+    """Test Harvest Progress"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+
+        super().setUp()
+        self.fixture.insert_registry(insert_records=False)
+        self.param = {"registry_id": self.fixture.registry.id}
+
+    def test_harvest_progress_returns_metrics(self):
+        """test_harvest_progress_returns_metrics"""
+
+        # Arrange
+        user = create_mock_user("1", has_perm=True, is_staff=True)
+        oai_harvest_metrics_api.harvest_started(self.fixture.registry.id)
+        oai_harvest_metrics_api.add(
+            self.fixture.registry.id,
+            {"pages_fetched": 2},
+            cursor=50,
+            complete_list_size=200,
+        )
+
+        # Act
+        response = RequestMock.do_request_get(
+            rest_oai_registry.HarvestProgress.as_view(),
+            user=user,
+            param=self.param,
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["pages_fetched"], 2)
+        self.assertEqual(response.data["progress"], 0.25)
+
+    def test_harvest_progress_of_registry_never_harvested(self):
+        """test_harvest_progress_of_registry_never_harvested"""
+
+        # Arrange
+        user = create_mock_user("1", has_perm=True, is_staff=True)
+
+        # Act
+        response = RequestMock.do_request_get(
+            rest_oai_registry.HarvestProgress.as_view(),
+            user=user,
+            param=self.param,
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["pages_fetched"], 0)
+        self.assertIsNone(response.data["progress"])
+
+
+class TestHarvestMetricsExport(IntegrationBaseTestCase):
+    """Test Harvest Metrics Export"""
+
+    fixture = OaiPmhFixtures()
+
+    def test_harvest_metrics_export_returns_prometheus_text(self):
+        """test_harvest_metrics_export_returns_prometheus_text"""
+
+        # Arrange
+        self.fixture.insert_registry(insert_records=False)
+        user = create_mock_user("1", has_perm=True, is_staff=True)
+        oai_harvest_metrics_api.add(
+            self.fixture.registry.id, {"records_inserted": 3}
+        )
+
+        # Act
+        response = RequestMock.do_request_get(
+            rest_oai_registry.HarvestMetricsExport.as_view(), user
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            f'oai_harvester_records_inserted_total{{registry_id="'
+            f'{self.fixture.registry.id}",registry="'
+            f'{self.fixture.registry.name}"}} 3',
+            response.content.decode(),
+        )
+
+
+class TestExportRecords(IntegrationBaseTestCase):
+    """Test Export Records"""
+
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        # Write the files of the records in a temporary directory
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_root_override = override_settings(MEDIA_ROOT=media_root)
+        media_root_override.enable()
+        self.addCleanup(media_root_override.disable)
+        self.fixture.insert_registry(insert_records=False)
+        for oai_record in OaiPmhMock.mock_oai_record(version=1):
+            oai_record.title = oai_record.identifier
+            oai_record.registry = self.fixture.registry
+            oai_record.harvester_metadata_format = (
+                self.fixture.oai_metadata_formats[0]
+            )
+            oai_record.convert_and_save()
+        self.param = {"registry_id": self.fixture.registry.id}
+        self.user = create_mock_user("1", has_perm=True, is_staff=True)
+
+    def test_export_records_streams_ndjson(self):
+        """test_export_records_streams_ndjson"""
+
+        # Act
+        response = RequestMock.do_request_get(
+            rest_oai_registry.ExportRecords.as_view(),
+            user=self.user,
+            param=self.param,
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [line["identifier"] for line in lines],
+            [
+                oai_record.identifier
+                for oai_record in OaiPmhMock.mock_oai_record(version=1)
+                if not oai_record.deleted
+            ],
+        )
+        self.assertTrue(all(line["xml_content"] for line in lines))
+
+    def test_export_records_of_unknown_metadata_format_is_empty(self):
+        """test_export_records_of_unknown_metadata_format_is_empty"""
+
+        # Act
+        response = RequestMock.do_request_get(
+            rest_oai_registry.ExportRecords.as_view(),
+            user=self.user,
+            param=self.param,
+            data={"metadata_format": self.fixture.oai_metadata_formats[1].id},
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), b"")
+
+    def test_export_records_unsupported_format_returns_400(self):
+        """test_export_records_unsupported_format_returns_400"""
+
+        # Act
+        response = RequestMock.do_request_get(
+            rest_oai_registry.ExportRecords.as_view(),
+            user=self.user,
+            param=self.param,
+            data={"export_format": "csv"},
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_records_unknown_registry_returns_404(self):
+        """test_export_records_unknown_registry_returns_404"""
+
+        # Act
+        response = RequestMock.do_request_get(
+            rest_oai_registry.ExportRecords.as_view(),
+            user=self.user,
+            param={"registry_id": -1},
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -9,6 +9,9 @@ from core_main_app.commons import exceptions
 from core_main_app.utils.datetime import datetime_now
 from core_main_app.utils.tests_tools.MockUser import create_mock_user
 from core_main_app.utils.tests_tools.RequestMock import RequestMock
+from core_oaipmh_harvester_app.components.oai_harvest_metrics import (
+    api as oai_harvest_metrics_api,
+)
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import (
     api as oai_harvester_metadata_format_api,
 )
@@ -21,6 +24,9 @@ from core_oaipmh_harvester_app.components.oai_registry import (
 from core_oaipmh_harvester_app.components.oai_registry.models import (
     OaiRegistry,
 )
+from core_oaipmh_harvester_app.components.oai_registry_lease import (
+    api as oai_registry_lease_api,
+)
 from core_oaipmh_harvester_app.rest.oai_registry import (
     views as rest_oai_registry,
 )
@@ -397,6 +403,9 @@ class TestHarvestRegistry(TestCase):
         super().setUp()
         self.param = {"registry_id": 1}
 
+    @patch.object(oai_harvest_metrics_api, "add")
+    @patch.object(oai_registry_api, "_retry_quarantined_records")
+    @patch.object(oai_registry_lease_api, "hold")
     @patch.object(OaiRegistry, "get_by_id")
     @patch.object(oai_registry_api, "_harvest_by_metadata_formats")
     @patch.object(oai_harvester_set_api, "get_all_to_harvest_by_registry_id")
@@ -411,6 +420,9 @@ class TestHarvestRegistry(TestCase):
         mock_sets_to_harvest,
         mock_harvest_by_metadata_formats,
         mock_get_by_id,
+        mock_hold,
+        mock_retry_quarantined_records,
+        mock_add_metrics,
     ):
         """test_harvest_registry"""
 
@@ -493,9 +505,6 @@ def _set_oai_registry_fields(oai_registry):
     oai_registry.description = "This is the registry"
     oai_registry.harvest = True
     oai_registry.last_update = datetime_now()
-    oai_registry.is_harvesting = False
-    oai_registry.is_updating = False
     oai_registry.is_activated = True
-    oai_registry.is_queued = True
 
     return oai_registry
@@ -42,6 +42,7 @@ class TestOaiRecordUpsert(TestCase):
 class MockOaiRecord(Mock):
     """Mock Oai Record"""
 
+    pk = None
     identifier = "oai:test/id.0006"
     last_modification_date = datetime_now()
     deleted = False
@@ -49,13 +50,14 @@ class MockOaiRecord(Mock):
     harvester_metadata_format = OaiHarvesterMetadataFormat()
     registry = OaiRegistry()
     xml_content = "<test><message>Hello</message></test>"
+    _content = None
 
     def __init__(self, save_failed=False):
         super().__init__()
         self.save_failed = save_failed
 
-    def convert_and_save(self):
-        """convert_and_save
+    def save(self):
+        """save
 
         Returns:
         """
@@ -4,23 +4,24 @@
 from unittest import TestCase
 from unittest.mock import patch
 
-from core_oaipmh_harvester_app.tasks import init_harvest
+from celery.exceptions import Retry
+
+from core_main_app.commons.exceptions import DoesNotExist
+from core_oaipmh_harvester_app.tasks import (
+    init_harvest,
+    purge_registry_task,
+    watch_registry_harvest_task,
+)
 
 
 class TestInitHarvest(TestCase):
     """Test Init Harvest"""
 
-    @patch(
-        "core_oaipmh_harvester_app.components.oai_registry.api.get_all_activated_registry"
-    )
     @patch("core_oaipmh_harvester_app.tasks.watch_registry_harvest_task")
     def test_init_harvest_calls_harvest_task(
-        self, mock_watch_registry_harvest_task, mock_get_all_activated_registry
+        self, mock_watch_registry_harvest_task
     ):
         """test_init_harvest_calls_harvest_task"""
-        # Arrange
-        mock_get_all_activated_registry.return_value = []
-
         # Act
         init_harvest()
 
@@ -28,3 +29,83 @@ class TestInitHarvest(TestCase):
         self.assertEqual(
             mock_watch_registry_harvest_task.apply_async.call_count, 1
         )
+
+
+class TestWatchRegistryHarvestTask(TestCase):
+    """Test Watch Registry Harvest Task"""
+
+    @patch(
+        "core_oaipmh_harvester_app.components.oai_registry.api.claim_registries_due_for_harvest"
+    )
+    @patch("core_oaipmh_harvester_app.tasks.harvest_task")
+    @patch("core_oaipmh_harvester_app.tasks.watch_registry_harvest_task")
+    def test_watch_queues_claimed_registries(
+        self,
+        mock_watch_registry_harvest_task,
+        mock_harvest_task,
+        mock_claim_registries_due_for_harvest,
+    ):
+        """test_watch_queues_claimed_registries"""
+        # Arrange
+        mock_claim_registries_due_for_harvest.return_value = [1, 2]
+
+        # Act
+        watch_registry_harvest_task.run()
+
+        # Assert
+        mock_harvest_task.apply_async.assert_any_call(("1",))
+        mock_harvest_task.apply_async.assert_any_call(("2",))
+        self.assertEqual(mock_harvest_task.apply_async.call_count, 2)
+
+
+class TestPurgeRegistryTask(TestCase):
+    """Test Purge Registry Task"""
+
+    @patch("core_oaipmh_harvester_app.components.oai_registry.api.purge")
+    @patch("core_oaipmh_harvester_app.components.oai_registry.api.get_by_id")
+    def test_purge_returns_deleted_records(self, mock_get_by_id, mock_purge):
+        """test_purge_returns_deleted_records"""
+        # Arrange
+        mock_purge.return_value = 3
+
+        # Act
+        result = purge_registry_task.run("1")
+
+        # Assert
+        self.assertEqual(result, {"deleted": 3})
+        mock_purge.assert_called_once()
+
+    @patch("core_oaipmh_harvester_app.components.oai_registry.api.purge")
+    @patch("core_oaipmh_harvester_app.components.oai_registry.api.get_by_id")
+    def test_purge_is_retried_if_registry_is_being_harvested(
+        self, mock_get_by_id, mock_purge
+    ):
+        """test_purge_is_retried_if_registry_is_being_harvested"""
+        # Arrange
+        mock_purge.return_value = None
+
+        # Act
+        with patch.object(
+            purge_registry_task, "retry", side_effect=Retry()
+        ) as mock_retry:
+            with self.assertRaises(Retry):
+                purge_registry_task.run("1")
+
+        # Assert
+        mock_retry.assert_called_once()
+
+    @patch("core_oaipmh_harvester_app.components.oai_registry.api.purge")
+    @patch("core_oaipmh_harvester_app.components.oai_registry.api.get_by_id")
+    def test_purge_of_deleted_registry_does_nothing(
+        self, mock_get_by_id, mock_purge
+    ):
+        """test_purge_of_deleted_registry_does_nothing"""
+        # Arrange
+        mock_get_by_id.side_effect = DoesNotExist("error")
+
+        # Act
+        result = purge_registry_task.run("1")
+
+        # Assert
+        self.assertEqual(result, {"deleted": 0})
+        mock_purge.assert_not_called()
@@ -0,0 +1,110 @@
+"""
+    Export operations test class
+"""
+
+import io
+import json
+import tarfile
+from unittest import TestCase
+from unittest.mock import Mock
+
+from lxml import etree
+
+from core_main_app.utils.datetime import datetime_now
+from core_oaipmh_harvester_app.utils import export_operations
+
+
+def _mock_oai_record(identifier, xml_content):
+    """Return a mock record.
+
+    Args:
+        identifier: Identifier of the record.
+        xml_content: Xml content of the record.
+
+    Returns:
+        Mock record.
+
+    """
+    oai_record = Mock()
+    oai_record.identifier = identifier
+    oai_record.xml_content = xml_content
+    oai_record.last_modification_date = datetime_now()
+    oai_record.harvester_metadata_format.metadata_prefix = "oai_dc"
+    harvester_set = Mock()
+    harvester_set.set_spec = "set_a"
+    oai_record.harvester_sets.all.return_value = [harvester_set]
+    return oai_record
+
+
+class TestExportRecords(TestCase):
+    """Test Export Records"""
+
+    def setUp(self):
+        """setUp"""
+        self.oai_records = [
+            _mock_oai_record(
+                "oai:test/id.1",
+                '<?xml version="1.0" encoding="UTF-8"?><a>1</a>',
+            ),
+            _mock_oai_record("oai:test/id.2", "<a>2</a>"),
+        ]
+
+    def test_export_ndjson_returns_one_line_per_record(self):
+        """test_export_ndjson_returns_one_line_per_record"""
+        # Act
+        result = b"".join(
+            export_operations.export_records(
+                self.oai_records, export_operations.NDJSON
+            )
+        )
+
+        # Assert
+        lines = [json.loads(line) for line in result.splitlines()]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1]["identifier"], "oai:test/id.2")
+        self.assertEqual(lines[1]["sets"], ["set_a"])
+        self.assertEqual(lines[1]["xml_content"], "<a>2</a>")
+
+    def test_export_tar_returns_one_file_per_record(self):
+        """test_export_tar_returns_one_file_per_record"""
+        # Act
+        result = b"".join(
+            export_operations.export_records(
+                self.oai_records, export_operations.TAR
+            )
+        )
+
+        # Assert
+        with tarfile.open(fileobj=io.BytesIO(result)) as archive:
+            self.assertEqual(
+                archive.getnames(),
+                [
+                    "oai_dc/oai%3Atest%2Fid.1.xml",
+                    "oai_dc/oai%3Atest%2Fid.2.xml",
+                ],
+            )
+            self.assertEqual(
+                archive.extractfile("oai_dc/oai%3Atest%2Fid.2.xml").read(),
+                b"<a>2</a>",
+            )
+
+    def test_export_xml_returns_well_formed_document(self):
+        """test_export_xml_returns_well_formed_document"""
+        # Act
+        result = b"".join(
+            export_operations.export_records(
+                self.oai_records, export_operations.XML
+            )
+        )
+
+        # Assert
+        root = etree.fromstring(result)
+        self.assertEqual(len(root), 2)
+        self.assertEqual(root[0].get("identifier"), "oai:test/id.1")
+        self.assertEqual(root[0][0].text, "1")
+
+    def test_export_unsupported_format_raises_value_error(self):
+        """test_export_unsupported_format_raises_value_error"""
+        # Act + Assert
+        with self.assertRaises(ValueError):
+            export_operations.export_records(self.oai_records, "csv")
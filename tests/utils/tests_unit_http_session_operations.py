@@ -0,0 +1,279 @@
+"""
+    HTTP session operations test class
+"""
+
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+import requests
+
+from core_oaipmh_harvester_app.utils import (
+    http_session_operations,
+    rate_limit_operations,
+    sickle_operations,
+)
+
+
+def _mock_response(status_code, headers=None):
+    """Return a mock response.
+
+    Args:
+        status_code: Status of the response.
+        headers: Dict of the headers of the response.
+
+    Returns:
+        Mock response.
+
+    """
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class TestGetSession(TestCase):
+    """Test Get Session"""
+
+    def setUp(self):
+        """setUp"""
+        http_session_operations.clear_sessions()
+
+    def tearDown(self):
+        """tearDown"""
+        http_session_operations.clear_sessions()
+
+    def test_get_session_returns_same_session_for_same_host(self):
+        """test_get_session_returns_same_session_for_same_host"""
+        # Act
+        first_session = http_session_operations.get_session(
+            "http://www.server.com/oai/pmh"
+        )
+        second_session = http_session_operations.get_session(
+            "http://www.server.com/schema.xsd"
+        )
+
+        # Assert
+        self.assertIs(first_session, second_session)
+
+    def test_get_session_returns_different_sessions_for_different_hosts(
+        self,
+    ):
+        """test_get_session_returns_different_sessions_for_different_hosts"""
+        # Act
+        first_session = http_session_operations.get_session(
+            "http://www.server.com/oai/pmh"
+        )
+        second_session = http_session_operations.get_session(
+            "http://www.other-server.com/oai/pmh"
+        )
+
+        # Assert
+        self.assertIsNot(first_session, second_session)
+
+    def test_get_session_accepts_compressed_responses(self):
+        """test_get_session_accepts_compressed_responses"""
+        # Act
+        session = http_session_operations.get_session(
+            "http://www.server.com/oai/pmh"
+        )
+
+        # Assert
+        self.assertIn("gzip", session.headers["Accept-Encoding"])
+
+
+@patch.object(rate_limit_operations, "OAI_HARVESTER_RATE_LIMIT", 0)
+@patch.object(http_session_operations.time, "sleep")
+@patch.object(requests.Session, "get")
+class TestSendGetRequest(TestCase):
+    """Test Send Get Request"""
+
+    def test_send_get_request_returns_response(self, mock_get, mock_sleep):
+        """test_send_get_request_returns_response"""
+        # Arrange
+        mock_get.return_value = _mock_response(200)
+
+        # Act
+        response = http_session_operations.send_get_request(
+            "http://www.server.com"
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        mock_sleep.assert_not_called()
+
+    def test_send_get_request_retries_503_after_retry_after(
+        self, mock_get, mock_sleep
+    ):
+        """test_send_get_request_retries_503_after_retry_after"""
+        # Arrange
+        mock_get.side_effect = [
+            _mock_response(503, {"Retry-After": "7"}),
+            _mock_response(200),
+        ]
+
+        # Act
+        response = http_session_operations.send_get_request(
+            "http://www.server.com"
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        mock_sleep.assert_called_once_with(7)
+
+    def test_send_get_request_retries_connection_error(
+        self, mock_get, mock_sleep
+    ):
+        """test_send_get_request_retries_connection_error"""
+        # Arrange
+        mock_get.side_effect = [
+            requests.ConnectionError(),
+            _mock_response(200),
+        ]
+
+        # Act
+        response = http_session_operations.send_get_request(
+            "http://www.server.com"
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    def test_send_get_request_returns_error_after_max_retries(
+        self, mock_get, mock_sleep
+    ):
+        """test_send_get_request_returns_error_after_max_retries"""
+        # Arrange
+        mock_get.return_value = _mock_response(429)
+
+        # Act
+        response = http_session_operations.send_get_request(
+            "http://www.server.com"
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(
+            mock_get.call_count,
+            http_session_operations.OAI_HARVESTER_MAX_RETRIES + 1,
+        )
+
+    def test_send_get_request_does_not_retry_long_retry_after(
+        self, mock_get, mock_sleep
+    ):
+        """test_send_get_request_does_not_retry_long_retry_after"""
+        # Arrange
+        mock_get.return_value = _mock_response(503, {"Retry-After": "86400"})
+
+        # Act
+        response = http_session_operations.send_get_request(
+            "http://www.server.com"
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_send_get_request_does_not_retry_500(self, mock_get, mock_sleep):
+        """test_send_get_request_does_not_retry_500"""
+        # Arrange
+        mock_get.return_value = _mock_response(500)
+
+        # Act
+        http_session_operations.send_get_request("http://www.server.com")
+
+        # Assert
+        self.assertEqual(mock_get.call_count, 1)
+
+
+class TestPooledSickle(TestCase):
+    """Test Pooled Sickle"""
+
+    @patch.object(requests.Session, "get")
+    def test_sickle_requests_use_host_session(self, mock_get):
+        """test_sickle_requests_use_host_session"""
+        # Arrange
+        sickle = sickle_operations._sickle_init("http://www.server.com")
+
+        # Act
+        sickle._request({"verb": "Identify"})
+
+        # Assert
+        mock_get.assert_called_with(
+            "http://www.server.com",
+            params={"verb": "Identify"},
+            verify=sickle_operations.SSL_CERTIFICATES_DIR,
+        )
+
+    @patch.object(http_session_operations, "send_get_request")
+    def test_sickle_get_requests_are_rate_limited_and_retried(
+        self, mock_send_get_request
+    ):
+        """test_sickle_get_requests_are_rate_limited_and_retried"""
+        # Arrange
+        sickle = sickle_operations._sickle_init("http://www.server.com")
+
+        # Act
+        sickle._request({"verb": "Identify"})
+
+        # Assert
+        mock_send_get_request.assert_called_once_with(
+            "http://www.server.com",
+            params={"verb": "Identify"},
+            verify=sickle_operations.SSL_CERTIFICATES_DIR,
+        )
+
+
+class TestConditionalRequests(TestCase):
+    """Test the validators of the conditional requests"""
+
+    def test_get_validators_returns_etag_and_last_modified(self):
+        """test_get_validators_returns_etag_and_last_modified"""
+        # Arrange
+        response = _mock_response(
+            200,
+            {
+                "ETag": '"abc"',
+                "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+            },
+        )
+
+        # Act
+        result = http_session_operations.get_validators(response)
+
+        # Assert
+        self.assertEqual(
+            result,
+            {
+                "etag": '"abc"',
+                "last_modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+            },
+        )
+
+    def test_get_validators_without_headers_returns_empty_dict(self):
+        """test_get_validators_without_headers_returns_empty_dict"""
+        # Act
+        result = http_session_operations.get_validators(_mock_response(200))
+
+        # Assert
+        self.assertEqual(result, {})
+
+    def test_get_conditional_headers(self):
+        """test_get_conditional_headers"""
+        # Act
+        result = http_session_operations.get_conditional_headers(
+            {
+                "etag": '"abc"',
+                "last_modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+                "digest": "123",
+            }
+        )
+
+        # Assert
+        self.assertEqual(
+            result,
+            {
+                "If-None-Match": '"abc"',
+                "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+            },
+        )
@@ -0,0 +1,234 @@
+"""
+    List records parser test class
+"""
+
+from unittest import TestCase
+from unittest.mock import patch
+
+import os
+
+from core_oaipmh_harvester_app.utils import list_records_parser
+from core_oaipmh_harvester_app.utils.list_records_parser import (
+    ListRecordsParser,
+)
+
+DUMP_OAI_PMH_TEST_PATH = os.path.join(os.path.dirname(__file__), "data")
+
+LIST_RECORDS_RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">
+  <ListRecords>
+    <record>
+      <header>
+        <identifier>oai:id/1</identifier>
+        <datestamp>2017-04-24T18:01:08Z</datestamp>
+        <setSpec>demo</setSpec>
+        <setSpec>all</setSpec>
+      </header>
+      <metadata><root xmlns=""><value>1</value></root></metadata>
+    </record>
+    <record>
+      <header status="deleted">
+        <identifier>oai:id/2</identifier>
+        <datestamp>2017-04-25T18:01:08Z</datestamp>
+      </header>
+    </record>
+    <resumptionToken cursor="0" completeListSize="2">{0}</resumptionToken>
+  </ListRecords>
+</OAI-PMH>"""
+
+
+class TestListRecordsParser(TestCase):
+    """Test List Records Parser"""
+
+    def test_parse_returns_records(self):
+        """test_parse_returns_records"""
+        # Arrange
+        parser = ListRecordsParser("oai_demo")
+
+        # Act
+        result = list(parser.parse([LIST_RECORDS_RESPONSE.encode()]))
+
+        # Assert
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0]["identifier"], "oai:id/1")
+        self.assertEqual(result[0]["datestamp"], "2017-04-24T18:01:08Z")
+        self.assertEqual(result[0]["sets"], ["demo", "all"])
+        self.assertEqual(result[0]["metadataPrefix"], "oai_demo")
+        self.assertFalse(result[0]["deleted"])
+        self.assertEqual(
+            result[0]["metadata"], '<root xmlns=""><value>1</value></root>'
+        )
+        self.assertEqual(
+            list_records_parser.get_dict_content(result[0]),
+            {"root": {"@xmlns": "", "value": 1}},
+        )
+
+    def test_parse_returns_deleted_records_without_metadata(self):
+        """test_parse_returns_deleted_records_without_metadata"""
+        # Arrange
+        parser = ListRecordsParser("oai_demo")
+
+        # Act
+        result = list(parser.parse([LIST_RECORDS_RESPONSE.encode()]))
+
+        # Assert
+        self.assertTrue(result[1]["deleted"])
+        self.assertIsNone(result[1]["metadata"])
+        self.assertIsNone(list_records_parser.get_dict_content(result[1]))
+        self.assertEqual(result[1]["sets"], [])
+
+    @patch.object(list_records_parser, "element_to_dict")
+    def test_parse_does_not_convert_dict_content(self, mock_element_to_dict):
+        """test_parse_does_not_convert_dict_content"""
+        # Arrange
+        parser = ListRecordsParser("oai_demo")
+
+        # Act
+        list(parser.parse([LIST_RECORDS_RESPONSE.encode()]))
+
+        # Assert
+        mock_element_to_dict.assert_not_called()
+
+    @patch.object(list_records_parser, "element_to_dict")
+    def test_get_dict_content_converts_metadata_once(
+        self, mock_element_to_dict
+    ):
+        """test_get_dict_content_converts_metadata_once"""
+        # Arrange
+        parser = ListRecordsParser("oai_demo")
+        record = list(parser.parse([LIST_RECORDS_RESPONSE.encode()]))[0]
+
+        # Act
+        list_records_parser.get_dict_content(record)
+        result = list_records_parser.get_dict_content(record)
+
+        # Assert
+        self.assertEqual(result, mock_element_to_dict.return_value)
+        mock_element_to_dict.assert_called_once()
+
+    @patch.object(list_records_parser.etree, "tounicode")
+    def test_parse_does_not_serialize_records(self, mock_tounicode):
+        """test_parse_does_not_serialize_records"""
+        # Arrange
+        parser = ListRecordsParser("oai_demo")
+
+        # Act
+        list(parser.parse([LIST_RECORDS_RESPONSE.encode()]))
+
+        # Assert
+        mock_tounicode.assert_not_called()
+
+    def test_get_raw_returns_record_xml(self):
+        """test_get_raw_returns_record_xml"""
+        # Arrange
+        parser = ListRecordsParser("oai_demo")
+        record = list(parser.parse([LIST_RECORDS_RESPONSE.encode()]))[0]
+
+        # Act
+        result = list_records_parser.get_raw(record)
+
+        # Assert
+        self.assertEqual(
+            list_records_parser.parse_record(result, "oai_demo")["metadata"],
+            record["metadata"],
+        )
+
+    def test_parse_sets_resumption_token(self):
+        """test_parse_sets_resumption_token"""
+        # Arrange
+        parser = ListRecordsParser("oai_demo")
+
+        # Act
+        list(
+            parser.parse(
+                [LIST_RECORDS_RESPONSE.replace("{0}", " token\n").encode()]
+            )
+        )
+
+        # Assert
+        self.assertEqual(parser.resumption_token, "token")
+
+    def test_parse_sets_empty_resumption_token_on_last_page(self):
+        """test_parse_sets_empty_resumption_token_on_last_page"""
+        # Arrange
+        parser = ListRecordsParser("oai_demo")
+
+        # Act
+        list(parser.parse([LIST_RECORDS_RESPONSE.replace("{0}", "").encode()]))
+
+        # Assert
+        self.assertEqual(parser.resumption_token, "")
+
+    def test_parse_sets_resumption_token_attributes(self):
+        """test_parse_sets_resumption_token_attributes"""
+        # Arrange
+        parser = ListRecordsParser("oai_demo")
+
+        # Act
+        list(parser.parse([LIST_RECORDS_RESPONSE.encode()]))
+
+        # Assert
+        self.assertEqual(parser.cursor, 0)
+        self.assertEqual(parser.complete_list_size, 2)
+        self.assertIsNone(parser.expiration_date)
+
+    def test_parse_sets_oai_pmh_error(self):
+        """test_parse_sets_oai_pmh_error"""
+        # Arrange
+        parser = ListRecordsParser("oai_demo")
+        response = (
+            '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">'
+            '<error code="badResumptionToken">Expired</error></OAI-PMH>'
+        )
+
+        # Act
+        records = list(parser.parse([response.encode()]))
+
+        # Assert
+        self.assertEqual(records, [])
+        self.assertEqual(parser.error_code, "badResumptionToken")
+        self.assertEqual(parser.error_message, "Expired")
+
+    def test_parse_does_not_depend_on_chunk_size(self):
+        """test_parse_does_not_depend_on_chunk_size"""
+        # Arrange
+        with open(
+            os.path.join(
+                DUMP_OAI_PMH_TEST_PATH, "response_list_records_oai_demo.xml"
+            ),
+            "rb",
+        ) as file:
+            data = file.read()
+
+        # Act
+        parser = ListRecordsParser("oai_demo")
+        records = list(parser.parse([data]))
+        chunked_parser = ListRecordsParser("oai_demo")
+        chunked_records = list(
+            chunked_parser.parse(
+                [data[index : index + 7] for index in range(0, len(data), 7)]
+            )
+        )
+
+        # Assert
+        self.assertEqual(
+            [_get_comparable_record(record) for record in records],
+            [_get_comparable_record(record) for record in chunked_records],
+        )
+        self.assertEqual(
+            parser.resumption_token, chunked_parser.resumption_token
+        )
+
+
+def _get_comparable_record(record):
+    """Get a record with its dict content instead of its parsed element.
+
+    Args:
+        record: Representation of an Oai-Pmh record object.
+
+    Returns:
+        Dict.
+
+    """
+    list_records_parser.get_dict_content(record)
+    return {key: value for key, value in record.items() if key != "element"}
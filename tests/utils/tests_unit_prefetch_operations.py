@@ -0,0 +1,72 @@
+"""
+    Prefetch operations test class
+"""
+
+import threading
+from unittest import TestCase
+
+from core_oaipmh_harvester_app.utils.prefetch_operations import prefetch
+
+
+class TestPrefetch(TestCase):
+    """Test Prefetch"""
+
+    def test_prefetch_returns_items_in_order(self):
+        """test_prefetch_returns_items_in_order"""
+        # Act
+        result = list(prefetch(iter(range(10)), 2))
+
+        # Assert
+        self.assertEqual(result, list(range(10)))
+
+    def test_prefetch_produces_items_in_another_thread(self):
+        """test_prefetch_produces_items_in_another_thread"""
+
+        # Arrange
+        def _items():
+            yield threading.current_thread()
+
+        # Act
+        result = list(prefetch(_items(), 1))
+
+        # Assert
+        self.assertNotEqual(result[0], threading.current_thread())
+
+    def test_prefetch_does_not_produce_more_than_queue_size_in_advance(self):
+        """test_prefetch_does_not_produce_more_than_queue_size_in_advance"""
+        # Arrange
+        produced = []
+        third_item_requested = threading.Event()
+
+        def _items():
+            for index in range(10):
+                if index == 3:
+                    third_item_requested.set()
+                produced.append(index)
+                yield index
+
+        # Act
+        items = prefetch(_items(), 2)
+        next(items)
+        third_item_requested.wait(timeout=5)
+
+        # Assert
+        # One item consumed, two queued and one waiting for a free slot
+        self.assertLessEqual(len(produced), 4)
+        items.close()
+
+    def test_prefetch_raises_producer_exception(self):
+        """test_prefetch_raises_producer_exception"""
+
+        # Arrange
+        def _items():
+            yield 1
+            raise ValueError("error")
+
+        # Act
+        items = prefetch(_items(), 2)
+
+        # Assert
+        self.assertEqual(next(items), 1)
+        with self.assertRaises(ValueError):
+            next(items)
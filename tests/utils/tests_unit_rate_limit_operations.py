@@ -0,0 +1,206 @@
+"""
+    Rate limit operations test class
+"""
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from core_oaipmh_harvester_app.utils import rate_limit_operations
+from core_oaipmh_harvester_app.utils.rate_limit_operations import (
+    HostRateLimiter,
+)
+
+
+class TestHostRateLimiter(TestCase):
+    """Test Host Rate Limiter"""
+
+    def setUp(self):
+        """setUp"""
+        self.limiter = HostRateLimiter(
+            max_rate=10, min_rate=0.5, latency_factor=2
+        )
+
+    def test_acquire_within_burst_does_not_wait(self):
+        """test_acquire_within_burst_does_not_wait"""
+        # Act
+        with patch.object(rate_limit_operations.time, "sleep") as mock_sleep:
+            for _ in range(10):
+                self.limiter.acquire()
+
+        # Assert
+        mock_sleep.assert_not_called()
+
+    def test_acquire_beyond_burst_waits(self):
+        """test_acquire_beyond_burst_waits"""
+        # Arrange
+        self.limiter.tokens = 0.0
+
+        # Act
+        with patch.object(rate_limit_operations.time, "sleep") as mock_sleep:
+            mock_sleep.side_effect = lambda wait: setattr(
+                self.limiter, "tokens", 1.0
+            )
+            self.limiter.acquire()
+
+        # Assert
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 0.1, places=2)
+
+    def test_acquire_waits_retry_after(self):
+        """test_acquire_waits_retry_after"""
+        # Arrange
+        self.limiter.on_error(retry_after=30)
+
+        # Act
+        with patch.object(rate_limit_operations.time, "sleep") as mock_sleep:
+            mock_sleep.side_effect = lambda wait: setattr(
+                self.limiter, "blocked_until", 0.0
+            )
+            self.limiter.acquire()
+
+        # Assert
+        self.assertAlmostEqual(
+            mock_sleep.call_args_list[0][0][0], 30, places=0
+        )
+
+    def test_on_error_halves_rate(self):
+        """test_on_error_halves_rate"""
+        # Act
+        self.limiter.on_error()
+
+        # Assert
+        self.assertEqual(self.limiter.rate, 5)
+
+    def test_on_error_does_not_go_under_min_rate(self):
+        """test_on_error_does_not_go_under_min_rate"""
+        # Act
+        for _ in range(10):
+            self.limiter.on_error()
+
+        # Assert
+        self.assertEqual(self.limiter.rate, 0.5)
+
+    def test_on_success_increases_rate_up_to_max_rate(self):
+        """test_on_success_increases_rate_up_to_max_rate"""
+        # Arrange
+        self.limiter.on_error()
+
+        # Act
+        for _ in range(100):
+            self.limiter.on_success(0.05)
+
+        # Assert
+        self.assertEqual(self.limiter.rate, 10)
+
+    def test_on_success_with_high_latency_decreases_rate(self):
+        """test_on_success_with_high_latency_decreases_rate"""
+        # Arrange
+        self.limiter.on_success(0.5)
+
+        # Act
+        for _ in range(5):
+            self.limiter.on_success(5)
+
+        # Assert
+        self.assertLess(self.limiter.rate, 10)
+
+    def test_on_success_with_low_latency_noise_keeps_rate(self):
+        """test_on_success_with_low_latency_noise_keeps_rate"""
+        # Arrange
+        self.limiter.on_success(0.001)
+
+        # Act
+        for _ in range(5):
+            self.limiter.on_success(0.05)
+
+        # Assert
+        self.assertEqual(self.limiter.rate, 10)
+
+    def test_on_success_compares_latencies_by_kind(self):
+        """test_on_success_compares_latencies_by_kind"""
+        # Arrange
+        self.limiter.on_success(0.05, kind="Identify")
+
+        # Act
+        for _ in range(100):
+            self.limiter.on_success(3, kind="ListRecords")
+
+        # Assert
+        self.assertEqual(self.limiter.rate, 10)
+
+    def test_on_success_recovers_from_a_single_fast_latency(self):
+        """test_on_success_recovers_from_a_single_fast_latency"""
+        # Arrange
+        self.limiter.on_success(0.05)
+
+        # Act
+        for _ in range(300):
+            self.limiter.on_success(3)
+
+        # Assert
+        self.assertEqual(self.limiter.rate, 10)
+
+
+class TestGetLimiter(TestCase):
+    """Test Get Limiter"""
+
+    def setUp(self):
+        """setUp"""
+        rate_limit_operations.clear_limiters()
+
+    def tearDown(self):
+        """tearDown"""
+        rate_limit_operations.clear_limiters()
+
+    def test_get_limiter_returns_same_limiter_for_same_host(self):
+        """test_get_limiter_returns_same_limiter_for_same_host"""
+        # Act
+        first_limiter = rate_limit_operations.get_limiter(
+            "http://www.server.com/oai/pmh"
+        )
+        second_limiter = rate_limit_operations.get_limiter(
+            "http://www.server.com/schema.xsd"
+        )
+
+        # Assert
+        self.assertIs(first_limiter, second_limiter)
+
+    @patch.object(rate_limit_operations, "OAI_HARVESTER_RATE_LIMIT", 0)
+    def test_get_limiter_returns_none_when_disabled(self):
+        """test_get_limiter_returns_none_when_disabled"""
+        # Act
+        limiter = rate_limit_operations.get_limiter(
+            "http://www.server.com/oai/pmh"
+        )
+
+        # Assert
+        self.assertIsNone(limiter)
+
+
+class TestParseRetryAfter(TestCase):
+    """Test Parse Retry After"""
+
+    def test_parse_retry_after_seconds(self):
+        """test_parse_retry_after_seconds"""
+        # Act
+        result = rate_limit_operations.parse_retry_after("120")
+
+        # Assert
+        self.assertEqual(result, 120)
+
+    def test_parse_retry_after_past_http_date_returns_zero(self):
+        """test_parse_retry_after_past_http_date_returns_zero"""
+        # Act
+        result = rate_limit_operations.parse_retry_after(
+            "Wed, 21 Oct 2015 07:28:00 GMT"
+        )
+
+        # Assert
+        self.assertEqual(result, 0)
+
+    def test_parse_retry_after_invalid_returns_none(self):
+        """test_parse_retry_after_invalid_returns_none"""
+        # Act
+        result = rate_limit_operations.parse_retry_after("soon")
+
+        # Assert
+        self.assertIsNone(result)
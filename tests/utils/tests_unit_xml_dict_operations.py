@@ -0,0 +1,74 @@
+"""
+    XML dict operations test class
+"""
+
+from unittest import TestCase
+
+from lxml import etree
+
+from core_main_app.utils.xml import raw_xml_to_dict
+from core_oaipmh_harvester_app.utils.xml_dict_operations import (
+    element_to_dict,
+)
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+XML_DOCUMENT = """<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"
+    xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+  <metadata>
+    <x:root xmlns:x="urn:x" xsi:schemaLocation="urn:x x.xsd" xml:lang="en">
+      text <x:value>1</x:value><!-- comment -->tail
+      <item xmlns="urn:item" xmlns:y="urn:y" y:attr="2.5">item</item>
+      <x:value>3</x:value>
+    </x:root>
+  </metadata>
+</OAI-PMH>"""
+
+
+class TestElementToDict(TestCase):
+    """Test Element To Dict"""
+
+    def setUp(self):
+        """setUp"""
+        xml_tree = etree.fromstring(
+            XML_DOCUMENT, etree.XMLParser(remove_blank_text=True)
+        )
+        self.element = xml_tree.find(
+            "{http://www.openarchives.org/OAI/2.0/}metadata/*"
+        )
+
+    def test_element_to_dict_returns_same_dict_as_raw_xml_to_dict(self):
+        """test_element_to_dict_returns_same_dict_as_raw_xml_to_dict"""
+        # Act
+        result = element_to_dict(self.element)
+
+        # Assert
+        self.assertEqual(
+            result, raw_xml_to_dict(XSDTree.tostring(self.element))
+        )
+
+    def test_element_to_dict_with_options_returns_same_dict_as_raw_xml_to_dict(
+        self,
+    ):
+        """test_element_to_dict_with_options_returns_same_dict_as_raw_xml_to_dict"""
+        # Act
+        result = element_to_dict(
+            self.element, postprocessor="NUMERIC", force_list=True
+        )
+
+        # Assert
+        self.assertEqual(
+            result,
+            raw_xml_to_dict(
+                XSDTree.tostring(self.element),
+                postprocessor="NUMERIC",
+                force_list=True,
+            ),
+        )
+
+    def test_element_to_dict_removes_lists_over_limit(self):
+        """test_element_to_dict_removes_lists_over_limit"""
+        # Act
+        result = element_to_dict(self.element, list_limit=1)
+
+        # Assert
+        self.assertNotIn("x:value", result["x:root"])